@@ -1,23 +1,22 @@
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 import os
-import time
 import re
+import sys
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 # Input and output file names
 input_csv = '1_InPress/fast_track_items.csv'
 log_filename = '1_InPress/processed_urls.log'
 output_csv = '1_InPress/filtered_InPress_articles_info_abs.csv'
 
-# Setup headers for requests
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36"
-}
-
-def fetch_articles(url, headers):
+def fetch_articles(url):
     try:
-        response = requests.get(url, headers=headers, timeout=120)
+        # Shared connection pool; per-host concurrency limit replaces the old 1 s sleep
+        response = http_client.get(url, timeout=120)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
 
@@ -67,17 +66,23 @@ if os.path.exists(log_filename):
 if not os.path.exists(output_csv):
     pd.DataFrame(columns=['Title', 'Authors', 'Pages', 'Access', 'URL', 'Abstract']).to_csv(output_csv, index=False)
 
-# Process each URL
+# Collect URLs that still need processing
+pending = []
 for idx, row in df_input.iterrows():
     url = row['Link']
 
     if url in processed_urls:
         print(f"Skipping already processed URL: {url}")
         continue
+    pending.append(row)
 
-    print(f"Processing URL: {url}")
+def fetch_row(row):
+    print(f"Processing URL: {row['Link']}")
+    return fetch_articles(row['Link'])
 
-    authors, abstract = fetch_articles(url, headers)
+# Process each URL (fetched concurrently, written in input order)
+for row, (authors, abstract) in zip(pending, http_client.imap(fetch_row, pending)):
+    url = row['Link']
 
     # Use 'Date' as 'Pages'
     new_row = pd.DataFrame([{
@@ -99,6 +104,4 @@ for idx, row in df_input.iterrows():
     with open(log_filename, 'a') as log_file:
         log_file.write(url + '\n')
 
-    time.sleep(1)  # Be polite to the server
-
 print("✅ All articles processed and saved with cleaned author names!")
\ No newline at end of file
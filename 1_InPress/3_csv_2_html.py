@@ -63,63 +63,56 @@
 
 # print(f"✅ Combined HTML content successfully saved to {combined_filename}")
 
-import pandas as pd
-
-# Load the CSV file
-csv_filename = "1_InPress/filtered_InPress_articles_info_abs.csv"
-articles = pd.read_csv(csv_filename)
-
-# Filter out articles with "No Abstract"
-articles = articles[articles["Abstract"] != "No Abstract"]
-
-# NEW: clean titles that contain ""
-articles["Title"] = articles["Title"].astype(str).str.replace('"', "", regex=False).str.strip()
-
-# NEW: sort descending by available online date (Pages)
-# If parsing fails, it becomes NaT and goes to the bottom
-articles["_sort_date"] = pd.to_datetime(articles["Pages"], errors="coerce")
-articles = articles.sort_values("_sort_date", ascending=False, na_position="last").drop(columns=["_sort_date"]).reset_index(drop=True)
-
-# Start the combined HTML content
-html_combined = ""
-
-# Generate HTML for each article
-for index, row in articles.iterrows():
-    border_style = "border-top: 1px solid #000; padding: 15px;" if index > 0 else "padding: 15px;"
-    article_html = f'<article style="{border_style}">\n'
+import os
+import sys
 
-    access_text = '<span style="color: rgb(0, 191, 255);">Open Access</span>' if row["Access"] == "Open Access content" else ""
-    article_html += f'''    <div style="display: flex; justify-content: space-between; align-items: center;">
-        <div style="font-weight: bold; color: gray;">Research Articles {access_text}</div>
-    </div>\n'''
-
-    if pd.notna(row["Title"]) and row["Title"] != "N/A" and str(row["Title"]).strip() != "":
-        article_html += f'''    <h3 style="margin: 5px 0;">
-        <a href="{row["URL"]}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: #1b5faa;">
-            {row["Title"]}
-        </a>
-    </h3>\n'''
-
-    if pd.notna(row["Pages"]) and row["Pages"] != "N/A":
-        article_html += f'    <div style="font-style: italic;">Avaliable online: {row["Pages"]}</div>\n'
-
-    if pd.notna(row["Authors"]) and row["Authors"] != "N/A":
-        article_html += f'    <div>Authors: {row["Authors"]}</div>\n'
-
-    if pd.notna(row["Abstract"]) and row["Abstract"] != "N/A":
-        article_html += f'''    <div>
-        Abstract:
-        <details>
-            <summary style="color: #1b5faa;">Read more...</summary>
-            {row["Abstract"]}
-        </details>
-    </div>\n'''
-
-    article_html += "</article>\n"
-    html_combined += article_html
-
-combined_filename = "in_press_articles.html"
-with open(combined_filename, "w", encoding="utf-8") as file:
-    file.write(html_combined)
+import pandas as pd
 
-print(f"✅ Combined HTML content successfully saved to {combined_filename}")
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from templates import CARD_CLASS, CARD_RULED_CLASS, atomic_output, render_card, stylesheet_link, text
+
+CSV_FILENAME = "1_InPress/filtered_InPress_articles_info_abs.csv"
+OUTPUT_FILENAME = "in_press_articles.html"
+
+
+def generate_inpress_html(articles=None, output_path=OUTPUT_FILENAME):
+    """生成 in_press_articles.html；articles 为空时从 CSV 读取（供流水线直接传 DataFrame）"""
+    if articles is None:
+        articles = pd.read_csv(CSV_FILENAME)
+    else:
+        articles = articles.copy()
+
+    # Filter out articles with "No Abstract"
+    articles = articles[articles["Abstract"] != "No Abstract"]
+
+    # NEW: clean titles that contain ""
+    articles["Title"] = articles["Title"].astype(str).str.replace('"', "", regex=False).str.strip()
+
+    # NEW: sort descending by available online date (Pages)
+    # If parsing fails, it becomes NaT and goes to the bottom
+    articles["_sort_date"] = pd.to_datetime(articles["Pages"], errors="coerce")
+    articles = articles.sort_values("_sort_date", ascending=False, na_position="last").drop(columns=["_sort_date"]).reset_index(drop=True)
+
+    # Generate HTML for each article, streamed straight to the output file
+    with atomic_output(output_path) as stream:
+        stream.write(stylesheet_link())
+        for index, row in enumerate(articles.to_dict("records")):
+            pages = text(row["Pages"])
+            render_card(
+                stream,
+                title=text(row["Title"]).strip(),
+                url=row["URL"],
+                info=f"Avaliable online: {pages}" if pages else "",
+                authors=text(row["Authors"]),
+                abstract=text(row["Abstract"]),
+                open_access=row["Access"] == "Open Access content",
+                card_class=CARD_RULED_CLASS if index > 0 else CARD_CLASS,
+            )
+
+    print(f"✅ Combined HTML content successfully saved to {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    generate_inpress_html()
@@ -179,12 +179,18 @@ def generate_html():
 
     return html_output
 
-# 生成 HTML
-html_content = generate_html()
+def write_issues_html(output_path=None):
+    """生成并保存 issues.html（自动检测运行位置）"""
+    html_content = generate_html()
 
-# 保存（自动检测运行位置）
-output_path = '../issues.html' if os.path.basename(os.getcwd()) == '2_Issues' else 'issues.html'
-with open(output_path, 'w', encoding='utf-8') as f:
-    f.write(html_content)
+    if output_path is None:
+        output_path = '../issues.html' if os.path.basename(os.getcwd()) == '2_Issues' else 'issues.html'
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
 
-print(f"✅ issues.html 已生成: {output_path}")
+    print(f"✅ issues.html 已生成: {output_path}")
+    return output_path
+
+
+if __name__ == '__main__':
+    write_issues_html()
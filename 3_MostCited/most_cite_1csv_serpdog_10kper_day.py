@@ -1,56 +1,27 @@
+import os
+import sys
+
 import pandas as pd
-import requests
-import time
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from citation_providers import SerpdogProvider, fetch_citations_multi
 
 # Load the CSV file
 csv_filename = 'filtered_articles_info_abs.csv'
 articles = pd.read_csv(csv_filename)
 
-# Add a new column to store citation counts
-articles['Citations'] = None
-
-# Set your Serpdog API key
-API_KEY = '66e64a2420f355d4e815dbfa'
-BASE_URL = 'https://api.serpdog.io/scholar'
-
-# Function to get citation count from Serpdog Google Scholar API
-def get_citation_count(title):
-    params = {
-        'api_key': API_KEY,
-        'q': title,
-        'num': 1,  # Get only the top result
-    }
-    try:
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        # Check if there are scholar results
-        if data.get('scholar_results'):
-            first_result = data['scholar_results'][0]
-            citation_info = first_result.get('inline_links', {}).get('cited_by', {})
-
-            # Check if 'total' exists and is a numeric citation count
-            citation_total = citation_info.get('total', "")
-            if citation_total.startswith("Cited by"):
-                return int(citation_total.replace("Cited by ", "").strip())
-    except Exception as e:
-        print(f"Error retrieving citation count for '{title}': {e}")
-    
-    # Return None if no citation count is found or if there's an error
-    return None
-
-# Process each title
-for index, row in articles.iterrows():
-    title = row['Title']
-    print(f"Searching citation count for: {title}")
-
-    # Retrieve the citation count
-    citation_count = get_citation_count(title)
-    articles.at[index, 'Citations'] = citation_count
-    
-    # Delay to respect API rate limits
-    time.sleep(2)  # Adjust this delay based on your API rate limits
+# Serpdog API key 从环境变量 SERPDOG_API_KEY 读取（见 .env.example）
+provider = SerpdogProvider()
+if not provider.available():
+    print("❌ 未配置 SERPDOG_API_KEY")
+    sys.exit(1)
+
+# 限速、并发和重试由 citation_providers / async_http 处理，不再逐篇 sleep
+print(f"Searching citation counts for {len(articles)} titles ({provider.describe()})")
+results, stats = fetch_citations_multi([(None, title) for title in articles['Title']], [provider])
+articles['Citations'] = pd.array([result.citations for result in results], dtype='Int64')
+print(f"Requests: {stats['serpdog']['requests']} (retries {stats['serpdog']['retries']})")
 
 # Save updated data to a new CSV
 updated_csv_filename = 'articles_with_citations.csv'
@@ -1,8 +1,13 @@
 import pandas as pd
 import re
 from bs4 import BeautifulSoup  # Add this import statement
-import requests  # Add this import statement
 import os  # Add this import statement
+import sys
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+from templates import CARD_RULED_CLASS, atomic_output, render_card, stylesheet_link, text
 
 
 def load_data_from_doi(csv_filename):
@@ -39,18 +44,27 @@ def load_data_from_doi(csv_filename):
         if column not in input_df.columns:
             input_df[column] = None
 
-    # Headers for HTTP requests
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-
-    # Process DOIs and update the file incrementally
+    # Skip DOIs that already have Title / Abstract / Authors
+    pending = []
     for doi, url in do_urls.items():
         if doi in processed_dois and not input_df[input_df['DOI'] == doi][['Title', 'Abstract', 'Authors']].isnull().values.any():
             print(f"Skipping already processed DOI: {doi}")
             continue
+        pending.append((doi, url))
 
+    def fetch(item):
+        doi, url = item
         print(f"Processing: {url}")
-        response = requests.get(url, headers=headers)
+        try:
+            return doi, url, http_client.get(url)
+        except Exception as e:
+            print(f"Failed to fetch the page at {url}: {e}")
+            return doi, url, None
 
+    # Process DOIs concurrently (shared connection pool) and update the file incrementally, in order
+    for doi, url, response in http_client.imap(fetch, pending):
+        if response is None:
+            continue
         if response.status_code != 200:
             print(f"Failed to fetch the page at {url}")
             continue
@@ -146,68 +160,20 @@ def generate_top_articles_html(csv_filename, output_filename, top_n=6):
     # Limit to the top N articles
     articles = articles.head(top_n)
 
-    # Start the HTML content
-    html_content = ""
-
-
-    # Generate HTML for each article
-    for index, row in articles.iterrows():
-        # Set article border-top style except for the first article
-        border_style = "border-top: 1px solid #000; padding: 15px;" 
-        
-    
-        # Start the article section
-        article_html = f'<article style="{border_style}">\n'
-        
-        # Add the header section with "ASPRS Member entry" if not open access
-        if row['Access'] == "Open Access content":
-            access_text = '<span style="color: rgb(0, 191, 255);">Open Access</span>'
-            member_entry = ""
-        else:
-            access_text = ""
-            # member_entry = ('<a href="https://my.asprs.org/ASPRSMember/Contacts/Sign_In.aspx?LoginRedirect=true&amp;returnurl=%2f" '
-            #                 'style="font-style: italic; padding: 3px 8px; background-color: #f1f1f1; border: 1px solid #1b5faa; '
-            #                 'border-radius: 3px; text-decoration: none; color: #1b5faa;">ASPRS Member entry</a>')
-            member_entry = ""
-            
-
-        # Header with access info and ASPRS Member entry link if needed
-        article_html += f'    <div style="display: flex; justify-content: space-between; align-items: center;">\n'
-        article_html += f'        <div style="font-weight: bold; color: gray;">Research Articles {access_text}</div>\n'
-        article_html += f'        {member_entry}\n'
-        article_html += f'    </div>\n'
-        
-        # Add the title and link
-        article_html += f'    <h3 style="margin: 5px 0;">\n'
-        article_html += f'        <a href="{row["URL"]}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: #1b5faa;">\n'
-        article_html += f'            {row["Item Title"]}\n'
-        article_html += f'        </a>\n'
-        article_html += f'    </h3>\n'
-        
-        # Add the publication info (date and pages)
-        article_html += f"    <div style=\"font-style: italic;\">Year: {row['Year']}, Volume: {row['Volume']}, Issue: {row['Issue']}</div>\n"
-        
-        # Add authors
-        article_html += f'    <div>Authors: {row["Authors"]}</div>\n'
-        
-        # Add abstract with foldable content using <details> and <summary>
-        article_html += f'''    <div>
-            Abstract: 
-            <details>
-                <summary style="color: #1b5faa;">{'Read more'}...</summary>
-                {row["Abstract"]}
-            </details>
-        </div>\n'''
-
-        # Close the article section
-        article_html += '</article>\n'
-
-        # Append the article HTML to the content
-        html_content += article_html
-
-    # Save to HTML file
-    with open(output_filename, 'w', encoding='utf-8') as file:
-        file.write(html_content)
+    # Generate HTML for each article, streamed straight to the output file
+    with atomic_output(output_filename) as stream:
+        stream.write(stylesheet_link())
+        for row in articles.to_dict('records'):
+            render_card(
+                stream,
+                title=text(row["Item Title"]),
+                url=row["URL"],
+                info=f"Year: {row['Year']}, Volume: {row['Volume']}, Issue: {row['Issue']}",
+                authors=text(row["Authors"]),
+                abstract=text(row["Abstract"]),
+                open_access=row['Access'] == "Open Access content",
+                card_class=CARD_RULED_CLASS,
+            )
 
     print(f"HTML content successfully saved to {output_filename}")
 
@@ -1,10 +1,39 @@
-import requests
 from bs4 import BeautifulSoup
 import csv
+import os
+import sys
 import pandas as pd
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-import requests
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+
+
+def fetch_page(url):
+    # 共享连接池 + 重试；失败返回 None
+    try:
+        return http_client.get(url)
+    except Exception as e:
+        print(f"Failed to fetch the page at {url}: {e}")
+        return None
+
+
+def fetch_abstract(article_url):
+    print(f"Fetching abstract for {article_url}")
+    try:
+        article_response = http_client.get(article_url)
+        if article_response.status_code == 200:
+            article_soup = BeautifulSoup(article_response.content, 'html.parser')
+
+            # Locate the abstract section (adjust selector based on the actual HTML structure)
+            abstract_div = article_soup.find('div', id="Abst")
+            if abstract_div:
+                return abstract_div.get_text(strip=True).replace('\n', ' ').replace('\r', '').strip()
+    except Exception as e:
+        print(f"Failed to fetch abstract for {article_url}: {e}")
+    return 'N/A'
 
 
 # return df
@@ -34,22 +63,13 @@ def fetch_to_csv(how_many_months=24):
         print(url)
         urls.append(url)
 
-    # Request headers for simulating a browser
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)'
-                    ' Chrome/58.0.3029.110 Safari/537.3'
-    }
-
     # List to store all articles data across URLs
     all_articles_data = []
 
-    # Iterate over each URL
-    for url in urls:
-        # Request the page content
-        response = requests.get(url, headers=headers, verify=False)
-    
+    # Iterate over each URL (issue pages are fetched concurrently, in order)
+    for url, response in zip(urls, http_client.imap(fetch_page, urls)):
         # Check if page was fetched correctly
-        if response.status_code != 200:
+        if response is None or response.status_code != 200:
             print(f"Failed to fetch the page at {url}")
             continue  # Skip this URL if it failed to fetch
 
@@ -74,21 +94,8 @@ def fetch_to_csv(how_many_months=24):
                         article_link_tag = sibling.find('a')
                         article_url = "https://www.ingentaconnect.com" + article_link_tag['href'] if article_link_tag else 'N/A'
                         
-                        # Extract Abstract by visiting the article URL
-                        abstract = 'N/A'  # Default value in case of failure
-                        if article_url != 'N/A':
-                            print(f"Fetching abstract for {article_url}")
-                            try:
-                                article_response = requests.get(article_url, headers=headers, verify=False)
-                                if article_response.status_code == 200:
-                                    article_soup = BeautifulSoup(article_response.content, 'html.parser')
-
-                                    # Locate the abstract section (adjust selector based on the actual HTML structure)
-                                    abstract_div = article_soup.find('div', id="Abst")  
-                                    if abstract_div:
-                                        abstract = abstract_div.get_text(strip=True).replace('\n', ' ').replace('\r', '').strip()
-                            except Exception as e:
-                                print(f"Failed to fetch abstract for {article_url}: {e}")
+                        # Abstract is fetched below, concurrently for all articles
+                        abstract = 'N/A'
 
                         # Extract authors
                         authors_tag = sibling.find('em')
@@ -121,6 +128,12 @@ def fetch_to_csv(how_many_months=24):
                             'Abstract': abstract  
                         })
 
+    # Extract Abstract by visiting the article URLs
+    article_urls = list(dict.fromkeys(article['URL'] for article in all_articles_data if article['URL'] != 'N/A'))
+    abstracts = dict(zip(article_urls, http_client.imap(fetch_abstract, article_urls)))
+    for article in all_articles_data:
+        article['Abstract'] = abstracts.get(article['URL'], 'N/A')
+
     # Convert to DataFrame to remove duplicates
     # df = pd.DataFrame(all_articles_data)
     df = pd.DataFrame(all_articles_data, columns=['Title', 'Authors', 'Pages', 'Access', 'URL', 'Abstract'])
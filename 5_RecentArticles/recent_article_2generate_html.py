@@ -1,16 +1,16 @@
-import pandas as pd
+import os
 import re
+import sys
 
-# Load the CSV file
-csv_filename = '5_RecentArticles/filtered_articles_info_abs.csv'
-articles = pd.read_csv(csv_filename)
+import pandas as pd
 
-# Filter out articles with "No Abstract"
-articles = articles[articles["Abstract"] != "No Abstract"]
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from templates import CARD_CLASS, CARD_RULED_CLASS, atomic_output, render_card, stylesheet_link, text
 
-# Start the HTML content for Open Access and non-Open Access
-html_open_access = ""
-html_member_only = ""
+CSV_FILENAME = '5_RecentArticles/filtered_articles_info_abs.csv'
+OPEN_ACCESS_FILENAME = 'open_access_articles.html'
+MEMBER_ONLY_FILENAME = 'member_only_articles.html'
 
 # Helper function to get publication date
 def get_pub_date(row):
@@ -36,92 +36,53 @@ def get_pub_date(row):
         return f"{month} {year}"
     return "Unknown Date"
 
-# Generate HTML for each article
-article_count_oa = 0  # Counter for Open Access articles
-article_count_member = 0  # Counter for Member-only articles
-
-for index, row in articles.iterrows():
-    # Determine border style based on article position in its category
-    is_open_access = (row['Access'] == "Open Access content")
-    
-    if is_open_access:
-        border_style = "border-top: 1px solid #000; padding: 15px;" if article_count_oa > 0 else "padding: 15px;"
-        article_count_oa += 1
-    else:
-        border_style = "border-top: 1px solid #000; padding: 15px;" if article_count_member > 0 else "padding: 15px;"
-        article_count_member += 1
-    
-    # Get the publication date
-    pub_date = get_pub_date(row)
-    
-    # Start the article section
-    article_html = f'<article style="{border_style}">\n'
-    
-    # Add the header section with "ASPRS Member entry" if not open access
-    if row['Access'] == "Open Access content":
-        access_text = '<span style="color: rgb(0, 191, 255);">Open Access</span>'
-        member_entry = ""
-    else:
-        access_text = ""
-        member_entry = ""
-
-    # Header with access info and ASPRS Member entry link if needed
-    article_html += f'    <div style="display: flex; justify-content: space-between; align-items: center;">\n'
-    article_html += f'        <div style="font-weight: bold; color: gray;">Research Articles {access_text}</div>\n'
-    article_html += f'        {member_entry}\n'
-    article_html += f'    </div>\n'
-    
-    # Add the title and link
-    article_html += f'    <h3 style="margin: 5px 0;">\n'
-    article_html += f'        <a href="{row["URL"]}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: #1b5faa;">\n'
-    article_html += f'            {row["Title"]}\n'
-    article_html += f'        </a>\n'
-    article_html += f'    </h3>\n'
-    
-    # Add the publication info (date and pages)
-    article_html += f'    <div style="font-style: italic;">{pub_date}, {row["Pages"]}</div>\n'
-    
-    # Add authors
-    article_html += f'    <div>Authors: {row["Authors"]}</div>\n'
-    
-    # Add abstract with foldable content using <details> and <summary>
-    article_html += f'''    <div>
-        Abstract: 
-        <details>
-            <summary style="color: #1b5faa;">{'Read more'}...</summary>
-            {row["Abstract"]}
-        </details>
-    </div>\n'''
-
-
-    
-    # Close the article section
-    article_html += '</article>\n'
-
-    # Append the article HTML to the appropriate content based on access level
-    if row['Access'] == "Open Access content":
-        html_open_access += article_html
-    else:
-        html_member_only += article_html
-
-# Add JavaScript and CSS for foldable functionality
-foldable_script = ''''''
-
-
-# Include the script in the HTML files
-html_open_access = foldable_script + html_open_access
-html_member_only = foldable_script + html_member_only
-
-# Save to HTML files
-open_access_filename = 'open_access_articles.html'
-member_only_filename = 'member_only_articles.html'
-
-with open(open_access_filename, 'w', encoding='utf-8') as file:
-    file.write(html_open_access)
-
-with open(member_only_filename, 'w', encoding='utf-8') as file:
-    file.write(html_member_only)
-
-print(f"Open Access HTML content successfully saved to {open_access_filename}")
-print(f"Member Only HTML content successfully saved to {member_only_filename}")
-
+def generate_recent_html(articles=None):
+    """生成 open_access_articles.html 和 member_only_articles.html
+
+    articles 为空时从 CSV 读取；流水线可直接传入最近6个月的 DataFrame
+    """
+    if articles is None:
+        articles = pd.read_csv(CSV_FILENAME)
+
+    # Filter out articles with "No Abstract"
+    articles = articles[articles["Abstract"] != "No Abstract"]
+
+    # Open Access 与 Member Only 分别写入两个文件，每个文件的第一张卡片没有上边框
+    with atomic_output(OPEN_ACCESS_FILENAME) as open_access_stream, \
+            atomic_output(MEMBER_ONLY_FILENAME) as member_only_stream:
+        link = stylesheet_link()
+        open_access_stream.write(link)
+        member_only_stream.write(link)
+        article_count_oa = 0  # Counter for Open Access articles
+        article_count_member = 0  # Counter for Member-only articles
+
+        for row in articles.to_dict('records'):
+            is_open_access = (row['Access'] == "Open Access content")
+            if is_open_access:
+                stream, position = open_access_stream, article_count_oa
+                article_count_oa += 1
+            else:
+                stream, position = member_only_stream, article_count_member
+                article_count_member += 1
+
+            render_card(
+                stream,
+                title=text(row["Title"]),
+                url=row["URL"],
+                info=f'{get_pub_date(row)}, {text(row["Pages"])}',
+                authors=text(row["Authors"]),
+                abstract=text(row["Abstract"]),
+                open_access=is_open_access,
+                card_class=CARD_RULED_CLASS if position > 0 else CARD_CLASS,
+            )
+
+    open_access_filename = OPEN_ACCESS_FILENAME
+    member_only_filename = MEMBER_ONLY_FILENAME
+
+    print(f"Open Access HTML content successfully saved to {open_access_filename}")
+    print(f"Member Only HTML content successfully saved to {member_only_filename}")
+    return open_access_filename, member_only_filename
+
+
+if __name__ == '__main__':
+    generate_recent_html()
@@ -1,14 +1,29 @@
+import argparse
+import functools
 import glob
+import multiprocessing
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from build_manifest import hash_file
+from build_state import BuildState, ga_image_hashes, issue_row_hash
+from ga_images import ga_relative_path, load_variant_manifest
+from templates import atomic_output, publish_stylesheet, render_card, render_to, text
+from issue_keys import with_issue_columns
+
 # Load the CSV file
 csv_filename = '6_IssuesArticles/ALL_articles_Update_cleaned.csv'
-articles = pd.read_csv(csv_filename)
 
-# Log file to track processed issues
-log_filename = '6_IssuesArticles/processed_issues.log'
+
+# 期刊页用到的模板（templates.py 含卡片渲染代码）；内容变化时所有期刊页重新渲染
+PAGE_TEMPLATES = ['templates.py', 'templates/issue_page_start.html', 'templates/issue_page_end.html',
+                  'templates/article_card.html']
 
 # Base URL for graphical abstracts on GitHub
 ga_base_url = "https://raw.githubusercontent.com/tang1693/PERShtml/refs/heads/main/IssuesArticles/html/img"
@@ -50,54 +65,28 @@ def is_open_access(row, overrides) -> bool:
     return False
 
 
-def get_issue_key(row):
-    """从行中获取期刊key (格式: YYYYMM)"""
-    if 'IssueKey' in row.index and pd.notna(row['IssueKey']):
-        text = str(row['IssueKey']).strip()
-        if re.fullmatch(r'\d{6}', text):
-            return text
-
-        match = re.fullmatch(r'(\d{6})\.0+', text)
-        if match:
-            return match.group(1)
-
-        # Historical bug: pandas float year + issue produced values like 2026.006.
-        match = re.fullmatch(r'(\d{4})\.(\d{1,3})', text)
-        if match:
-            year, issue = match.groups()
-            return f"{year}{int(issue):02d}"
-
-    url = row['URL']
-    match = re.search(r'/(\d{4})/000000(\d+)/000000(\d+)', url)
-    if match:
-        year = match.group(1)
-        issue = int(match.group(3))
-        return f"{year}{issue:02d}"
-
-    return None
-
-
 def get_ga_image_url(row, issue):
-    if 'GA_Path' in row.index and pd.notna(row['GA_Path']):
-        return str(row['GA_Path'])
-    return None
+    return text(row.get('GA_Path')) or None
 
+# GA 显示宽度：文章卡片最宽 900px（含内边距），图片最宽 800px
+GA_SIZES = "(max-width: 840px) 100vw, 800px"
+GA_SOURCE_TYPES = [('avif', 'image/avif'), ('webp', 'image/webp')]
 
-access_overrides = build_access_overrides()
 
-processed_issues = set()
-if os.path.exists(log_filename):
-    with open(log_filename, 'r') as log_file:
-        processed_issues = set(log_file.read().splitlines())
+def ga_image_html(ga_image_url, variants=None):
+    """有变体记录时输出 <picture>/srcset（原 PNG 作为回退），否则输出懒加载的 <img>"""
+    if not variants:
+        return f'<img src="{ga_image_url}" alt="Graphical Abstract" class="graphical-abstract" loading="lazy">'
 
-articles['_issue_key'] = articles.apply(get_issue_key, axis=1)
-articles = articles[articles['_issue_key'].notna()]
-
-print(f"📊 共有 {len(articles)} 篇文章待处理")
-print(f"📊 涉及 {articles['_issue_key'].nunique()} 个期刊号")
-
-grouped_articles = articles.groupby('_issue_key')
-link_attrs = 'target="_blank" rel="noopener noreferrer"'
+    sources = []
+    for image_format, mime_type in GA_SOURCE_TYPES:
+        items = variants['variants'].get(image_format)
+        if items:
+            srcset = ', '.join(f"{path} {width}w" for path, width, _ in items)
+            sources.append(f'<source type="{mime_type}" srcset="{srcset}" sizes="{GA_SIZES}">')
+    img = (f'<img src="{ga_image_url}" alt="Graphical Abstract" class="graphical-abstract" '
+           f'width="{variants["width"]}" height="{variants["height"]}" loading="lazy" decoding="async">')
+    return '<picture>\n        ' + '\n        '.join(sources + [img]) + '\n    </picture>'
 
 EDITOR_CHOICE_TITLES = {
     normalize_title('CGMSANet: Hyperspectral Image Classification through Channel-Grouped Multi-Scale Feature Fusion and Attention Mechanisms'),
@@ -109,14 +98,15 @@ def is_editor_choice(title: str) -> bool:
     return normalize_title(str(title)) in EDITOR_CHOICE_TITLES
 
 
-EDITOR_CHOICE_BADGE = '<span style="background-color: gold; color: black; font-weight: bold; padding: 3px 8px; border-radius: 5px; font-size: 12px; margin-left: 0px;">\n                Editor’s Choice\n            </span>'
+EDITOR_CHOICE_BADGE = '<span class="pers-badge--editor">Editor’s Choice</span>'
 
 
-for issue, issue_articles in grouped_articles:
-    if not issue or issue in processed_issues:
-        print(f"⏭️  跳过期刊 {issue} (已处理或无效)")
-        continue
+def render_issue_page(stream, issue, issue_articles, access_overrides, ga_variants=None, stylesheet=None):
+    """把单期 HTML 页面写入 stream（issue 格式: YYYYMM）
 
+    ga_variants 为 {GA_Path: 变体记录}；stylesheet 为 publish_stylesheet() 返回的站点相对路径
+    """
+    ga_variants = ga_variants or {}
     year = issue[:4]
     issue_no = issue[4:].zfill(2)
     title = f"Issue {issue_no} - Year {year}"
@@ -132,144 +122,162 @@ for issue, issue_articles in grouped_articles:
     print(f"📄 处理期刊: {title} ({len(issue_articles)} 篇文章)")
     print(f"{'='*60}")
 
-    issue_html = f"""
-    <!DOCTYPE html>
-    <html lang=\"en\">
-    <head>
-        <meta charset=\"UTF-8\">
-        <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">
-        <title>{title}</title>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                line-height: 1.6;
-                margin: 0;
-                padding: 0;
-                background-color: #f9f9f9;
-                color: #333;
-            }}
-            header {{
-                background-color: #1b5faa;
-                color: white;
-                padding: 20px;
-                text-align: center;
-            }}
-            article {{
-                background-color: #fff;
-                margin: 20px auto;
-                padding: 20px;
-                border: 1px solid #ddd;
-                border-radius: 5px;
-                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-                max-width: 900px;
-            }}
-            h3 {{
-                color: #1b5faa;
-                margin-bottom: 10px;
-            }}
-            a {{
-                text-decoration: none;
-                color: #1b5faa;
-            }}
-            a:hover {{
-                text-decoration: underline;
-            }}
-            .graphical-abstract {{
-                width: 100%;
-                max-width: 800px;
-                height: auto;
-                margin-top: 15px;
-                border: 1px solid #ccc;
-                border-radius: 5px;
-            }}
-            details {{
-                margin-top: 10px;
-            }}
-            summary {{
-                color: #1b5faa;
-                cursor: pointer;
-            }}
-            summary:hover {{
-                text-decoration: underline;
-            }}
-            footer {{
-                text-align: center;
-                padding: 20px;
-                background-color: #1b5faa;
-                color: white;
-                margin-top: 40px;
-            }}
-        </style>
-    </head>
-    <body>
-        <header>
-            <h1>{title}</h1>
-            <p><a href=\"{issue_url}\" style=\"color: white; text-decoration: underline;\">View Full Issue</a></p>
-        </header>
-    """
+    stylesheet = stylesheet or publish_stylesheet()
+    # 期刊页位于 IssuesArticles/html/，样式表在站点根目录的 assets/ 下
+    render_to(stream, 'issue_page_start.html', title=title, issue_url=issue_url, stylesheet=f"../../{stylesheet}")
 
-    for _, row in issue_articles.iterrows():
+    for row in issue_articles.to_dict('records'):
         ga_image_url = get_ga_image_url(row, issue)
 
         if ga_image_url:
             print(f"   ✅ GA: {row['Title'][:50]}... -> {ga_image_url.split('/')[-1]}")
-            ga_image_html = f'<img src="{ga_image_url}" alt="Graphical Abstract" class="graphical-abstract">'
+            ga_html = ga_image_html(ga_image_url, ga_variants.get(ga_image_url))
         else:
             print(f"   ⚠️  无 GA: {row['Title'][:50]}...")
-            ga_image_html = ''
+            ga_html = ''
 
-        oa_badge = '<span style="color: rgb(0, 191, 255);">Open Access</span>' if is_open_access(row, access_overrides) else ''
         title_text = row.get('Title', 'Untitled') or 'Untitled'
-        editor_choice_badge = EDITOR_CHOICE_BADGE if is_editor_choice(title_text) else ''
         url = row.get('URL')
-        url = url if isinstance(url, str) and url.strip() else '#'
-
-        pages_value = row.get('Pages', '')
-        pages_text = '' if pd.isna(pages_value) else str(pages_value)
-        authors_value = row.get('Authors', '')
-        authors_text = '' if pd.isna(authors_value) else str(authors_value)
-        abstract_value = row.get('Abstract', '')
-        abstract_text = '' if pd.isna(abstract_value) else str(abstract_value)
-
-        article_html = f"""
-        <article>
-            <div style=\"display: flex; justify-content: space-between; align-items: center;\">
-                <div style=\"font-weight: bold; color: gray;\">Research Articles {oa_badge}</div>
-            </div>
-            {editor_choice_badge}
-            <h3><a href=\"{url}\" {link_attrs}>{title_text}</a></h3>
-            <div style=\"font-style: italic;\">Pages: {pages_text}</div>
-            <div>Authors: {authors_text}</div>
-            <div>
-                Abstract:
-                <details>
-                    <summary>Read more...</summary>
-                    {abstract_text}
-                </details>
-            </div>
-            {ga_image_html}
-        </article>
-        """
-        issue_html += article_html
-
-    issue_html += """
-        <footer>
-            <p>&copy; 2026 ASPRS. All rights reserved.</p>
-        </footer>
-    </body>
-    </html>
-    """
+        pages_text = text(row.get('Pages', ''))
+
+        render_card(
+            stream,
+            title=title_text,
+            url=url if isinstance(url, str) and url.strip() else '#',
+            info=f"Pages: {pages_text}",
+            authors=text(row.get('Authors', '')),
+            abstract=text(row.get('Abstract', '')),
+            open_access=is_open_access(row, access_overrides),
+            badge=EDITOR_CHOICE_BADGE if is_editor_choice(title_text) else '',
+            media=ga_html,
+        )
+
+    render_to(stream, 'issue_page_end.html')
+
+
+# 子进程共享的只读输入：fork 时通过写时复制继承，不再为每期 pickle 一次 DataFrame
+_worker_context = {}
+
+
+def _init_worker(groups, access_overrides, stylesheet):
+    _worker_context['groups'] = groups
+    _worker_context['access_overrides'] = access_overrides
+    _worker_context['stylesheet'] = stylesheet
+
+
+@functools.lru_cache(maxsize=None)
+def template_hashes():
+    return tuple((path, hash_file(path)) for path in PAGE_TEMPLATES)
+
+
+def page_inputs(ga_variants, stylesheet):
+    """除文章行以外影响页面输出的输入：GA 变体尺寸、样式表版本、模板内容（任一变化都要重新渲染）"""
+    return {'ga_variants': ga_variants, 'stylesheet': stylesheet, 'templates': dict(template_hashes())}
+
+
+def _build_issue(issue, ga_variants, row_hash=None, ga_hashes=None):
+    """渲染单期页面（在进程池中运行）；全量重建时哈希也在子进程中计算，返回 (期号, 行哈希, GA 哈希)"""
+    issue_articles = _worker_context['groups'][issue]
+    if row_hash is None:
+        row_hash = issue_row_hash(issue_articles, page_inputs(ga_variants, _worker_context['stylesheet']))
+        ga_hashes = ga_image_hashes(issue_articles)
 
     output_filename = f"IssuesArticles/html/{issue}.html"
-    os.makedirs(os.path.dirname(output_filename), exist_ok=True)
-    with open(output_filename, 'w', encoding='utf-8') as file:
-        file.write(issue_html)
+    with atomic_output(output_filename) as stream:
+        render_issue_page(stream, issue, issue_articles, _worker_context['access_overrides'], ga_variants,
+                          _worker_context['stylesheet'])
+    return issue, row_hash, ga_hashes
+
 
-    print(f"✅ 已生成: {output_filename}")
+def _pool_context():
+    # 支持 fork 的平台用 fork（共享内存写时复制）；否则由 initializer 在每个子进程初始化一次
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
 
-    with open(log_filename, 'a') as log_file:
-        log_file.write(f"{issue}\n")
 
-print("\n" + "="*60)
-print("✅ HTML 生成完成！")
-print("="*60)
+def generate_issue_pages(articles=None, rebuild_all=False, jobs=1):
+    """为未处理的期刊生成 IssuesArticles/html/YYYYMM.html，返回生成的期号列表
+
+    articles 为空时从总库 CSV 读取；流水线可直接传入合并后的 DataFrame
+    rebuild_all=True 时忽略构建状态重建所有期；jobs > 1 时用进程池并行渲染
+    """
+    if articles is None:
+        articles = pd.read_csv(csv_filename)
+
+    access_overrides = build_access_overrides()
+    state = BuildState()
+    variant_manifest = load_variant_manifest()
+    stylesheet = publish_stylesheet()
+
+    # 总库读出的 DataFrame 已带 _issue_key；直接读 CSV 时整列向量化推导
+    articles = with_issue_columns(articles)
+    articles = articles[articles['_issue_key'].notna()]
+
+    print(f"📊 共有 {len(articles)} 篇文章待处理")
+    print(f"📊 涉及 {articles['_issue_key'].nunique()} 个期刊号")
+
+    groups = {}
+    pending = []
+    for issue, issue_articles in articles.groupby('_issue_key'):
+        if not issue:
+            print(f"⏭️  跳过期刊 {issue} (无效)")
+            continue
+        groups[issue] = issue_articles
+        output_filename = f"IssuesArticles/html/{issue}.html"
+
+        # 变体尺寸与样式表也是页面输入：变体（重新）生成或样式修改后该期页面需要重新渲染
+        ga_variants = {}
+        for ga_path in issue_articles.get('GA_Path', pd.Series(dtype=object)).dropna().astype(str):
+            relative_path = ga_relative_path(ga_path)
+            if relative_path in variant_manifest:
+                ga_variants[ga_path] = variant_manifest[relative_path]
+
+        if rebuild_all:
+            pending.append((issue, ga_variants, None, None))
+            continue
+        needs_build, row_hash, ga_hashes = state.check(
+            issue, issue_articles, output_filename, extra=page_inputs(ga_variants, stylesheet)
+        )
+        if not needs_build:
+            print(f"⏭️  跳过期刊 {issue} (已处理且输入未变化)")
+            continue
+        pending.append((issue, ga_variants, row_hash, ga_hashes))
+
+    generated = []
+
+    def record(issue, row_hash, ga_hashes):
+        output_filename = f"IssuesArticles/html/{issue}.html"
+        print(f"✅ 已生成: {output_filename}")
+        state.record(issue, row_hash, ga_hashes, output_filename)
+        generated.append(issue)
+
+    if jobs > 1 and len(pending) > 1:
+        print(f"🚀 并行生成 {len(pending)} 期（{jobs} 个进程）")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=_pool_context(),
+                                 initializer=_init_worker, initargs=(groups, access_overrides, stylesheet)) as executor:
+            futures = [executor.submit(_build_issue, *job) for job in pending]
+            # 构建状态只在主进程写入（SQLite 单写者）
+            for future in as_completed(futures):
+                record(*future.result())
+    else:
+        _init_worker(groups, access_overrides, stylesheet)
+        for job in pending:
+            record(*_build_issue(*job))
+    _worker_context.clear()
+    generated.sort()
+
+    state.close()
+
+    print("\n" + "="*60)
+    print("✅ HTML 生成完成！")
+    print("="*60)
+    return generated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='生成期刊页面 IssuesArticles/html/YYYYMM.html')
+    parser.add_argument('--rebuild-all', action='store_true', help='忽略构建状态，重建所有期（模板修改后使用）')
+    parser.add_argument('--jobs', type=int, default=1, help='并行渲染的进程数（默认 1）')
+    args = parser.parse_args()
+    generate_issue_pages(rebuild_all=args.rebuild_all, jobs=max(1, args.jobs))
@@ -1,10 +1,14 @@
-import requests
 from bs4 import BeautifulSoup
 import csv
 import pandas as pd
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import os
+import sys
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 # Base volume number; adjust if the pattern changes in future years
 VOLUME_BASE_YEAR = 2023
@@ -30,10 +34,27 @@ def generate_urls(how_many_months=24):
         urls.append(url)
     return urls
 
+def fetch_abstract(article_url):
+    try:
+        article_response = http_client.get(article_url)
+        if article_response.status_code == 200:
+            article_soup = BeautifulSoup(article_response.content, 'html.parser')
+            abstract_div = article_soup.find('div', id="Abst")
+            if abstract_div:
+                return abstract_div.get_text(strip=True).replace('\n', ' ').replace('\r', '').strip()
+    except Exception as e:
+        print(f"Failed to fetch abstract for {article_url}: {e}")
+    return 'N/A'
+
 # Fetch articles from a single URL and save data incrementally
-def fetch_articles(url, headers):
+# Returns None when the issue page could not be requested (network error / circuit open), so it is retried next run
+def fetch_articles(url):
     all_articles_data = []
-    response = requests.get(url, headers=headers, verify=False)
+    try:
+        response = http_client.get(url)
+    except Exception as e:
+        print(f"Failed to fetch the page at {url}: {e}")
+        return None
     if response.status_code != 200:
         print(f"Failed to fetch the page at {url}")
         return all_articles_data
@@ -54,17 +75,8 @@ def fetch_articles(url, headers):
                     article_link_tag = sibling.find('a')
                     article_url = "https://www.ingentaconnect.com" + article_link_tag['href'] if article_link_tag else 'N/A'
 
+                    # Abstract is fetched below, concurrently for the whole issue
                     abstract = 'N/A'
-                    if article_url != 'N/A':
-                        try:
-                            article_response = requests.get(article_url, headers=headers, verify=False)
-                            if article_response.status_code == 200:
-                                article_soup = BeautifulSoup(article_response.content, 'html.parser')
-                                abstract_div = article_soup.find('div', id="Abst")
-                                if abstract_div:
-                                    abstract = abstract_div.get_text(strip=True).replace('\n', ' ').replace('\r', '').strip()
-                        except Exception as e:
-                            print(f"Failed to fetch abstract for {article_url}: {e}")
 
                     authors_tag = sibling.find('em')
                     authors = authors_tag.get_text(strip=True) if authors_tag else 'N/A'
@@ -91,15 +103,16 @@ def fetch_articles(url, headers):
                         'URL': article_url,
                         'Abstract': abstract
                     })
+
+    article_urls = list(dict.fromkeys(article['URL'] for article in all_articles_data if article['URL'] != 'N/A'))
+    abstracts = dict(zip(article_urls, http_client.imap(fetch_abstract, article_urls)))
+    for article in all_articles_data:
+        article['Abstract'] = abstracts.get(article['URL'], 'N/A')
     return all_articles_data
 
 # Main function with live CSV updates and resume functionality
 def fetch_to_csv(how_many_months=24):
     urls = generate_urls(how_many_months)
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)'
-                    ' Chrome/58.0.3029.110 Safari/537.3'
-    }
 
     processed_urls = set()
     if os.path.exists(log_filename):
@@ -115,7 +128,9 @@ def fetch_to_csv(how_many_months=24):
             continue
 
         print(f"Processing URL: {url}")
-        articles_data = fetch_articles(url, headers)
+        articles_data = fetch_articles(url)
+        if articles_data is None:
+            continue
 
         if articles_data:
             df = pd.DataFrame(articles_data, columns=['Title', 'Authors', 'Pages', 'Access', 'URL', 'Abstract'])
@@ -1,43 +1,27 @@
 #!/usr/bin/env python3
 """
-提取最近2年的论文，调用 Scopus API 获取引用数，生成 Most Cited HTML
+提取最近2年的论文，从已配置的引用数来源（Scopus / Serpdog / Crossref，见 citation_providers.py）获取引用数，
+生成 Most Cited HTML
+
+同时根据引用数历史计算每月引用数与近期增长（citation_trends.py），供 Trending 片段使用
+
+各来源的引用数口径不同：排行与趋势以主来源（第一个启用的来源）为准，
+采用其他来源引用数的文章 CitationFallback 为 True，排在主来源的文章之后
 """
 
 import os
 import sys
 import pandas as pd
-import requests
-import time
 from datetime import datetime, timedelta
-import re
 
-# Scopus API 配置
-SCOPUS_API_KEY = os.environ.get('SCOPUS_API_KEY', '')
-SCOPUS_API_URL = 'https://api.elsevier.com/content/search/scopus'
-
-def parse_article_date(row):
-    """解析文章日期（从 IssueKey 或 URL）"""
-    # 方法1: IssueKey
-    if pd.notna(row.get('IssueKey')):
-        try:
-            issue_key_str = str(int(row['IssueKey']))
-            if len(issue_key_str) == 6:
-                year = int(issue_key_str[:4])
-                month = int(issue_key_str[4:])
-                return datetime(year, month, 1)
-        except:
-            pass
-    
-    # 方法2: Ingenta URL
-    url = row.get('URL', '')
-    if 'ingentaconnect.com' in url:
-        match = re.search(r'/pers/(\d{4})/\d+/(\d+)/', url)
-        if match:
-            year = int(match.group(1))
-            issue = int(match.group(2))
-            return datetime(year, issue, 1)
-    
-    return None
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from citation_cache import CITATION_BUDGET, CitationCache, citation_key
+from citation_providers import (
+    CITATION_MERGE, configured_providers, fetch_citations_multi, is_fallback, primary_source, rank_by_citations,
+)
+from citation_trends import trend_columns
+from issue_keys import with_issue_columns
 
 def extract_doi(row):
     """从 URL 或 DOI 列提取 DOI"""
@@ -52,70 +36,11 @@ def extract_doi(row):
     
     return None
 
-def get_citation_count(doi=None, title=None):
-    """
-    通过 Scopus API 获取引用数
-    
-    Args:
-        doi: DOI 号（优先使用）
-        title: 文章标题（DOI 不存在时使用）
-    
-    Returns:
-        int: 引用数，失败返回 0
-    """
-    if not SCOPUS_API_KEY:
-        return 0
-    
-    if not doi and not title:
-        return 0
-    
-    try:
-        # 构建查询
-        if doi:
-            query = f'DOI({doi})'
-        else:
-            # 使用标题搜索（需要清理特殊字符）
-            clean_title = title.replace('"', '').replace("'", "")
-            query = f'TITLE("{clean_title}")'
-        
-        params = {
-            'query': query,
-            'apiKey': SCOPUS_API_KEY,
-            'count': 1
-        }
-        
-        headers = {
-            'Accept': 'application/json'
-        }
-        
-        response = requests.get(SCOPUS_API_URL, params=params, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            entries = data.get('search-results', {}).get('entry', [])
-            
-            if entries and len(entries) > 0:
-                # 获取引用数
-                cited_by = entries[0].get('citedby-count', '0')
-                return int(cited_by)
-        elif response.status_code == 429:
-            print(f"   ⚠️  API 限流，等待30秒...")
-            time.sleep(30)
-            return 0
-        else:
-            # 其他错误静默处理
-            pass
-        
-        # 避免 API 限流
-        time.sleep(0.5)
-        
-    except Exception as e:
-        # 静默处理错误
-        pass
-    
-    return 0
+def fetch_most_cited(df_all=None, output_csv=None):
+    """提取最近2年论文并获取引用数，返回按引用数排序的 DataFrame
 
-def main():
+    df_all 为空时从总库 CSV 读取；流水线可直接传入内存中的总库
+    """
     # 配置：时间范围（天数）
     DAYS_RANGE = 365 * 2  # 2年
     
@@ -128,20 +53,23 @@ def main():
     print("=" * 70)
     
     # 1. 读取总库
-    # 支持从项目根目录或 7_MostCited/ 目录运行
-    all_csv = '6_IssuesArticles/ALL_articles_Update_cleaned.csv'
-    if not os.path.exists(all_csv):
-        all_csv = '../6_IssuesArticles/ALL_articles_Update_cleaned.csv'
-    
-    if not os.path.exists(all_csv):
-        print(f"❌ ALL_articles_Update_cleaned.csv 不存在")
-        sys.exit(1)
-    
-    df_all = pd.read_csv(all_csv)
+    if df_all is None:
+        # 支持从项目根目录或 7_MostCited/ 目录运行
+        all_csv = '6_IssuesArticles/ALL_articles_Update_cleaned.csv'
+        if not os.path.exists(all_csv):
+            all_csv = '../6_IssuesArticles/ALL_articles_Update_cleaned.csv'
+
+        if not os.path.exists(all_csv):
+            raise FileNotFoundError("ALL_articles_Update_cleaned.csv 不存在")
+
+        df_all = pd.read_csv(all_csv)
+    else:
+        df_all = df_all.copy()
     print(f"\n✅ 读取总库: {len(df_all)} 篇文章")
     
-    # 2. 解析日期
-    df_all['ParsedDate'] = df_all.apply(parse_article_date, axis=1)
+    # 2. 解析日期（IssueKey 优先，否则 Ingenta URL；总库读出时已带 _issue_date）
+    df_all = with_issue_columns(df_all)
+    df_all['ParsedDate'] = df_all['_issue_date']
     
     # 3. 筛选时间范围
     if DAYS_RANGE:
@@ -160,53 +88,72 @@ def main():
     has_doi = df_recent['DOI'].notna().sum()
     print(f"   有 DOI: {has_doi} 篇")
     
-    # 5. 获取引用数（如果配置了 API key）
-    if SCOPUS_API_KEY:
-        print(f"\n📥 获取引用数（Scopus API）...")
-        print(f"   总数: {len(df_recent)} 篇")
-        
-        citation_counts = []
-        total = len(df_recent)
-        
-        for idx, row in df_recent.iterrows():
-            doi = row['DOI']
-            title = row['Title']
-            
-            # 优先使用 DOI，否则用 Title
-            citations = get_citation_count(doi=doi if pd.notna(doi) else None, 
-                                          title=title)
-            citation_counts.append(citations)
-            
-            # 显示进度
-            current = len(citation_counts)
-            if current % 10 == 0 or current == total:
-                print(f"   进度: {current}/{total} ({current*100//total}%)")
-        
-        df_recent['Citations'] = citation_counts
-        
-        # 统计
-        total_citations = sum(citation_counts)
-        articles_with_citations = sum(1 for c in citation_counts if c > 0)
-        
-        print(f"✅ 引用数获取完成")
-        print(f"   总引用数: {total_citations}")
-        print(f"   有引用的文章: {articles_with_citations}/{total}")
-    else:
-        print(f"\n⚠️  未配置 SCOPUS_API_KEY，跳过引用数获取")
-        print(f"   提示: 设置环境变量 SCOPUS_API_KEY 后可获取引用数")
-        df_recent['Citations'] = 0
+    # 5. 获取引用数：引用数缓存中过期的文章按优先级刷新（每次最多 CITATION_BUDGET 篇），其余直接用缓存
+    # 引用数为 Int64：从未成功获取的文章为 NA（未知），与 0 引用区分
+    # 优先使用 DOI，否则用 Title
+    items = [
+        (doi if pd.notna(doi) else None, title)
+        for doi, title in zip(df_recent['DOI'], df_recent['Title'])
+    ]
+    keys = [citation_key(doi, title) for doi, title in items]
+    cache = CitationCache()
+    try:
+        providers = configured_providers()
+        primary = primary_source(providers)
+        if providers:
+            # 近期增长快的文章优先刷新
+            velocity = trend_columns(cache, keys, df_recent['ParsedDate'], primary)['GrowthPerMonth']
+            planned = cache.plan_refresh(keys, df_recent['ParsedDate'], velocity=velocity)
+            print(f"\n📥 获取引用数（{'、'.join(provider.describe() for provider in providers)}；合并规则 {CITATION_MERGE}）...")
+            print(f"   总数: {len(df_recent)} 篇 | 需要刷新: {len(planned)} 篇（每次最多 {CITATION_BUDGET} 篇）")
+            if planned:
+                item_by_key = dict(zip(keys, items))
+                citation_results, stats = fetch_citations_multi([item_by_key[key] for key in planned], providers)
+                # 来源提前停止后没有任何来源实际查询的文章（provenance 为空）不记录，下次运行仍然优先刷新；
+                # 其他来源查过但没有结果的照常记录为未知，按 UNKNOWN_RETRY_DAYS 重试
+                results = {
+                    key: result for key, result in zip(planned, citation_results)
+                    if result.citations is not None or result.provenance
+                }
+                cache.record(results)
+                for name, provider_stats in stats.items():
+                    print(f"   {name} 请求: {provider_stats['requests']} 次"
+                          f"（重试 {provider_stats['retries']}，限流 {provider_stats['throttled']}）")
+        else:
+            print(f"\n⚠️  未启用任何引用数来源，只使用引用数缓存（没有缓存的文章记为未知）")
+            print(f"   提示: 检查 CITATION_PROVIDERS 与各来源的 API key（SCOPUS_API_KEY / SERPDOG_API_KEY）")
+        df_recent['Citations'] = cache.lookup(keys)
+        rows = cache.get_many(keys)
+        df_recent['CitationSource'] = [rows.get(key, {}).get('source') for key in keys]
+        df_recent['CitationFallback'] = is_fallback(df_recent['Citations'], df_recent['CitationSource'], primary)
+        trends = trend_columns(cache, keys, df_recent['ParsedDate'], primary)
+        df_recent['CitationsPerMonth'] = trends['CitationsPerMonth'].round(2).to_numpy()
+        df_recent['RecentGrowth'] = pd.array(trends['RecentGrowth'].round(), dtype='Int64')
+        df_recent['GrowthPerMonth'] = trends['GrowthPerMonth'].round(2).to_numpy()
+    finally:
+        cache.close()
+
+    # 统计
+    known = df_recent['Citations'].dropna()
+    print(f"✅ 引用数获取完成")
+    print(f"   总引用数: {int(known.sum())}")
+    print(f"   有引用的文章: {int((known > 0).sum())}/{len(df_recent)}")
+    print(f"   未知: {len(df_recent) - len(known)} 篇")
+    print(f"   回退来源（非 {primary}）: {int(df_recent['CitationFallback'].sum())} 篇，排在 {primary} 引用数之后")
     
-    # 6. 按引用数排序
-    df_sorted = df_recent.sort_values('Citations', ascending=False)
+    # 6. 按引用数排序（主来源在前、回退来源在后、未知排在最后，同引用数保持原顺序）
+    df_sorted = rank_by_citations(df_recent)
     
     # 7. 保存 CSV
     # 根据运行位置决定输出路径
-    if os.path.exists('7_MostCited'):
-        output_csv = '7_MostCited/most_cited_articles.csv'
-    else:
-        output_csv = 'most_cited_articles.csv'
+    if output_csv is None:
+        if os.path.exists('7_MostCited'):
+            output_csv = '7_MostCited/most_cited_articles.csv'
+        else:
+            output_csv = 'most_cited_articles.csv'
     columns_to_save = ['Title', 'Authors', 'Pages', 'Access', 'URL', 'Abstract', 
-                       'PubDate', 'DOI', 'Citations', 'ParsedDate']
+                       'PubDate', 'DOI', 'Citations', 'CitationSource', 'CitationFallback', 'ParsedDate',
+                       'CitationsPerMonth', 'RecentGrowth', 'GrowthPerMonth']
     df_sorted[columns_to_save].to_csv(output_csv, index=False)
     
     print(f"\n✅ 已保存: {output_csv}")
@@ -216,11 +163,23 @@ def main():
         print("\n📈 Top 10 Most Cited:")
         top10 = df_sorted.head(10)
         for idx, row in top10.iterrows():
-            print(f"   {row.get('Citations', 0):3d} 引用 - {row['Title'][:60]}...")
+            citations = row.get('Citations')
+            citations = '  ?' if pd.isna(citations) else f"{citations:3d}"
+            fallback = f"（{row['CitationSource']}）" if row['CitationFallback'] else ''
+            print(f"   {citations} 引用{fallback} - {row['Title'][:60]}...")
     
     print("\n" + "=" * 70)
     print("✅ 完成")
     print("=" * 70)
 
+    return df_sorted
+
+def main():
+    try:
+        fetch_most_cited()
+    except FileNotFoundError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+生成 trending_articles.html：最近引用数增长最快的文章（与 top_6_articles.html 格式相同）
+
+按 GrowthPerMonth（近期每月新增引用数，见 citation_trends.py）排序，同速度按 CitationsPerMonth。
+引用数历史不足（还没有文章有足够的观测跨度）时不生成，并删除上次生成的片段（连同 .gz / .br），不再显示过期数据
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from publish import COMPRESSED_SUFFIXES
+from templates import CARD_RULED_CLASS, atomic_output, render_card, stylesheet_link, text
+
+TRENDING_FILENAME = 'trending_articles.html'
+TRENDING_COUNT = 6
+
+
+def _published(row):
+    published = text(row.get('PubDate'))
+    if published:
+        return published
+    date = pd.to_datetime(row.get('ParsedDate'), errors='coerce')
+    return date.strftime('%B %Y') if pd.notna(date) else ''
+
+
+def remove_trending_html():
+    """删除上次生成的 Trending 片段及其预压缩副本"""
+    for path in (TRENDING_FILENAME, *(f"{TRENDING_FILENAME}{suffix}" for suffix in COMPRESSED_SUFFIXES)):
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"   🗑️  已删除过期的 {path}")
+
+
+def generate_trending_html(articles=None):
+    """生成 Trending HTML，返回文件名；没有增长数据时删除旧片段并返回 None
+
+    articles 为空时从 most_cited_articles.csv 读取；流水线可直接传入 DataFrame
+    """
+    if articles is None:
+        csv_path = '7_MostCited/most_cited_articles.csv'
+        if not os.path.exists(csv_path):
+            print(f"❌ {csv_path} 不存在")
+            return None
+        articles = pd.read_csv(csv_path)
+
+    if 'GrowthPerMonth' not in articles.columns:
+        print("   ⏭️  Trending: 没有引用数增长数据，跳过")
+        remove_trending_html()
+        return None
+
+    growth = pd.to_numeric(articles['GrowthPerMonth'], errors='coerce')
+    trending = articles[(growth > 0) & (articles['Abstract'] != "No Abstract")]
+    if trending.empty:
+        print("   ⏭️  Trending: 引用数历史不足，暂不生成")
+        remove_trending_html()
+        return None
+
+    trending = trending.sort_values(['GrowthPerMonth', 'CitationsPerMonth'], ascending=False, kind='stable')
+    trending = trending.head(TRENDING_COUNT)
+    print(f"\n生成 Trending HTML: {len(trending)} 篇文章")
+
+    with atomic_output(TRENDING_FILENAME) as stream:
+        stream.write(stylesheet_link())
+        stream.write('<div id="trending-content">\n')
+        for row in trending.to_dict('records'):
+            info = ', '.join(part for part in (_published(row), text(row.get('Pages'))) if part)
+            render_card(
+                stream,
+                title=text(row["Title"]),
+                url=row["URL"],
+                info=f"{info} · +{int(row['RecentGrowth'])} citations recently ({row['GrowthPerMonth']:.1f}/month)",
+                authors=text(row["Authors"]),
+                abstract=text(row["Abstract"]),
+                open_access=row['Access'] == "Open Access content",
+                card_class=CARD_RULED_CLASS,
+            )
+        stream.write('</div>\n')
+
+    print(f"✅ HTML content for the trending articles successfully saved to {TRENDING_FILENAME}")
+    return TRENDING_FILENAME
+
+
+if __name__ == '__main__':
+    generate_trending_html()
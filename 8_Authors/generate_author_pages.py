@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+生成作者页 authors/<作者键>.html 与作者索引 authors/index.html
+
+作者 → 文章来自总库的 article_authors 倒排索引（catalog_store），不再扫描 CSV。
+每位作者的页面内容哈希记录在 8_Authors/author_pages.json 中，
+只重新渲染文章集合（或显示名、模板）有变化的作者：每月更新只影响本期作者。
+同一文件还记录每页的生成时间（built_at），供 sitemap 的 lastmod 使用。
+"""
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from build_manifest import hash_file
+from catalog_store import CatalogStore
+from publish import COMPRESSED_SUFFIXES
+from templates import atomic_output, publish_stylesheet, render_card, render_to, text
+
+AUTHOR_DIR = 'authors'
+STATE_PATH = '8_Authors/author_pages.json'
+SCRIPT_PATH = '8_Authors/generate_author_pages.py'
+PAGE_TEMPLATES = ['author_page_start.html', 'issue_page_end.html', 'article_card.html']
+
+# 页面实际渲染用到的列
+PAGE_COLUMNS = ['Title', 'Authors', 'Pages', 'Access', 'URL', 'Abstract', 'PubDate', '_issue_key']
+
+
+def _escape(value):
+    return str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def page_version(stylesheet):
+    """脚本、模板或样式表变化时所有作者页都要重新渲染"""
+    digest = hashlib.sha256(hash_file(SCRIPT_PATH).encode('utf-8'))
+    for name in PAGE_TEMPLATES:
+        digest.update(hash_file(os.path.join('templates', name)).encode('utf-8'))
+    digest.update(stylesheet.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def author_digests(index, articles):
+    """每位作者的页面内容哈希（向量化：按行哈希后按作者求和，与行顺序无关）"""
+    columns = [column for column in PAGE_COLUMNS if column in articles.columns]
+    row_hashes = pd.Series(
+        pd.util.hash_pandas_object(articles[columns].astype(str), index=False).to_numpy(),
+        index=articles['_row_id'].to_numpy(),
+    )
+    entries = index.assign(
+        _hash=index['_row_id'].map(row_hashes).fillna(0).astype(np.uint64)
+        + pd.util.hash_pandas_object(index[['display_name', 'position']].astype(str), index=False).to_numpy()
+    )
+    sums = entries.groupby('author_key')['_hash'].sum()
+    return {key: format(int(value), '016x') for key, value in sums.items()}
+
+
+def display_names(index):
+    """每位作者最常用的写法作为显示名"""
+    counts = index.groupby(['author_key', 'display_name']).size().reset_index(name='count')
+    counts = counts.sort_values(['author_key', 'count'], ascending=[True, False]).drop_duplicates('author_key')
+    return dict(zip(counts['author_key'], counts['display_name']))
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {'version': None, 'authors': {}, 'built_at': {}}
+    with open(path, 'r', encoding='utf-8') as file:
+        state = json.load(file)
+    state.setdefault('built_at', {})
+    return state
+
+
+def save_state(state, path=STATE_PATH):
+    with atomic_output(path) as stream:
+        json.dump(state, stream, ensure_ascii=False, indent=0, sort_keys=True)
+        stream.write('\n')
+
+
+def render_author_page(stream, name, author_articles, stylesheet):
+    """author_articles 为文章记录（dict）列表，已按期号倒序"""
+    count = len(author_articles)
+    render_to(stream, 'author_page_start.html', author_name=_escape(name), stylesheet=f"../{stylesheet}",
+              article_count=f"{count} article{'s' if count != 1 else ''}")
+    for row in author_articles:
+        issue_date = row.get('_issue_date')
+        published = text(row.get('PubDate')) or (issue_date.strftime('%B %Y') if pd.notna(issue_date) else '')
+        pages = text(row.get('Pages'))
+        access = text(row.get('Access')).lower()
+        render_card(
+            stream,
+            title=text(row.get('Title')),
+            url=text(row.get('URL')),
+            info=', '.join(part for part in (published, pages) if part),
+            authors=text(row.get('Authors')),
+            abstract=text(row.get('Abstract')),
+            open_access='open access' in access,
+        )
+    render_to(stream, 'issue_page_end.html')
+
+
+def render_author_index(names, article_counts, stylesheet, output_dir=AUTHOR_DIR):
+    # 按姓氏字母排序（规范键以姓氏开头）
+    with atomic_output(os.path.join(output_dir, 'index.html')) as stream:
+        render_to(stream, 'author_index_start.html', stylesheet=f"../{stylesheet}", author_count=len(names))
+        for key in sorted(names):
+            stream.write(f'        <li><a href="{key}.html">{_escape(names[key])}</a> ({article_counts[key]})</li>\n')
+        render_to(stream, 'author_index_end.html')
+
+
+def generate_author_pages(store=None, rebuild=False, output_dir=AUTHOR_DIR, state_path=STATE_PATH):
+    """增量生成作者页，返回重新渲染的作者键列表"""
+    own_store = store is None
+    store = store or CatalogStore()
+    try:
+        index = store.read_author_index()
+        articles = store.read_all(derived=True, with_row_id=True)
+    finally:
+        if own_store:
+            store.close()
+
+    stylesheet = publish_stylesheet()
+    version = page_version(stylesheet)
+    state = load_state(state_path)
+    if rebuild or state.get('version') != version:
+        state = {'version': version, 'authors': {}, 'built_at': {}}
+
+    digests = author_digests(index, articles)
+    names = display_names(index)
+    previous = state['authors']
+    built_at = state['built_at']
+    changed = sorted(key for key, digest in digests.items() if previous.get(key) != digest)
+    removed = sorted(key for key in previous if key not in digests)
+
+    if not changed and not removed:
+        print("   ⏭️  作者页: 无变化，跳过")
+        return []
+
+    print(f"\n👤 作者页: {len(digests)} 位作者，重新生成 {len(changed)} 页，删除 {len(removed)} 页")
+    now = datetime.now().isoformat(timespec='seconds')
+    articles = articles.sort_values(['_issue_date', '_row_id'], ascending=[False, True], na_position='last')
+    records = dict(zip(articles['_row_id'], articles.to_dict('records')))
+    rank = {row_id: position for position, row_id in enumerate(articles['_row_id'])}
+    # 只为需要重新渲染的作者取文章：倒排索引 → 行号 → 文章
+    by_author = index[index['author_key'].isin(changed)].groupby('author_key')['_row_id']
+    for key, row_ids in by_author:
+        author_articles = [records[row_id] for row_id in sorted(row_ids, key=rank.get) if row_id in records]
+        with atomic_output(os.path.join(output_dir, f"{key}.html")) as stream:
+            render_author_page(stream, names[key], author_articles, stylesheet)
+        previous[key] = digests[key]
+        built_at[key] = now
+
+    for key in removed:
+        # publish.py 写出的 .gz / .br 副本也要删除，否则仍会被服务器返回
+        path = os.path.join(output_dir, f"{key}.html")
+        for stale in (path, *(f"{path}{suffix}" for suffix in COMPRESSED_SUFFIXES)):
+            if os.path.exists(stale):
+                os.remove(stale)
+        del previous[key]
+        built_at.pop(key, None)
+
+    render_author_index(names, index.groupby('author_key').size().to_dict(), stylesheet, output_dir)
+    state['index_built_at'] = now
+    save_state(state, state_path)
+    print(f"   ✅ 作者页已更新: {output_dir}/")
+    return changed
+
+
+if __name__ == '__main__':
+    generate_author_pages(rebuild='--rebuild' in sys.argv[1:])
@@ -1,6 +1,11 @@
-import requests
 from bs4 import BeautifulSoup
 import csv
+import os
+import sys
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 # Input and output file paths
 input_file = "journals_cleaned.csv"  # The CSV containing Journal Title, Publisher Name, and Link to Journal
@@ -9,8 +14,8 @@ output_file = "journals_cleaned_with_issn_and_latest_issue.csv"
 # Function to scrape ISSNs and the latest issue from a given URL
 def scrape_journal_details(url):
     try:
-        # Send a GET request to the URL
-        response = requests.get(url, timeout=10)
+        # Send a GET request to the URL (shared connection pool, retries, circuit breaker)
+        response = http_client.get(url, timeout=10)
         response.raise_for_status()  # Raise HTTPError for bad responses
         soup = BeautifulSoup(response.content, "html.parser")
         
@@ -52,52 +57,48 @@ try:
 except FileExistsError:
     pass  # File exists, no need to rewrite headers
 
-# Open input file and process rows
+def process_row(row):
+    # Extract details from the current row
+    journal_title = row.get("Journal Title", "N/A")
+    publisher_name = row.get("Publisher Name", "N/A")
+    journal_link = row.get("Link to Journal")
+
+    print(f"Processing: {journal_title} ({journal_link})")
+
+    if journal_link:
+        # Scrape ISSNs and latest issue
+        print_issn, online_issn, latest_issue = scrape_journal_details("https://www.ingentaconnect.com/" + journal_link)
+    else:
+        print_issn, online_issn, latest_issue = "N/A", "N/A", "N/A"
+    # Prepare the row for output
+    return {
+        "Journal Title": journal_title,
+        "Publisher Name": publisher_name,
+        "Link to Journal": journal_link,
+        "Print ISSN": print_issn,
+        "Online ISSN": online_issn,
+        "Latest Issue": latest_issue,
+    }
+
+# Open input file and collect rows that still need processing
 with open(input_file, "r", encoding="utf-8") as infile:
-    reader = csv.DictReader(infile)
-    
-    for row in reader:
-        # Extract details from the current row
-        journal_title = row.get("Journal Title", "N/A")
-        publisher_name = row.get("Publisher Name", "N/A")
-        journal_link = row.get("Link to Journal")
-        
+    pending = []
+    for row in csv.DictReader(infile):
         # Skip already processed links
-        if journal_link in processed_links:
-            print(f"Skipping already processed journal: {journal_title} ({journal_link})")
+        if row.get("Link to Journal") in processed_links:
+            print(f"Skipping already processed journal: {row.get('Journal Title', 'N/A')} ({row.get('Link to Journal')})")
             continue
+        pending.append(row)
 
-        print(f"Processing: {journal_title} ({journal_link})")
-        
-        if journal_link:
-            # Scrape ISSNs and latest issue
-            print_issn, online_issn, latest_issue = scrape_journal_details("https://www.ingentaconnect.com/" + journal_link)
-            # Prepare the row for output
-            output_row = {
-                "Journal Title": journal_title,
-                "Publisher Name": publisher_name,
-                "Link to Journal": journal_link,
-                "Print ISSN": print_issn,
-                "Online ISSN": online_issn,
-                "Latest Issue": latest_issue,
-            }
-        else:
-            output_row = {
-                "Journal Title": journal_title,
-                "Publisher Name": publisher_name,
-                "Link to Journal": journal_link,
-                "Print ISSN": "N/A",
-                "Online ISSN": "N/A",
-                "Latest Issue": "N/A",
-            }
-        
-        # Write the processed row to the output file incrementally
-        with open(output_file, "a", newline="", encoding="utf-8") as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=[
-                "Journal Title", "Publisher Name", "Link to Journal", 
-                "Print ISSN", "Online ISSN", "Latest Issue"
-            ])
-            writer.writerow(output_row)
-            processed_links.add(journal_link)  # Add to processed set
+# Journals are fetched concurrently; results come back in input order
+for output_row in http_client.imap(process_row, pending):
+    # Write the processed row to the output file incrementally
+    with open(output_file, "a", newline="", encoding="utf-8") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=[
+            "Journal Title", "Publisher Name", "Link to Journal",
+            "Print ISSN", "Online ISSN", "Latest Issue"
+        ])
+        writer.writerow(output_row)
+        processed_links.add(output_row["Link to Journal"])  # Add to processed set
 
 print(f"Data has been successfully processed and saved to '{output_file}'.")
@@ -1,6 +1,11 @@
-import requests
 from bs4 import BeautifulSoup
 import csv
+import os
+import sys
+
+# 允许直接运行本脚本时导入项目根目录的共享模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 # Define the URL (testing)
 # url = "https://www.ingentaconnect.com/content/title?j_type=online&j_startat=Af&j_endat=Aj&j_pagesize=20000&j_page=1&j_availability=all"  # Replace with the actual URL
@@ -10,7 +15,7 @@ url = "https://www.ingentaconnect.com/content/title?j_type=online&j_startat=Aa&j
 
 
 # Send a GET request to the URL
-response = requests.get(url)
+response = http_client.get(url)
 
 # Parse the HTML content
 soup = BeautifulSoup(response.content, "html.parser")
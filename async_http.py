@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+异步 JSON API 客户端基类（Scopus / Crossref / Serpdog 等引用数来源共用）
+
+- 令牌桶限速（rate 次/秒），max_in_flight 控制同时进行的请求数，max_requests 为本次运行的请求配额
+- 429 / 5xx / 网络错误重试：优先按 Retry-After（或 X-RateLimit-Reset）等待，
+  否则指数退避加随机抖动；429 时整个令牌桶暂停，所有请求一起等待
+- 等待时间超过 MAX_RETRY_AFTER（配额用完）、API key 无效（401/403）或请求配额用完时停止请求，
+  之后的查询直接返回 None
+- 404 视为"没有这条记录"，返回 None，不算失败
+
+安装 httpx 时使用 httpx.AsyncClient；未安装时用 requests.Session 在线程中发送（连接复用，行为相同）。
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # 可选依赖：未安装时用 requests 在线程中发送
+    httpx = None
+
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0       # 秒，第 n 次重试在 [0, BACKOFF_BASE * 2**n] 内随机等待
+BACKOFF_MAX = 30.0
+MAX_RETRY_AFTER = 300.0  # Retry-After 超过此值视为配额用完
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+FATAL_STATUSES = {401, 403}
+TRANSPORT_ERRORS = (requests.RequestException,) + ((httpx.TransportError,) if httpx is not None else ())
+
+
+class TokenBucket:
+    """异步令牌桶：rate 个/秒，最多积累 capacity 个；pause() 让所有请求等到指定时间"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    self._updated = time.monotonic()
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def retry_after_seconds(headers):
+    """Retry-After（秒数或 HTTP 日期），没有时取 X-RateLimit-Reset（epoch 秒）"""
+    value = headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    reset = headers.get('X-RateLimit-Reset')
+    if reset:
+        try:
+            return max(0.0, float(reset) - time.time())
+        except ValueError:
+            pass
+    return None
+
+
+def backoff_seconds(attempt):
+    """指数退避 + 全抖动"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class AsyncApiClient:
+    """async with AsyncApiClient('Crossref', rate=10) as client: await client.get_json(url, params)"""
+
+    def __init__(self, name, rate, max_in_flight=4, max_retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT,
+                 headers=None, max_requests=None):
+        self.name = name
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.max_requests = max_requests
+        self.headers = dict(headers or {})
+        self.bucket = None
+        self.stopped = False
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'failed': 0}
+        self._rate = rate
+        self._client = None
+        self._session = None
+        self._in_flight = None
+
+    async def __aenter__(self):
+        # 令牌桶 / 信号量必须在事件循环内创建
+        self.bucket = TokenBucket(self._rate)
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        if httpx is not None:
+            limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+            self._client = httpx.AsyncClient(headers=self.headers, timeout=self.timeout, limits=limits)
+        else:
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._client is not None:
+            await self._client.aclose()
+        if self._session is not None:
+            self._session.close()
+
+    async def _send(self, url, params):
+        if self._client is not None:
+            return await self._client.get(url, params=params)
+        return await asyncio.to_thread(self._session.get, url, params=params, timeout=self.timeout)
+
+    def _stop(self, reason):
+        if not self.stopped:
+            self.stopped = True
+            print(f"   ⚠️  {self.name} {reason}，停止查询，剩余文章记为未知")
+
+    async def get_json(self, url, params=None):
+        """GET 并解析 JSON；404 / 多次重试后仍失败 / 已停止时返回 None"""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if self.stopped:
+                return None
+            await self.bucket.acquire()
+            async with self._in_flight:
+                # 检查与计数之间没有 await，并发请求不会超出配额
+                if self.max_requests is not None and self.stats['requests'] >= self.max_requests:
+                    self._stop(f"本次请求配额已用完（{self.max_requests} 次）")
+                if self.stopped:
+                    return None
+                self.stats['requests'] += 1
+                try:
+                    response = await self._send(url, params)
+                except TRANSPORT_ERRORS as exc:
+                    response, error = None, exc
+
+            if response is not None and response.status_code == 200:
+                try:
+                    return response.json()
+                except ValueError as exc:
+                    error = exc
+            elif response is not None:
+                error = f"HTTP {response.status_code}"
+                if response.status_code == 404:
+                    return None
+                if response.status_code in FATAL_STATUSES:
+                    self._stop(f"API key 无效或无权限（{error}）")
+                    return None
+                if response.status_code not in RETRY_STATUSES:
+                    # 400 等：重试无意义
+                    break
+                wait = retry_after_seconds(response.headers)
+                if response.status_code == 429:
+                    self.stats['throttled'] += 1
+                    wait = backoff_seconds(attempt) if wait is None else wait
+                    if wait > MAX_RETRY_AFTER:
+                        self._stop(f"配额已用完（{wait / 3600:.1f} 小时后重置）")
+                        return None
+                    self.bucket.pause(wait)
+                if attempt < self.max_retries:
+                    self.stats['retries'] += 1
+                    await asyncio.sleep(backoff_seconds(attempt) if wait is None else min(wait, MAX_RETRY_AFTER))
+                continue
+
+            if attempt < self.max_retries:
+                self.stats['retries'] += 1
+                await asyncio.sleep(backoff_seconds(attempt))
+
+        self.stats['failed'] += 1
+        if error:
+            print(f"   ⚠️  {self.name} 查询失败（{error}）: {url}")
+        return None
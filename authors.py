@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+作者名规范化（总库作者索引与作者页共用）
+
+- Authors 字段为 "Last, First; Last, First"，按分号拆分
+- 显示名：NFKC 规范化（&nbsp; 等变为普通空格）、去掉单位编号数字、合并空白
+- 规范键：去重音、小写、非字母数字统一为 "-"，同一作者的不同写法
+  （Müller / Muller、"Li,  Jun" / "Li, Jun"）得到同一个键，也直接用作作者页文件名
+"""
+import re
+import unicodedata
+
+import pandas as pd
+
+AUTHOR_SEPARATOR = re.compile(r'\s*;\s*')
+AFFILIATION_DIGITS = re.compile(r'\d+')
+WHITESPACE = re.compile(r'\s+')
+COMBINING_MARKS = re.compile(r'[\u0300-\u036f]')
+KEY_SEPARATOR = re.compile(r'[\W_]+')
+
+
+def clean_author_name(name):
+    """单个作者的显示名"""
+    name = unicodedata.normalize('NFKC', str(name))
+    name = AFFILIATION_DIGITS.sub('', name)
+    name = WHITESPACE.sub(' ', name).strip(' ,;')
+    return re.sub(r'\s+,', ',', name)
+
+
+def author_key(name):
+    """规范键（作者页文件名），无法生成时返回 ''"""
+    text = unicodedata.normalize('NFKD', clean_author_name(name))
+    text = COMBINING_MARKS.sub('', text).lower()
+    return KEY_SEPARATOR.sub('-', text).strip('-')
+
+
+def split_authors(value):
+    """Authors 字段 → [(规范键, 显示名)]，按原顺序，同一篇中重复的作者只保留一次"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return []
+    authors = []
+    seen = set()
+    for part in AUTHOR_SEPARATOR.split(str(value)):
+        display = clean_author_name(part)
+        key = author_key(display)
+        if key and key not in seen:
+            seen.add(key)
+            authors.append((key, display))
+    return authors
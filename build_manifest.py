@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+构建清单（build manifest）：记录每个 HTML 输出对应输入的内容哈希
+
+输入哈希 = 源数据行 + 生成脚本内容（模板写在脚本里，脚本变化即模板/版本变化）+ 其他参数。
+哈希与清单记录一致且输出文件仍存在时，跳过该阶段，文件保持不动，避免无意义的 git 变更。
+update_from_s3.py --force 可忽略清单强制重新生成。
+清单与生成的 HTML 一起提交到 git，全新 checkout / CI 中同样可以跳过未变化的输出。
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from pipeline import PROJECT_ROOT
+
+MANIFEST_PATH = 'build_manifest.json'
+
+# 清单格式或哈希算法变化时递增，所有输出都会重新生成一次
+MANIFEST_VERSION = 1
+
+
+def hash_dataframe(df):
+    """按内容（列名 + 各行取值）计算 DataFrame 哈希，与行索引无关"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(column) for column in df.columns]).encode('utf-8'))
+    if len(df):
+        row_hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+        digest.update(row_hashes.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def hash_file(relative_path):
+    """生成脚本的内容哈希（相对项目根目录）"""
+    with open(os.path.join(PROJECT_ROOT, relative_path), 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def input_hash(rows=None, generator=None, extra=None):
+    """组合输入哈希：rows 为 DataFrame，generator 为脚本路径，extra 为可 JSON 序列化的参数"""
+    parts = {
+        'manifest_version': MANIFEST_VERSION,
+        'rows': hash_dataframe(rows) if rows is not None else None,
+        'generator': hash_file(generator) if generator else None,
+        'extra': extra,
+    }
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class BuildManifest:
+    """线程安全的构建清单（并行阶段会同时读写）"""
+
+    def __init__(self, path=MANIFEST_PATH, force=False):
+        self.path = path
+        self.force = force
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    self._entries = json.load(file).get('outputs', {})
+            except (OSError, ValueError) as exc:
+                print(f"   ⚠️  构建清单无法读取，全部重新生成: {exc}")
+                self._entries = {}
+
+    def is_up_to_date(self, outputs, digest):
+        """所有输出文件都存在，且记录的输入哈希与 digest 一致"""
+        if self.force:
+            return False
+        with self._lock:
+            for output in outputs:
+                entry = self._entries.get(output)
+                if not entry or entry.get('hash') != digest or not os.path.exists(output):
+                    return False
+        return True
+
+    def record(self, outputs, digest):
+        """记录输出对应的输入哈希并立即落盘"""
+        built_at = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            for output in outputs:
+                self._entries[output] = {'hash': digest, 'built_at': built_at}
+            self._save()
+
+    def forget(self, outputs):
+        """删除输出的记录（输出文件已不再生成）"""
+        with self._lock:
+            if any(self._entries.pop(output, None) for output in outputs):
+                self._save()
+
+    def built_at(self, output):
+        entry = self._entries.get(output)
+        return entry.get('built_at') if entry else None
+
+    def outputs(self):
+        """{输出路径: 生成时间}"""
+        with self._lock:
+            return {output: entry.get('built_at') for output, entry in self._entries.items()}
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': MANIFEST_VERSION, 'outputs': self._entries}, file, indent=2, sort_keys=True)
+            file.write('\n')
+        os.replace(tmp_path, self.path)
+
+
+def build_if_changed(manifest, outputs, digest, build, label, optional=False):
+    """输入未变化时跳过 build()；否则运行并记录哈希。返回是否实际生成
+
+    optional=True 时 build() 返回 None 表示这次没有输出（如数据不足）：不记录哈希，并删除旧记录
+    """
+    if manifest is not None and manifest.is_up_to_date(outputs, digest):
+        print(f"   ⏭️  {label}: 输入未变化，跳过（--force 可强制重新生成）")
+        return False
+
+    result = build()
+    if optional and result is None:
+        if manifest is not None:
+            manifest.forget(outputs)
+        return False
+    if manifest is not None:
+        manifest.record(outputs, digest)
+    return True
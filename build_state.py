@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+期刊页面构建状态（SQLite），替代 6_IssuesArticles/processed_issues.log
+
+每期一行（issue_key 为主键）：输入行哈希、GA 图片哈希、输出路径、构建时间。
+是否需要重新生成由主键查询决定，不会再出现 log 子串匹配误删其他期的问题；
+invalidate() 按主键删除单期记录即可强制该期重新生成。
+首次打开时自动导入旧的 processed_issues.log（旧记录没有哈希，视为已生成）。
+数据库与生成的页面一起提交到 git（与原来的 log 相同），全新 checkout / CI 中不会重新生成所有期刊页。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from build_manifest import hash_dataframe
+
+STATE_DB = '6_IssuesArticles/build_state.sqlite'
+LEGACY_LOG = '6_IssuesArticles/processed_issues.log'
+HTML_DIR = 'IssuesArticles/html'
+
+# 页面实际渲染用到的列；只对这些列做哈希，避免 IssueKey/Year 等列 dtype 变化造成误判
+ROW_HASH_COLUMNS = ['Title', 'Authors', 'Pages', 'Access', 'URL', 'Abstract', 'GA_Path']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS issue_builds (
+    issue_key   TEXT PRIMARY KEY,
+    row_hash    TEXT,
+    ga_hashes   TEXT,
+    output_path TEXT,
+    built_at    TEXT
+)
+'''
+
+
+def issue_row_hash(issue_articles, extra=None):
+    """extra 为影响页面输出的其他输入（如 GA 变体尺寸），可 JSON 序列化"""
+    columns = [column for column in ROW_HASH_COLUMNS if column in issue_articles.columns]
+    row_hash = hash_dataframe(issue_articles[columns])
+    if extra is None:
+        return row_hash
+    payload = json.dumps({'rows': row_hash, 'extra': extra}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ga_image_hashes(issue_articles, previous=None, html_dir=HTML_DIR):
+    """{GA_Path: {sha256, size, mtime_ns}}；size/mtime 未变时复用上次的哈希，不重复读文件"""
+    previous = previous or {}
+    hashes = {}
+    if 'GA_Path' not in issue_articles.columns:
+        return hashes
+
+    for ga_path in issue_articles['GA_Path'].dropna().astype(str):
+        local_path = os.path.join(html_dir, ga_path)
+        if not os.path.exists(local_path):
+            hashes[ga_path] = None
+            continue
+        stat = os.stat(local_path)
+        cached = previous.get(ga_path)
+        if cached and cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns:
+            hashes[ga_path] = cached
+        else:
+            hashes[ga_path] = {
+                'sha256': _sha256_file(local_path),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+            }
+    return hashes
+
+
+def _same_images(recorded, current):
+    if set(recorded) != set(current):
+        return False
+    for ga_path, entry in current.items():
+        old = recorded.get(ga_path)
+        if (old or {}).get('sha256') != (entry or {}).get('sha256'):
+            return False
+    return True
+
+
+class BuildState:
+    def __init__(self, path=STATE_DB, legacy_log=LEGACY_LOG):
+        is_new = not os.path.exists(path)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(SCHEMA)
+        if is_new and legacy_log and os.path.exists(legacy_log):
+            self._import_legacy_log(legacy_log)
+        self.conn.commit()
+
+    def _import_legacy_log(self, legacy_log):
+        with open(legacy_log, 'r') as file:
+            issues = [line.strip() for line in file if line.strip()]
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO issue_builds (issue_key, output_path) VALUES (?, ?)',
+            [(issue, f"{HTML_DIR}/{issue}.html") for issue in issues],
+        )
+        print(f"📋 已从 {legacy_log} 导入 {len(issues)} 期构建记录")
+
+    def get(self, issue_key):
+        row = self.conn.execute(
+            'SELECT row_hash, ga_hashes, output_path, built_at FROM issue_builds WHERE issue_key = ?',
+            (issue_key,),
+        ).fetchone()
+        if row is None:
+            return None
+        row_hash, ga_hashes, output_path, built_at = row
+        return {
+            'row_hash': row_hash,
+            'ga_hashes': json.loads(ga_hashes) if ga_hashes else None,
+            'output_path': output_path,
+            'built_at': built_at,
+        }
+
+    def check(self, issue_key, issue_articles, output_path, extra=None):
+        """返回 (是否需要重新生成, 当前行哈希, 当前 GA 哈希)"""
+        record = self.get(issue_key)
+        previous_images = record['ga_hashes'] if record else None
+        row_hash = issue_row_hash(issue_articles, extra)
+        images = ga_image_hashes(issue_articles, previous_images)
+
+        if record is None or not os.path.exists(output_path):
+            return True, row_hash, images
+        # 旧 log 导入的记录没有哈希：保持旧行为，视为已生成
+        if record['row_hash'] is not None and record['row_hash'] != row_hash:
+            return True, row_hash, images
+        if previous_images is not None and not _same_images(previous_images, images):
+            return True, row_hash, images
+        return False, row_hash, images
+
+    def record(self, issue_key, row_hash, images, output_path):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO issue_builds (issue_key, row_hash, ga_hashes, output_path, built_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (issue_key, row_hash, json.dumps(images, sort_keys=True), output_path,
+             datetime.now().isoformat(timespec='seconds')),
+        )
+        self.conn.commit()
+
+    def built_times(self):
+        """{输出路径: 生成时间}（旧 log 导入的记录没有时间，为 None）"""
+        return dict(self.conn.execute('SELECT output_path, built_at FROM issue_builds').fetchall())
+
+    def invalidate(self, issue_key):
+        """删除单期记录，下次运行强制重新生成该期"""
+        self.conn.execute('DELETE FROM issue_builds WHERE issue_key = ?', (issue_key,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
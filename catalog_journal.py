@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+总库变更日志：每次按期号 upsert 只记录实际删除 / 插入的行（gzip 压缩的 JSON），
+替代每次运行都完整复制一份 ALL_articles_Update_cleaned.backup.<timestamp>.csv。
+
+用法:
+  python3 catalog_journal.py list
+  python3 catalog_journal.py restore --to 20260418_101500
+      按时间倒序撤销该时间点之后的所有变更，并重新导出 CSV
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from catalog_store import CatalogStore
+
+JOURNAL_DIR = '6_IssuesArticles/journal'
+
+# 保留策略：删除超过此天数的日志（至少保留最近 MIN_KEEP 条）
+RETENTION_DAYS = int(os.getenv('CATALOG_JOURNAL_RETENTION_DAYS', '730'))
+MIN_KEEP = 24
+
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+# 文件名: <时间戳>_<微秒>_<期号>[.<序号>].json.gz；同一秒内的多条日志按微秒、再按序号排序
+# （旧文件名没有微秒部分，按 0 处理）
+ENTRY_NAME = re.compile(r'^(\d{8}_\d{6})(?:_(\d{6}))?_(.+?)(?:\.(\d+))?\.json\.gz$')
+
+
+def _json_value(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if hasattr(value, 'item'):  # numpy 标量
+        return value.item()
+    return value
+
+
+def _records(df):
+    if df is None or df.empty:
+        return []
+    return [
+        {column: _json_value(value) for column, value in zip(df.columns, row)}
+        for row in df.itertuples(index=False, name=None)
+    ]
+
+
+def normalize_timestamp(text):
+    """接受 20260418_101500 / 2026-04-18T10:15:00 / 2026-04-18 等格式，返回 YYYYMMDD_HHMMSS"""
+    digits = re.sub(r'\D', '', str(text))
+    if len(digits) < 8:
+        raise ValueError(f"无法识别的时间: {text}")
+    digits = digits[:14].ljust(14, '0')
+    return f"{digits[:8]}_{digits[8:]}"
+
+
+def record_change(issue_key, result, journal_dir=JOURNAL_DIR):
+    """写入一条变更日志（result 为 CatalogStore.upsert_issue 的返回值），返回文件路径"""
+    os.makedirs(journal_dir, exist_ok=True)
+    now = datetime.now()
+    timestamp = now.strftime(TIMESTAMP_FORMAT)
+    entry = {
+        'timestamp': timestamp,
+        'issue_key': issue_key,
+        'removed': _records(result.removed),
+        'added': _records(result.added),
+    }
+    stem = f"{timestamp}_{now.microsecond:06d}_{issue_key}"
+    path = os.path.join(journal_dir, f"{stem}.json.gz")
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(journal_dir, f"{stem}.{suffix}.json.gz")
+        suffix += 1
+
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as file:
+        json.dump(entry, file, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    prune(journal_dir)
+    return path
+
+
+def _entry_order(path):
+    """排序键 (时间戳, 微秒, 序号, 路径)；按文件名排序会把 <期号>.1.json.gz 排在 <期号>.json.gz 之前"""
+    match = ENTRY_NAME.match(os.path.basename(path))
+    if not match:
+        return os.path.basename(path)[:15], 0, 0, path
+    timestamp, micro, _, suffix = match.groups()
+    return timestamp, int(micro or 0), int(suffix or 0), path
+
+
+def list_entries(journal_dir=JOURNAL_DIR):
+    """按时间顺序返回 [(timestamp, path)]"""
+    paths = sorted(glob.glob(os.path.join(journal_dir, '*.json.gz')), key=_entry_order)
+    return [(_entry_order(path)[0], path) for path in paths]
+
+
+def load_entry(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def prune(journal_dir=JOURNAL_DIR, retention_days=RETENTION_DAYS, min_keep=MIN_KEEP):
+    entries = list_entries(journal_dir)
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime(TIMESTAMP_FORMAT)
+    removable = entries[:-min_keep] if min_keep else entries
+    for timestamp, path in removable:
+        if timestamp < cutoff:
+            os.remove(path)
+
+
+def restore(target, store=None, journal_dir=JOURNAL_DIR):
+    """把总库恢复到 target 时刻：按时间倒序撤销之后的所有变更，返回撤销的条数"""
+    target = normalize_timestamp(target)
+    entries = list_entries(journal_dir)
+    if entries and target < entries[0][0]:
+        print(f"⚠️  {target} 早于最早的日志 {entries[0][0]}（更早的日志已按保留策略清理），只能恢复到该时间点")
+
+    to_revert = [(timestamp, path) for timestamp, path in entries if timestamp > target]
+    if not to_revert:
+        print(f"✅ 总库已是 {target} 时的状态，无需恢复")
+        return 0
+
+    own_store = store is None
+    store = store or CatalogStore()
+    try:
+        for timestamp, path in reversed(to_revert):
+            entry = load_entry(path)
+            store.revert(entry['removed'], entry['added'])
+            print(f"   ↩️  撤销 {timestamp} Issue {entry['issue_key']}: "
+                  f"-{len(entry['added'])} / +{len(entry['removed'])} 行")
+        store.export_csv()
+    finally:
+        if own_store:
+            store.close()
+
+    # 已撤销的日志移到 reverted/，不会被再次撤销
+    os.makedirs(os.path.join(journal_dir, 'reverted'), exist_ok=True)
+    for _, path in to_revert:
+        shutil.move(path, os.path.join(journal_dir, 'reverted', os.path.basename(path)))
+
+    print(f"✅ 已恢复到 {target}（撤销 {len(to_revert)} 条变更）")
+    return len(to_revert)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='总库变更日志')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='列出变更日志')
+    restore_parser = subparsers.add_parser('restore', help='恢复总库到指定时间点')
+    restore_parser.add_argument('--to', required=True, help='时间点，如 20260418_101500')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for timestamp, path in list_entries():
+            entry = load_entry(path)
+            print(f"{timestamp}  Issue {entry['issue_key']}: "
+                  f"+{len(entry['added'])} / -{len(entry['removed'])} 行  ({os.path.getsize(path)} bytes)")
+    elif args.command == 'restore':
+        try:
+            restore(args.to)
+        except ValueError as exc:
+            print(f"❌ {exc}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
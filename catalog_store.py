@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+总库存储（SQLite），替代每次整表重写 ALL_articles_Update_cleaned.csv
+
+- articles 表保留 CSV 的全部列，另加 _issue_key / _doi / _norm_title 三个索引列，
+  以及 issue_keys 推导出的 _issue_date / _volume / _issue_no 类型化列（读取时可选带出）
+- upsert_issue() 按期号替换整期文章（同 Title+URL 的旧行一并删除，语义与原来的
+  concat + drop_duplicates(keep='last') 一致），代价只与本期文章数有关
+- read_issue() / find_by_doi() / find_by_title() 走索引，不再解析整个 CSV
+- export_csv() 按原顺序导出 CSV，保持与旧脚本和 git 中 CSV 的兼容
+- CSV 被手动修改后（内容哈希变化），打开时自动重新导入
+- article_authors 表为作者倒排索引（规范键 → 文章 _row_id），find_by_author() 走索引查询；
+  文章删除时由触发器同步删除作者记录
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from authors import split_authors
+from issue_keys import derive_issue_columns
+
+CATALOG_DB = '6_IssuesArticles/catalog.sqlite'
+CATALOG_CSV = '6_IssuesArticles/ALL_articles_Update_cleaned.csv'
+
+INDEX_COLUMNS = ['_issue_key', '_doi', '_norm_title']
+ISSUE_COLUMNS = ['_issue_date', '_volume', '_issue_no']
+HIDDEN_COLUMNS = INDEX_COLUMNS + ISSUE_COLUMNS
+
+# 表结构变化时递增，打开旧库会从 CSV 重新导入
+SCHEMA_VERSION = 3
+
+# upsert_issue() 的结果：previous 为替换前的本期文章；removed / added 为实际删除 / 插入的行（含 _row_id）
+UpsertResult = namedtuple('UpsertResult', ['previous', 'removed', 'added'])
+
+
+def normalize_title(title):
+    if title is None or (isinstance(title, float) and pd.isna(title)):
+        return ''
+    return re.sub(r'\s+', ' ', str(title).strip()).lower()
+
+
+def extract_doi(url):
+    if not isinstance(url, str) or 'doi.org/' not in url:
+        return None
+    return url.split('doi.org/')[-1].strip().lower() or None
+
+
+def _issue_values(df):
+    """[(_issue_key, _issue_date, _volume, _issue_no)]，整列向量化推导"""
+    derived = derive_issue_columns(df)
+    dates = derived['_issue_date'].dt.strftime('%Y-%m-%d')
+    return [
+        tuple(_sql_value(value) for value in row)
+        for row in zip(derived['_issue_key'], dates, derived['_volume'], derived['_issue_no'])
+    ]
+
+
+def _sql_value(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and pd.isna(value):
+        return None
+    if hasattr(value, 'item'):  # numpy 标量
+        return value.item()
+    if value is pd.NaT or value is pd.NA:
+        return None
+    return value
+
+
+def _quote(column):
+    return '"' + str(column).replace('"', '""') + '"'
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CatalogStore:
+    def __init__(self, path=CATALOG_DB, csv_path=CATALOG_CSV):
+        self.path = path
+        self.csv_path = csv_path
+        # 并行阶段共用一个连接，读写都在锁内进行
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.commit()
+        self._sync_from_csv()
+
+    # ---- schema -------------------------------------------------------
+
+    def data_columns(self):
+        info = self.conn.execute('PRAGMA table_info(articles)').fetchall()
+        return [row[1] for row in info if row[1] != '_row_id' and row[1] not in HIDDEN_COLUMNS]
+
+    def _create_table(self, columns):
+        self.conn.execute('DROP TABLE IF EXISTS articles')
+        column_sql = ', '.join(_quote(column) for column in columns)
+        self.conn.execute(
+            f'CREATE TABLE articles (_row_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            f'_issue_key TEXT, _doi TEXT, _norm_title TEXT, '
+            f'_issue_date TEXT, _volume INTEGER, _issue_no INTEGER, {column_sql})'
+        )
+        self.conn.execute('CREATE INDEX idx_articles_issue_key ON articles (_issue_key)')
+        self.conn.execute('CREATE INDEX idx_articles_doi ON articles (_doi)')
+        self.conn.execute('CREATE INDEX idx_articles_norm_title ON articles (_norm_title)')
+        self.conn.execute('CREATE INDEX idx_articles_title_url ON articles ("Title", "URL")')
+
+        self.conn.execute('DROP TABLE IF EXISTS article_authors')
+        self.conn.execute(
+            'CREATE TABLE article_authors (row_id INTEGER NOT NULL, position INTEGER NOT NULL, '
+            'author_key TEXT NOT NULL, display_name TEXT, PRIMARY KEY (row_id, position))'
+        )
+        self.conn.execute('CREATE INDEX idx_article_authors_key ON article_authors (author_key)')
+        self.conn.execute(
+            'CREATE TRIGGER articles_delete_authors AFTER DELETE ON articles '
+            'BEGIN DELETE FROM article_authors WHERE row_id = old._row_id; END'
+        )
+
+    def _ensure_columns(self, columns):
+        existing = {column.lower() for column in self.data_columns()}
+        for column in columns:
+            if str(column).lower() not in existing:
+                self.conn.execute(f'ALTER TABLE articles ADD COLUMN {_quote(column)}')
+                existing.add(str(column).lower())
+
+    # ---- CSV 同步 -----------------------------------------------------
+
+    def _meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def _remember_csv(self):
+        stat = os.stat(self.csv_path)
+        self._set_meta('csv_sha256', _file_sha256(self.csv_path))
+        self._set_meta('csv_stat', f"{stat.st_size}:{stat.st_mtime_ns}")
+
+    def _sync_from_csv(self):
+        """CSV 与上次导入/导出时不同（或库为空）时重新导入"""
+        if not os.path.exists(self.csv_path):
+            return
+        stat = os.stat(self.csv_path)
+        has_table = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles'"
+        ).fetchone()
+        if has_table and self._meta('schema_version') != str(SCHEMA_VERSION):
+            has_table = None
+        if has_table and self._meta('csv_stat') == f"{stat.st_size}:{stat.st_mtime_ns}":
+            return
+        if has_table and self._meta('csv_sha256') == _file_sha256(self.csv_path):
+            self._set_meta('csv_stat', f"{stat.st_size}:{stat.st_mtime_ns}")
+            self.conn.commit()
+            return
+
+        df = pd.read_csv(self.csv_path)
+        with self.conn:
+            self._create_table(df.columns)
+            self._insert(df)
+            self._index_authors()
+            self._remember_csv()
+            self._set_meta('schema_version', str(SCHEMA_VERSION))
+        print(f"📋 总库已从 CSV 导入 SQLite: {len(df)} 条")
+
+    def _insert(self, df):
+        columns = list(df.columns)
+        names = ['_issue_key', '_doi', '_norm_title', *ISSUE_COLUMNS]
+        placeholders = ', '.join('?' for _ in range(len(columns) + len(names)))
+        column_sql = ', '.join(names + [_quote(column) for column in columns])
+        rows = []
+        issue_values = _issue_values(df)
+        for record, (issue_key, *issue_fields) in zip(df.itertuples(index=False, name=None), issue_values):
+            values = dict(zip(columns, record))
+            rows.append((
+                issue_key,
+                extract_doi(values.get('URL')),
+                normalize_title(values.get('Title')),
+                *issue_fields,
+                *[_sql_value(value) for value in record],
+            ))
+        self.conn.executemany(f'INSERT INTO articles ({column_sql}) VALUES ({placeholders})', rows)
+
+    def _index_authors(self):
+        """为还没有作者记录的文章建立作者索引（插入后调用；删除由触发器处理）"""
+        if 'Authors' not in self.data_columns():
+            return
+        rows = self.conn.execute(
+            'SELECT _row_id, "Authors" FROM articles '
+            'WHERE _row_id NOT IN (SELECT row_id FROM article_authors)'
+        ).fetchall()
+        self.conn.executemany(
+            'INSERT INTO article_authors (row_id, position, author_key, display_name) VALUES (?, ?, ?, ?)',
+            [
+                (row_id, position, key, display)
+                for row_id, authors in rows
+                for position, (key, display) in enumerate(split_authors(authors))
+            ],
+        )
+
+    # ---- 读取 ---------------------------------------------------------
+
+    def _select(self, where='', params=(), with_row_id=False, derived=False):
+        """derived=True 时带出 _issue_key / _issue_date(datetime64) / _volume / _issue_no(Int64) 类型化列"""
+        with self._lock:
+            columns = ', '.join(_quote(column) for column in self.data_columns())
+            if with_row_id:
+                columns = f'_row_id, {columns}'
+            if derived:
+                columns = f"{columns}, _issue_key, {', '.join(ISSUE_COLUMNS)}"
+            query = f'SELECT {columns} FROM articles {where} ORDER BY _row_id'
+            df = pd.read_sql_query(query, self.conn, params=params)
+        if derived:
+            df['_issue_key'] = df['_issue_key'].astype('string')
+            df['_issue_date'] = pd.to_datetime(df['_issue_date'], format='%Y-%m-%d', errors='coerce')
+            df['_volume'] = df['_volume'].astype('Int64')
+            df['_issue_no'] = df['_issue_no'].astype('Int64')
+        return df
+
+    def is_empty(self):
+        with self._lock:
+            return self._is_empty()
+
+    def _is_empty(self):
+        has_table = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles'"
+        ).fetchone()
+        return not has_table or self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 0
+
+    def read_all(self, derived=False, with_row_id=False):
+        return self._select(with_row_id=with_row_id, derived=derived)
+
+    def read_issue(self, issue_key, derived=False):
+        return self._select('WHERE _issue_key = ?', (issue_key,), derived=derived)
+
+    def read_issues_since(self, issue_key, derived=False):
+        """读取 IssueKey >= issue_key（YYYYMM）的文章，走 _issue_key 索引"""
+        return self._select('WHERE _issue_key >= ?', (issue_key,), derived=derived)
+
+    def find_by_doi(self, doi):
+        return self._select('WHERE _doi = ?', (str(doi).strip().lower(),))
+
+    def find_by_title(self, title):
+        return self._select('WHERE _norm_title = ?', (normalize_title(title),))
+
+    def find_by_author(self, author_key, derived=False):
+        """按作者规范键（authors.author_key）查询文章"""
+        return self._select(
+            'WHERE _row_id IN (SELECT row_id FROM article_authors WHERE author_key = ?)',
+            (author_key,), derived=derived,
+        )
+
+    def read_author_index(self):
+        """作者倒排索引：author_key / display_name / position / _row_id"""
+        with self._lock:
+            return pd.read_sql_query(
+                'SELECT author_key, display_name, position, row_id AS _row_id '
+                'FROM article_authors ORDER BY author_key, row_id',
+                self.conn,
+            )
+
+    # ---- 写入 ---------------------------------------------------------
+
+    def upsert_issue(self, issue_key, df_issue):
+        """用 df_issue 替换整期文章，返回 UpsertResult（供统计和变更日志使用）"""
+        with self._lock:
+            return self._upsert_issue(issue_key, df_issue)
+
+    def _upsert_issue(self, issue_key, df_issue):
+        df_issue = df_issue.drop_duplicates(subset=['Title', 'URL'], keep='last')
+        if self._is_empty():
+            with self.conn:
+                self._create_table(df_issue.columns)
+
+        # 本期旧行 + 其他期中 Title+URL 相同的旧行（新数据优先）
+        pairs = [(_sql_value(title), _sql_value(url)) for title, url in zip(df_issue['Title'], df_issue['URL'])]
+        removed = self._select('WHERE _issue_key = ?', (issue_key,), with_row_id=True)
+        duplicates = [
+            self._select('WHERE "Title" IS ? AND "URL" IS ? AND _issue_key IS NOT ?', (*pair, issue_key), with_row_id=True)
+            for pair in pairs
+        ]
+        removed = pd.concat([removed, *duplicates], ignore_index=True) if duplicates else removed
+        removed = removed.drop_duplicates(subset=['_row_id'])
+        previous = self.read_issue(issue_key)
+
+        with self.conn:
+            self._ensure_columns(df_issue.columns)
+            max_before = self.conn.execute('SELECT COALESCE(MAX(_row_id), 0) FROM articles').fetchone()[0]
+            self.conn.executemany(
+                'DELETE FROM articles WHERE _row_id = ?',
+                [(int(row_id),) for row_id in removed['_row_id']],
+            )
+            self._insert(df_issue)
+            self._index_authors()
+        added = self._select('WHERE _row_id > ?', (max_before,), with_row_id=True)
+        return UpsertResult(previous, removed, added)
+
+    def revert(self, removed_rows, added_rows):
+        """撤销一次 upsert：删除当时插入的行，按原 _row_id 放回当时删除的行（保持 CSV 原顺序）"""
+        with self._lock, self.conn:
+            removed_issue_values = _issue_values(pd.DataFrame(list(removed_rows))) if removed_rows else []
+            for row in added_rows:
+                if row.get('_row_id') is not None and self.conn.execute(
+                    'SELECT 1 FROM articles WHERE _row_id = ? AND "Title" IS ? AND "URL" IS ?',
+                    (row['_row_id'], row.get('Title'), row.get('URL')),
+                ).fetchone():
+                    self.conn.execute('DELETE FROM articles WHERE _row_id = ?', (row['_row_id'],))
+                else:
+                    # 总库曾从 CSV 重新导入过，_row_id 已变化：按内容删除
+                    self.conn.execute(
+                        'DELETE FROM articles WHERE "Title" IS ? AND "URL" IS ?',
+                        (row.get('Title'), row.get('URL')),
+                    )
+
+            for row, issue_values in zip(removed_rows, removed_issue_values):
+                columns = [column for column in row if column != '_row_id']
+                self._ensure_columns(columns)
+                row_id = row.get('_row_id')
+                if row_id is not None and self.conn.execute(
+                    'SELECT 1 FROM articles WHERE _row_id = ?', (row_id,)
+                ).fetchone():
+                    row_id = None
+                issue_key, *issue_fields = issue_values
+                names = (['_row_id', '_issue_key', '_doi', '_norm_title', *ISSUE_COLUMNS]
+                         + [_quote(column) for column in columns])
+                values = [
+                    row_id,
+                    issue_key,
+                    extract_doi(row.get('URL')),
+                    normalize_title(row.get('Title')),
+                    *issue_fields,
+                    *[row[column] for column in columns],
+                ]
+                placeholders = ', '.join('?' for _ in names)
+                self.conn.execute(f'INSERT INTO articles ({", ".join(names)}) VALUES ({placeholders})', values)
+            self._index_authors()
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def export_csv(self, path=None):
+        """按原顺序导出完整 CSV（兼容旧脚本），并记录导出后的 CSV 指纹"""
+        path = path or self.csv_path
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            self.read_all().to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            if path == self.csv_path:
+                with self.conn:
+                    self._remember_csv()
+        return path
+
+    def close(self):
+        self.conn.close()
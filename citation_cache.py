@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+引用数缓存（SQLite），Most Cited 模块每次只刷新最需要更新的一小部分文章
+
+- 主键为文章键：有 DOI 时为 "doi:<小写 DOI>"，否则为 "title:<规范化标题>"
+- 每行记录引用数、来源、来源出处（provenance：各来源查到的引用数，JSON，见 citation_providers.py）、
+  成功获取时间（fetched_at）与最近一次查询时间（checked_at）；查询失败时保留上次的引用数，只更新 checked_at
+- 超过 TTL（CITATION_TTL_DAYS，默认 7 天；从未成功获取的文章为 UNKNOWN_RETRY_DAYS）的文章才需要刷新，
+  按优先级（距上次查询的天数 × 发表时间权重，越新的文章权重越高，每 RECENCY_HALF_LIFE_MONTHS 个月减半；
+  从未查询过的文章排在最前，组内只按发表时间权重排序）
+  用优先队列取前 CITATION_BUDGET 篇，每次运行的请求数有上限
+- citation_history 表为引用数时间序列（文章键, 来源, 日期, 引用数），每个来源单独一条序列
+  （各来源的引用数口径不同，不能混在一起），只在该来源的引用数变化时追加一个点；
+  趋势计算（citation_trends.py）只用一个来源的序列，按阶梯函数取任意日期的引用数；增长快的文章刷新优先级更高
+- 与总库不同，缓存无法从 CSV 重建（需要重新调用 API），不要删除；缓存与生成的页面一起提交到 git
+"""
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import date, datetime
+
+import pandas as pd
+
+from catalog_store import extract_doi, normalize_title
+
+CACHE_DB = '7_MostCited/citation_cache.sqlite'
+
+CITATION_TTL_DAYS = float(os.getenv('CITATION_TTL_DAYS', '7'))
+CITATION_BUDGET = int(os.getenv('CITATION_BUDGET', '200'))   # 每次运行最多刷新的文章数
+UNKNOWN_RETRY_DAYS = 1.0
+RECENCY_HALF_LIFE_MONTHS = 12.0
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS citations (
+    article_key TEXT PRIMARY KEY,
+    citations   INTEGER,
+    source      TEXT,
+    provenance  TEXT,
+    fetched_at  TEXT,
+    checked_at  TEXT
+)
+'''
+
+# day 为距 1970-01-01 的天数，整数便于 NumPy 向量化计算
+HISTORY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS citation_history (
+    article_key TEXT,
+    source      TEXT,
+    day         INTEGER,
+    citations   INTEGER,
+    PRIMARY KEY (article_key, source, day)
+) WITHOUT ROWID
+'''
+DEFAULT_SOURCE = 'scopus'  # 没有记录来源的旧数据（多来源之前只有 Scopus）
+
+EPOCH = date(1970, 1, 1)
+
+# 一篇文章的查询结果：引用数（None 为未知）、采用的来源、各来源出处（JSON 文本）
+CitationResult = namedtuple('CitationResult', ['citations', 'source', 'provenance'])
+
+
+def source_counts(row):
+    """缓存行中各来源查到的引用数 {来源: 引用数}；没有 provenance 的旧行只有采用的来源"""
+    if row is None or row.get('citations') is None:
+        return {}
+    if row.get('provenance'):
+        # 查询过但没有结果的来源为 null
+        return {name: count for name, count in json.loads(row['provenance']).items() if count is not None}
+    return {row.get('source') or DEFAULT_SOURCE: row['citations']}
+
+
+def citation_key(doi=None, title=None, url=None):
+    """文章键；DOI 可直接给出，或从 doi.org 链接中提取"""
+    doi = doi if isinstance(doi, str) and doi.strip() else extract_doi(url)
+    if doi:
+        return f"doi:{doi.strip().lower()}"
+    title = normalize_title(title)
+    return f"title:{title}" if title else None
+
+
+def _days_between(earlier, now):
+    return (now - datetime.fromisoformat(earlier)).total_seconds() / 86400
+
+
+def epoch_day(value):
+    """datetime / ISO 字符串 → 距 1970-01-01 的天数"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (value.date() - EPOCH).days
+
+
+class CitationCache:
+    def __init__(self, path=CACHE_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(SCHEMA)
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(citations)')}
+        if 'provenance' not in columns:
+            self.conn.execute('ALTER TABLE citations ADD COLUMN provenance TEXT')
+        history_columns = {row[1] for row in self.conn.execute('PRAGMA table_info(citation_history)')}
+        if history_columns and 'source' not in history_columns:
+            # 旧时间序列没有来源：按文章当前的来源（没有时为 DEFAULT_SOURCE）迁移到新表
+            self.conn.execute('ALTER TABLE citation_history RENAME TO citation_history_old')
+            self.conn.execute(HISTORY_SCHEMA)
+            self.conn.execute(
+                'INSERT OR IGNORE INTO citation_history (article_key, source, day, citations) '
+                'SELECT history.article_key, COALESCE(citations.source, ?), history.day, history.citations '
+                'FROM citation_history_old AS history LEFT JOIN citations USING (article_key)',
+                (DEFAULT_SOURCE,),
+            )
+            self.conn.execute('DROP TABLE citation_history_old')
+        elif not history_columns:
+            # 旧缓存没有时间序列：以当前各来源的引用数作为第一个点
+            self.conn.execute(HISTORY_SCHEMA)
+            rows = self.conn.execute(
+                'SELECT article_key, citations, source, provenance, fetched_at FROM citations '
+                'WHERE citations IS NOT NULL'
+            ).fetchall()
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO citation_history (article_key, source, day, citations) VALUES (?, ?, ?, ?)',
+                [
+                    (key, name, epoch_day(fetched_at), count)
+                    for key, citations, source, provenance, fetched_at in rows
+                    for name, count in source_counts(
+                        {'citations': citations, 'source': source, 'provenance': provenance}
+                    ).items()
+                ],
+            )
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """{文章键: {citations, source, provenance, fetched_at, checked_at}}，只包含缓存中已有的键"""
+        keys = sorted({key for key in keys if key})
+        rows = {}
+        with self._lock:
+            # SQLite 单条语句的参数个数有限，分批查询
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ', '.join('?' * len(batch))
+                for key, citations, source, provenance, fetched_at, checked_at in self.conn.execute(
+                    'SELECT article_key, citations, source, provenance, fetched_at, checked_at '
+                    f'FROM citations WHERE article_key IN ({placeholders})', batch,
+                ):
+                    rows[key] = {
+                        'citations': citations, 'source': source, 'provenance': provenance,
+                        'fetched_at': fetched_at, 'checked_at': checked_at,
+                    }
+        return rows
+
+    def lookup(self, keys):
+        """与 keys 对齐的引用数（Int64，没有缓存或从未成功获取为 NA）"""
+        rows = self.get_many(keys)
+        values = [rows.get(key, {}).get('citations') for key in keys]
+        return pd.array([pd.NA if value is None else value for value in values], dtype='Int64')
+
+    def read_history(self, keys, source):
+        """keys 在 source 来源下的时间序列 DataFrame（article_key / day / citations），按键和日期排序"""
+        keys = sorted({key for key in keys if key})
+        frames = []
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ', '.join('?' * len(batch))
+                frames.append(pd.read_sql_query(
+                    'SELECT article_key, day, citations FROM citation_history '
+                    f'WHERE source = ? AND article_key IN ({placeholders}) ORDER BY article_key, day',
+                    self.conn, params=[source, *batch],
+                ))
+        if not frames:
+            return pd.DataFrame({'article_key': [], 'day': [], 'citations': []})
+        return pd.concat(frames, ignore_index=True)
+
+    def latest_history(self, keys):
+        """{文章键: {来源: 时间序列中最后一个点的引用数}}"""
+        keys = sorted({key for key in keys if key})
+        latest = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ', '.join('?' * len(batch))
+                # SQLite 中与 MAX() 一起选出的其他列取自最大值所在的行
+                for key, source, citations, _ in self.conn.execute(
+                    'SELECT article_key, source, citations, MAX(day) FROM citation_history '
+                    f'WHERE article_key IN ({placeholders}) GROUP BY article_key, source', batch,
+                ):
+                    latest.setdefault(key, {})[source] = citations
+        return latest
+
+    def plan_refresh(self, keys, published=None, budget=CITATION_BUDGET, ttl_days=CITATION_TTL_DAYS, now=None,
+                     velocity=None):
+        """需要刷新的键（按优先级从高到低，最多 budget 个）
+
+        published 为与 keys 对齐的发表日期（datetime / NaT），越新的文章优先级越高；
+        velocity 为与 keys 对齐的近期每月新增引用数（NaN 视为 0），增长越快优先级越高；
+        从未查询过的文章排在最前（组内按发表时间权重 × 增速排序），其余按距上次查询的天数 × 权重排序
+        """
+        now = now or datetime.now()
+        published = list(published) if published is not None else [None] * len(keys)
+        velocity = list(velocity) if velocity is not None else [0.0] * len(keys)
+        rows = self.get_many(keys)
+        queue = []
+        seen = set()
+        for position, (key, date, speed) in enumerate(zip(keys, published, velocity)):
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            row = rows.get(key)
+            months = (now - date).days / 30.44 if date is not None and pd.notna(date) else 0.0
+            priority = 0.5 ** (max(months, 0.0) / RECENCY_HALF_LIFE_MONTHS)
+            if pd.notna(speed) and speed > 0:
+                priority *= 1 + speed
+            if row is None or not row['checked_at']:
+                # 从未查询过：排在所有已查询文章之前，组内同样按发表时间与增速排序
+                tier = 0
+            else:
+                age = _days_between(row['checked_at'], now)
+                if age < (ttl_days if row['citations'] is not None else UNKNOWN_RETRY_DAYS):
+                    continue
+                tier = 1
+                priority *= age
+            # 同优先级按原顺序
+            queue.append((tier, -priority, position, key))
+        return [key for _, _, _, key in heapq.nsmallest(budget, queue)]
+
+    def record(self, results, source=None, now=None):
+        """results 为 {文章键: CitationResult}，或 {文章键: 引用数或 None}（来源统一为 source）；
+        None（查询失败）保留上次的引用数，只更新查询时间
+
+        每个来源的引用数（provenance，没有时为采用的来源）与该来源序列的最后一个点不同（或第一次获取）时，
+        在该来源的时间序列中追加一个点
+        """
+        now = now or datetime.now()
+        results = {
+            key: value if isinstance(value, CitationResult) else CitationResult(value, source, None)
+            for key, value in results.items()
+        }
+        previous = self.latest_history(key for key, result in results.items() if result.citations is not None)
+        day = epoch_day(now)
+        points = []
+        for key, result in results.items():
+            if result.citations is None:
+                continue
+            before = previous.get(key, {})
+            counts = source_counts({
+                'citations': result.citations, 'source': result.source or DEFAULT_SOURCE,
+                'provenance': result.provenance,
+            })
+            points.extend((key, name, day, count) for name, count in counts.items() if before.get(name) != count)
+        now = now.isoformat(timespec='seconds')
+        found = [
+            (key, result.citations, result.source, result.provenance, now, now)
+            for key, result in results.items() if result.citations is not None
+        ]
+        failed = [(key, now) for key, result in results.items() if result.citations is None]
+        with self._lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO citation_history (article_key, source, day, citations) VALUES (?, ?, ?, ?)',
+                points,
+            )
+            self.conn.executemany(
+                'INSERT INTO citations (article_key, citations, source, provenance, fetched_at, checked_at) '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(article_key) DO UPDATE SET '
+                'citations = excluded.citations, source = excluded.source, provenance = excluded.provenance, '
+                'fetched_at = excluded.fetched_at, checked_at = excluded.checked_at',
+                found,
+            )
+            self.conn.executemany(
+                'INSERT INTO citations (article_key, checked_at) VALUES (?, ?) '
+                'ON CONFLICT(article_key) DO UPDATE SET checked_at = excluded.checked_at',
+                failed,
+            )
+            self.conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM citations').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+引用数来源的本地模拟服务器（Scopus / Crossref / Serpdog），用于离线测试与基准测试 citation_providers.py
+
+- 三个 ThreadingHTTPServer 监听 127.0.0.1 的随机端口，接口与真实 API 的相关部分一致：
+  Scopus   GET /content/search/scopus   DOI(..) OR .. / ISSN(..) AND (TITLE("..") OR ..)，分页（start / count）
+  Crossref GET /works/<doi>、GET /works?query.title=..
+  Serpdog  GET /scholar?q=..
+- 引用数由 DOI / 标题哈希确定（同一文章每次结果相同），各来源数值不同（Scholar 偏高，Crossref 偏低）；
+  部分 DOI / 标题在某些来源中查不到，用于测试回退与合并规则
+- error_rate 为随机返回 429（带 Retry-After）或 503 的比例，latency 为每个请求的延迟（秒）
+
+    python citation_mock_servers.py                 # 基准测试：最近 2 年的文章（没有总库时用合成数据）
+    python citation_mock_servers.py --merge max --error-rate 0.05 --latency 0.05
+    python citation_mock_servers.py --serve         # 只启动服务器，打印地址，Ctrl+C 退出
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+from catalog_store import extract_doi
+from citation_providers import CrossrefProvider, ScopusProvider, SerpdogProvider, fetch_citations_multi
+from issue_keys import with_issue_columns
+from scopus_client import doi_key, title_key
+
+MOCK_API_KEY = 'mock-key'
+DOI_TERM = re.compile(r'DOI\(([^)]*)\)')
+TITLE_TERM = re.compile(r'TITLE\("([^"]*)"\)')
+
+
+def _hash(key):
+    return zlib.crc32(key.encode('utf-8'))
+
+
+def base_citations(key):
+    """文章的"真实"引用数（0–149）"""
+    return _hash(key) % 150
+
+
+def scopus_count(key):
+    return None if key.startswith('doi:') and _hash(key) % 10 == 0 else base_citations(key)
+
+
+def crossref_count(key):
+    return None if _hash(key) % 13 == 0 else int(base_citations(key) * 0.8)
+
+
+def scholar_count(key):
+    return None if _hash(key) % 11 == 0 else int(base_citations(key) * 1.3) + 2
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """按 server.kind 分派；server.hits 统计请求数"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload=None, headers=None):
+        body = json.dumps(payload or {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            if random.random() < 0.5:
+                return self._send_json(429, headers={'Retry-After': '1'})
+            return self._send_json(503)
+        url = urlparse(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        getattr(self, f'_{server.kind}')(url.path, params)
+
+    def _scopus(self, path, params):
+        if self.headers.get('X-ELS-APIKey') != MOCK_API_KEY:
+            return self._send_json(401)
+        query = params.get('query', '')
+        entries = []
+        for doi in DOI_TERM.findall(query):
+            count = scopus_count(f'doi:{doi_key(doi)}')
+            if count is not None:
+                entries.append({'prism:doi': doi.upper(), 'dc:title': '', 'citedby-count': str(count)})
+        for title in TITLE_TERM.findall(query):
+            key = f'title:{title_key(title)}'
+            if _hash(key) % 7:
+                entries.append({'dc:title': title, 'citedby-count': str(scopus_count(key))})
+        start, count = int(params.get('start', 0)), int(params.get('count', 25))
+        page = entries[start:start + count] or [{'error': 'Result set was empty'}]
+        self._send_json(200, {'search-results': {'opensearch:totalResults': str(len(entries)), 'entry': page}})
+
+    def _crossref(self, path, params):
+        if path.startswith('/works/'):
+            doi = unquote(path[len('/works/'):])
+            count = crossref_count(f'doi:{doi_key(doi)}')
+            if count is None:
+                return self._send_json(404)
+            return self._send_json(200, {'message': {'DOI': doi, 'is-referenced-by-count': count}})
+        title = params.get('query.title', '')
+        key = f'title:{title_key(title)}'
+        count = crossref_count(key)
+        items = [] if count is None else [{'title': [title], 'is-referenced-by-count': count}]
+        self._send_json(200, {'message': {'items': items}})
+
+    def _serpdog(self, path, params):
+        if not params.get('api_key'):
+            return self._send_json(401)
+        title = params.get('q', '')
+        count = scholar_count(f'title:{title_key(title)}')
+        results = [] if count is None else [
+            {'title': title, 'inline_links': {'cited_by': {'total': f'Cited by {count}'}}}
+        ]
+        self._send_json(200, {'scholar_results': results})
+
+
+class MockCitationServers:
+    """with MockCitationServers() as servers: servers.providers() → 指向模拟服务器的来源"""
+
+    KINDS = ('scopus', 'crossref', 'serpdog')
+
+    def __init__(self, error_rate=0.0, latency=0.0):
+        self.servers = {}
+        for kind in self.KINDS:
+            server = ThreadingHTTPServer(('127.0.0.1', 0), MockHandler)
+            server.daemon_threads = True
+            server.kind, server.hits, server.lock = kind, 0, threading.Lock()
+            server.error_rate, server.latency = error_rate, latency
+            self.servers[kind] = server
+        self._threads = []
+
+    @property
+    def urls(self):
+        return {kind: f'http://127.0.0.1:{server.server_address[1]}' for kind, server in self.servers.items()}
+
+    @property
+    def hits(self):
+        return {kind: server.hits for kind, server in self.servers.items()}
+
+    def providers(self, names=('scopus', 'serpdog', 'crossref'), rate=None):
+        """指向模拟服务器的来源实例；rate 覆盖各来源的正式限速"""
+        urls = self.urls
+        factories = {
+            'scopus': lambda: ScopusProvider(api_key=MOCK_API_KEY, api_url=f"{urls['scopus']}/content/search/scopus",
+                                             rate=rate),
+            'serpdog': lambda: SerpdogProvider(api_key=MOCK_API_KEY, api_url=f"{urls['serpdog']}/scholar", rate=rate),
+            'crossref': lambda: CrossrefProvider(mailto='', api_url=urls['crossref'], rate=rate),
+        }
+        return [factories[name]() for name in names]
+
+    def __enter__(self):
+        for server in self.servers.values():
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, *exc_info):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+def benchmark_items(limit=None):
+    """最近 2 年的文章 [(doi, title)]；没有总库时生成合成数据"""
+    csv_path = '6_IssuesArticles/ALL_articles_Update_cleaned.csv'
+    if os.path.exists(csv_path):
+        articles = with_issue_columns(pd.read_csv(csv_path))
+        recent = articles[articles['_issue_date'] >= datetime.now() - timedelta(days=365 * 2)]
+        items = [(extract_doi(url), title) for url, title in zip(recent['URL'], recent['Title'])]
+        source = f"总库最近 2 年 {len(items)} 篇"
+    else:
+        count = limit or 200
+        items = [
+            (f'10.14358/PERS.{index:02d}-000{index % 97:02d}' if index % 4 else None,
+             f'Synthetic Remote Sensing Article Number {index}')
+            for index in range(count)
+        ]
+        source = f"合成数据 {len(items)} 篇"
+    return items[:limit] if limit else items, source
+
+
+def run_benchmark(args):
+    items, source = benchmark_items(args.limit)
+    print("=" * 70)
+    print(f"📊 引用数来源基准测试（模拟服务器）: {source}")
+    print(f"   合并规则 {args.merge} | 错误率 {args.error_rate:g} | 延迟 {args.latency:g} 秒 | "
+          f"限速 {f'{args.rate:g} 次/秒' if args.rate else '正式限速'}")
+    print("=" * 70)
+
+    with MockCitationServers(error_rate=args.error_rate, latency=args.latency) as servers:
+        singles = {}
+        for name in args.providers:
+            provider = servers.providers([name], rate=args.rate)[0]
+            started = time.perf_counter()
+            results, stats = fetch_citations_multi(items, [provider], merge=args.merge)
+            singles[name] = time.perf_counter() - started
+            found = sum(result.citations is not None for result in results)
+            print(f"   {name:<9} 单独: {singles[name]:6.2f} 秒 | 请求 {stats[name]['requests']:4d} 次 | "
+                  f"查到 {found}/{len(items)}")
+
+        before = servers.hits
+        started = time.perf_counter()
+        results, stats = fetch_citations_multi(items, servers.providers(args.providers, rate=args.rate),
+                                               merge=args.merge)
+        elapsed = time.perf_counter() - started
+        hits = {kind: servers.hits[kind] - before[kind] for kind in before}
+
+    found = sum(result.citations is not None for result in results)
+    by_source = {}
+    for result in results:
+        if result.source:
+            by_source[result.source] = by_source.get(result.source, 0) + 1
+    print(f"\n✅ 并发查询: {elapsed:.2f} 秒（各来源依次查询共 {sum(singles.values()):.2f} 秒）")
+    print(f"   查到: {found}/{len(items)} 篇 | 采用来源: "
+          + ', '.join(f"{name} {count}" for name, count in sorted(by_source.items())))
+    for name, provider_stats in stats.items():
+        print(f"   {name:<9} 请求 {provider_stats['requests']:4d} 次（服务器收到 {hits[name]}，"
+              f"重试 {provider_stats['retries']}，限流 {provider_stats['throttled']}，失败 {provider_stats['failed']}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='引用数来源的本地模拟服务器与基准测试')
+    parser.add_argument('--serve', action='store_true', help='只启动模拟服务器并打印地址')
+    parser.add_argument('--providers', default='scopus,serpdog,crossref', help='参与测试的来源（逗号分隔）')
+    parser.add_argument('--merge', default='preferred', choices=('preferred', 'max'), help='合并规则')
+    parser.add_argument('--limit', type=int, help='最多测试的文章数')
+    parser.add_argument('--rate', type=float, default=50.0, help='各来源的限速（次/秒），0 表示使用正式限速')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='模拟 429 / 503 的比例')
+    parser.add_argument('--latency', type=float, default=0.02, help='每个请求的模拟延迟（秒）')
+    args = parser.parse_args()
+    args.providers = [name.strip() for name in args.providers.split(',') if name.strip()]
+
+    if args.serve:
+        with MockCitationServers(error_rate=args.error_rate, latency=args.latency) as servers:
+            for kind, url in servers.urls.items():
+                print(f"   {kind:<9} {url}")
+            print(f"   API key: {MOCK_API_KEY}（Ctrl+C 退出）")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+        return
+    run_benchmark(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+多来源引用数：Scopus / Serpdog（Google Scholar）/ Crossref 插件式来源，并发查询后按规则合并
+
+- 每个来源是一个 CitationProvider：name、api_url、quota（本次运行的请求数上限）、available()（是否已配置 key）、
+  async fetch(items) → 与 items 对齐的 [int | None]，stats 为请求统计；请求、限速、重试在 async_http 中
+- fetch_citations_multi() 让所有来源同时查询同一批文章（asyncio.gather），每篇文章按合并规则取值：
+  preferred  按来源顺序取第一个有结果的来源（默认顺序 scopus > serpdog > crossref）
+  max        取各来源中的最大值
+  同时记录来源出处（provenance：每个来源查到的引用数），写入引用数缓存
+- 各来源的引用数口径不同（Scholar 偏高，Crossref 偏低），不能直接比较：排行与趋势以主来源（primary_source()，
+  第一个启用的来源）为准，采用其他来源引用数的文章标记为回退（CitationFallback），排在主来源的文章之后
+- 环境变量：CITATION_PROVIDERS（逗号分隔，默认为所有已配置的来源；Crossref 不需要 key，始终可用）、
+  CITATION_MERGE（preferred / max）、<来源>_QUOTA（如 SERPDOG_QUOTA）、SERPDOG_API_KEY、CROSSREF_MAILTO
+
+离线测试与基准测试见 citation_mock_servers.py。
+"""
+import asyncio
+import json
+import os
+from urllib.parse import quote
+
+import pandas as pd
+
+from async_http import AsyncApiClient
+from citation_cache import DEFAULT_SOURCE, CitationResult
+from scopus_client import (
+    JOURNAL_ISSN, SCOPUS_API_KEY, SCOPUS_API_URL, SCOPUS_CONCURRENCY, SCOPUS_RATE, ScopusClient,
+    scopus_citation_counts, title_key,
+)
+
+SERPDOG_API_KEY = os.environ.get('SERPDOG_API_KEY', '')
+SERPDOG_API_URL = 'https://api.serpdog.io/scholar'
+CROSSREF_API_URL = 'https://api.crossref.org'
+CROSSREF_MAILTO = os.environ.get('CROSSREF_MAILTO', '')  # 填写邮箱后进入 Crossref 的 polite pool
+
+PROVIDER_ORDER = ('scopus', 'serpdog', 'crossref')
+CITATION_PROVIDERS = os.getenv('CITATION_PROVIDERS', '')
+CITATION_MERGE = os.getenv('CITATION_MERGE', 'preferred')
+MERGE_RULES = ('preferred', 'max')
+
+
+def _env_quota(name, default):
+    value = os.getenv(f'{name.upper()}_QUOTA')
+    if value is None or not value.strip():
+        return default
+    return int(value) or None  # 0 表示不限
+
+
+class CitationProvider:
+    """引用数来源基类；子类实现 lookup()（单篇查询），需要批量查询时覆盖 fetch()"""
+
+    name = ''
+    api_url = ''
+    rate = 5.0          # 每秒请求数
+    concurrency = 4     # 同时进行的请求数
+    default_quota = None
+
+    def __init__(self, api_url=None, quota=None, rate=None, concurrency=None):
+        self.api_url = api_url or self.api_url
+        self.quota = _env_quota(self.name, self.default_quota) if quota is None else quota
+        self.rate = rate or self.rate
+        self.concurrency = concurrency or self.concurrency
+        self.stats = {}
+
+    def available(self):
+        return True
+
+    def describe(self):
+        quota = f"，最多 {self.quota} 次" if self.quota else ''
+        return f"{self.name} {self.rate:g} 次/秒{quota}"
+
+    def client(self):
+        return AsyncApiClient(self.name, self.rate, max_in_flight=self.concurrency, max_requests=self.quota)
+
+    async def lookup(self, client, doi, title):
+        raise NotImplementedError
+
+    async def fetch(self, items):
+        """items 为 [(doi, title)]，返回与 items 对齐的 [int | None]"""
+        async with self.client() as client:
+            counts = await asyncio.gather(*(self.lookup(client, doi, title) for doi, title in items))
+            self.stats = dict(client.stats, stopped=client.stopped)
+        return list(counts)
+
+
+class ScopusProvider(CitationProvider):
+    """Scopus Search API，DOI / 标题批量 OR 查询（见 scopus_client.py）"""
+
+    name = 'scopus'
+    api_url = SCOPUS_API_URL
+    rate = SCOPUS_RATE
+    concurrency = SCOPUS_CONCURRENCY
+
+    def __init__(self, api_key=None, **options):
+        super().__init__(**options)
+        self.api_key = SCOPUS_API_KEY if api_key is None else api_key
+
+    def available(self):
+        return bool(self.api_key)
+
+    def client(self):
+        return ScopusClient(self.api_key, rate=self.rate, max_in_flight=self.concurrency,
+                            api_url=self.api_url, max_requests=self.quota)
+
+    async def fetch(self, items):
+        async with self.client() as client:
+            counts = await scopus_citation_counts(client, items)
+            self.stats = dict(client.stats, stopped=client.stopped)
+        return counts
+
+
+class CrossrefProvider(CitationProvider):
+    """Crossref REST API 的 is-referenced-by-count；不需要 key，只统计 Crossref 成员之间的引用，通常低于 Scopus"""
+
+    name = 'crossref'
+    api_url = CROSSREF_API_URL
+    rate = 10.0
+
+    def __init__(self, mailto=None, **options):
+        super().__init__(**options)
+        self.mailto = CROSSREF_MAILTO if mailto is None else mailto
+
+    def client(self):
+        headers = {'Accept': 'application/json'}
+        if self.mailto:
+            headers['User-Agent'] = f'PERShtml (mailto:{self.mailto})'
+        return AsyncApiClient(self.name, self.rate, max_in_flight=self.concurrency, headers=headers,
+                              max_requests=self.quota)
+
+    def _params(self, params=None):
+        params = dict(params or {})
+        if self.mailto:
+            params['mailto'] = self.mailto
+        return params
+
+    async def lookup(self, client, doi, title):
+        if isinstance(doi, str) and doi.strip():
+            data = await client.get_json(f"{self.api_url}/works/{quote(doi.strip())}", self._params())
+            count = (data or {}).get('message', {}).get('is-referenced-by-count')
+            if count is not None:
+                return int(count)
+        # 没有 DOI 或 Crossref 中查不到：按标题查询本刊，标题必须完全一致
+        key = title_key(title)
+        if not key:
+            return None
+        data = await client.get_json(f"{self.api_url}/works", self._params({
+            'query.title': title, 'filter': f'issn:{JOURNAL_ISSN}', 'rows': 5,
+            'select': 'title,is-referenced-by-count',
+        }))
+        for item in (data or {}).get('message', {}).get('items', []):
+            if any(title_key(candidate) == key for candidate in item.get('title') or []):
+                return int(item.get('is-referenced-by-count') or 0)
+        return None
+
+
+class SerpdogProvider(CitationProvider):
+    """Serpdog 的 Google Scholar 搜索（按标题），取第一条结果的 "Cited by N"；按请求计费，默认每次运行最多 1000 次"""
+
+    name = 'serpdog'
+    api_url = SERPDOG_API_URL
+    rate = 2.0
+    concurrency = 2
+    default_quota = 1000
+
+    def __init__(self, api_key=None, **options):
+        super().__init__(**options)
+        self.api_key = SERPDOG_API_KEY if api_key is None else api_key
+
+    def available(self):
+        return bool(self.api_key)
+
+    async def lookup(self, client, doi, title):
+        key = title_key(title)
+        if not key:
+            return None
+        data = await client.get_json(self.api_url, {'api_key': self.api_key, 'q': title, 'num': 1})
+        results = (data or {}).get('scholar_results') or []
+        if not results:
+            return None
+        # Google Scholar 可能返回其他文章（或截断的标题），标题对不上时视为查不到
+        found = title_key(results[0].get('title'))
+        if len(found) < min(len(key), 20) or not key.startswith(found):
+            return None
+        total = str(results[0].get('inline_links', {}).get('cited_by', {}).get('total', ''))
+        if total.startswith('Cited by'):
+            return int(total.replace('Cited by', '').strip())
+        return 0
+
+
+PROVIDERS = {provider.name: provider for provider in (ScopusProvider, SerpdogProvider, CrossrefProvider)}
+
+
+def configured_providers(names=None):
+    """按 names（默认 CITATION_PROVIDERS）创建来源，跳过未配置 key 的来源；names 为空时启用所有可用来源"""
+    names = CITATION_PROVIDERS if names is None else names
+    if isinstance(names, str):
+        names = [name.strip().lower() for name in names.split(',') if name.strip()]
+    explicit = bool(names)
+    providers = []
+    for name in names or PROVIDER_ORDER:
+        if name not in PROVIDERS:
+            print(f"   ⚠️  未知的引用数来源: {name}（可选 {', '.join(PROVIDER_ORDER)}）")
+            continue
+        provider = PROVIDERS[name]()
+        if provider.available():
+            providers.append(provider)
+        elif explicit:
+            print(f"   ⚠️  {name} 未配置 API key，跳过")
+    return providers
+
+
+def primary_source(providers=None):
+    """排行与趋势使用的来源：第一个启用的来源；没有启用任何来源（只用缓存）时为 CITATION_PROVIDERS 的第一个"""
+    if providers:
+        return providers[0].name
+    names = [name.strip().lower() for name in CITATION_PROVIDERS.split(',') if name.strip()]
+    return (names or list(PROVIDER_ORDER))[0]
+
+
+def is_fallback(citations, sources, primary):
+    """与 citations / sources 对齐的布尔数组：引用数已知但不是来自主来源（没有记录来源的旧数据视为 DEFAULT_SOURCE）"""
+    known = pd.Series(citations).notna().to_numpy()
+    return known & (pd.Series(sources, dtype=object).fillna(DEFAULT_SOURCE).to_numpy() != primary)
+
+
+def rank_by_citations(articles):
+    """按引用数排序：主来源的引用数在前，回退来源的引用数在后，未知排在最后；组内按引用数从高到低，同值保持原顺序"""
+    citations = pd.to_numeric(articles['Citations'], errors='coerce')
+    fallback = articles['CitationFallback'] if 'CitationFallback' in articles.columns else False
+    group = citations.isna() * 2 + pd.Series(fallback, index=articles.index).astype(bool)
+    order = pd.DataFrame({'group': group, 'citations': -citations}).sort_values(
+        ['group', 'citations'], kind='stable').index
+    return articles.loc[order]
+
+
+def merge_counts(counts, merge=CITATION_MERGE):
+    """counts 为按来源优先顺序排列的 [(来源, 引用数 | None)]，返回 (引用数, 来源)；都没有结果时为 (None, None)
+
+    max 比较的是不同口径的数值，结果来源不是主来源时会被标记为回退，见 rank_by_citations()
+    """
+    found = [(name, count) for name, count in counts if count is not None]
+    if not found:
+        return None, None
+    if merge == 'max':
+        # 同值时取顺序靠前的来源
+        name, count = max(reversed(found), key=lambda pair: pair[1])
+        return count, name
+    name, count = found[0]
+    return count, name
+
+
+async def gather_citations(items, providers):
+    """所有来源同时查询，返回 {来源: 与 items 对齐的 [int | None]}"""
+    results = await asyncio.gather(*(provider.fetch(items) for provider in providers))
+    return {provider.name: counts for provider, counts in zip(providers, results)}
+
+
+def fetch_citations_multi(items, providers=None, merge=CITATION_MERGE):
+    """items 为 [(doi, title)]，返回 ([CitationResult], {来源: 请求统计})
+
+    CitationResult.provenance 为 JSON 文本 {来源: 引用数}，查询过但没有结果的来源为 null；
+    某个来源提前停止（配额用完 / key 无效）时，其统计中 stopped 为 True，它返回的 None 无法区分"查不到"与"没有查询"，
+    不写入 provenance。没有任何来源实际查询的文章 provenance 为 None
+    """
+    if merge not in MERGE_RULES:
+        raise ValueError(f"未知的合并规则: {merge}（可选 {', '.join(MERGE_RULES)}）")
+    items = list(items)
+    providers = configured_providers() if providers is None else providers
+    if not items or not providers:
+        return [CitationResult(None, None, None)] * len(items), {}
+
+    by_provider = asyncio.run(gather_citations(items, providers))
+    stopped = {provider.name for provider in providers if provider.stats.get('stopped')}
+    results = []
+    for position in range(len(items)):
+        counts = [(provider.name, by_provider[provider.name][position]) for provider in providers]
+        count, source = merge_counts(counts, merge)
+        provenance = {name: value for name, value in counts if value is not None or name not in stopped}
+        results.append(CitationResult(count, source, json.dumps(provenance, sort_keys=True) if provenance else None))
+    return results, {provider.name: provider.stats for provider in providers}
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+引用数趋势（NumPy 向量化）：每月引用数与近期增长速度，用于 Trending 排行和引用数刷新优先级
+
+输入为引用数缓存（citation_cache.py）中一个来源的时间序列，只记录变化点，按阶梯函数取任意日期的引用数
+（各来源的引用数口径不同，所有文章都用同一来源计算，查不到该来源的文章趋势为 NaN）：
+- CitationsPerMonth  当前引用数 / 发表至今的月数（不足 1 个月按 1 个月），老文章不再因为时间长而占优
+- RecentGrowth       最近 TREND_WINDOW_DAYS 天新增的引用数（时间序列晚于窗口起点时从第一个点算起）
+- GrowthPerMonth     RecentGrowth 按实际观测跨度折算为每月；跨度不足 MIN_SPAN_DAYS 时为 NaN（历史太短）
+
+所有文章的窗口起点引用数通过一次 searchsorted 求出（组合键 = 文章序号 * DAY_STRIDE + 天数），
+不按文章循环。
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from citation_cache import EPOCH, epoch_day, source_counts
+
+TREND_WINDOW_DAYS = 90
+MIN_SPAN_DAYS = 14
+DAYS_PER_MONTH = 30.44
+DAY_STRIDE = 1 << 20  # 大于任何 epoch 天数
+
+
+def window_start(history, unique_keys, start_day):
+    """每篇文章在 start_day 的引用数及对应日期；时间序列晚于 start_day 时取第一个点，没有历史为 NaN"""
+    count = len(unique_keys)
+    values = np.full(count, np.nan)
+    days = np.full(count, np.nan)
+    if count == 0 or len(history) == 0:
+        return values, days
+
+    codes = unique_keys.get_indexer(history['article_key'])
+    keep = codes >= 0
+    codes = codes[keep].astype(np.int64)
+    point_days = history['day'].to_numpy(dtype=np.int64)[keep]
+    point_values = history['citations'].to_numpy(dtype=float)[keep]
+    order = np.lexsort((point_days, codes))
+    codes, point_days, point_values = codes[order], point_days[order], point_values[order]
+    combined = codes * DAY_STRIDE + point_days
+    targets = np.arange(count, dtype=np.int64)
+
+    # 该文章第一个点
+    first = np.searchsorted(combined, targets * DAY_STRIDE, side='left')
+    has_first = first < len(combined)
+    has_first[has_first] = codes[first[has_first]] == targets[has_first]
+    values[has_first] = point_values[first[has_first]]
+    days[has_first] = point_days[first[has_first]]
+
+    # 窗口起点当天或之前的最后一个点（阶梯函数在起点的取值）
+    before = np.searchsorted(combined, targets * DAY_STRIDE + start_day, side='right') - 1
+    has_before = before >= 0
+    has_before[has_before] = codes[before[has_before]] == targets[has_before]
+    values[has_before] = point_values[before[has_before]]
+    days[has_before] = start_day
+    return values, days
+
+
+def citation_trends(keys, history, current, as_of, published, today,
+                    window_days=TREND_WINDOW_DAYS, min_span_days=MIN_SPAN_DAYS):
+    """keys 为文章键；current / as_of / published 为与 keys 对齐的当前引用数、最近获取日、发表日（epoch 天数，
+    未知为 NaN）；today 为今天的 epoch 天数。返回与 keys 对齐的 DataFrame"""
+    current = np.asarray(current, dtype=float)
+    as_of = np.asarray(as_of, dtype=float)
+    published = np.asarray(published, dtype=float)
+
+    months = np.maximum((today - published) / DAYS_PER_MONTH, 1.0)
+    per_month = current / months
+
+    unique_keys = pd.Index(pd.unique(np.asarray([key or '' for key in keys], dtype=object)))
+    start_values, start_days = window_start(history, unique_keys, today - window_days)
+    positions = unique_keys.get_indexer([key or '' for key in keys])
+    start_values, start_days = start_values[positions], start_days[positions]
+
+    growth = current - start_values
+    span = as_of - start_days
+    with np.errstate(invalid='ignore', divide='ignore'):
+        growth_per_month = np.where(span >= min_span_days, growth / span * DAYS_PER_MONTH, np.nan)
+
+    return pd.DataFrame({
+        'CitationsPerMonth': per_month,
+        'RecentGrowth': growth,
+        'GrowthPerMonth': growth_per_month,
+    })
+
+
+def trend_columns(cache, keys, published_dates, source, now=None):
+    """从引用数缓存读取 source 来源的当前引用数与时间序列，计算 citation_trends()"""
+    now = now or datetime.now()
+    rows = cache.get_many(keys)
+    current = [source_counts(rows.get(key)).get(source) for key in keys]
+    # provenance 每次获取时整体覆盖，其中有该来源时 fetched_at 即该来源的最近获取日
+    fetched = [rows[key]['fetched_at'] if value is not None else None for key, value in zip(keys, current)]
+    published = pd.to_datetime(pd.Series(list(published_dates)), errors='coerce')
+    published_days = ((published - pd.Timestamp(EPOCH)) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+    return citation_trends(
+        keys,
+        cache.read_history(keys, source),
+        [np.nan if value is None else value for value in current],
+        [epoch_day(value) if value else np.nan for value in fetched],
+        published_days,
+        epoch_day(now),
+    )
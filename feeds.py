@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+订阅源与 sitemap：新一期 / 新 In-Press 文章出现时通知订阅器与搜索引擎
+
+输出:
+- feeds/rss.xml     RSS 2.0
+- feeds/atom.xml    Atom 1.0
+- feeds/feed.json   JSON Feed 1.1
+- sitemap.xml       期刊页、作者页、各 HTML 片段及其 lastmod
+
+订阅源条目来自总库与 In-Press CSV，条目 id 为文章链接（DOI）。feed_state.json 记录已收录过的 id、
+已处理到的最新期号与当前条目：每次只读取该期号及之后的期（read_issues_since 走索引）和 In-Press CSV，
+新条目插入已有条目之前，只保留最近 FEED_LIMIT 条，代价只与新条目数有关；
+In-Press 文章正式出版后链接不变，不会重复出现。没有新条目时不重写订阅源。
+
+sitemap 的 lastmod 取自构建清单（build_manifest.json）、期刊页构建状态（build_state.sqlite）
+和作者页状态（8_Authors/author_pages.json）中记录的生成时间：页面没有重新生成时 lastmod 不变，
+爬虫只需重新抓取变化的页面。内容不变时 sitemap.xml 不重写。
+
+用法:
+  python3 feeds.py             # 增量更新
+  python3 feeds.py --rebuild   # 从头重建订阅源
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+from authors import split_authors
+from build_manifest import BuildManifest
+from build_state import BuildState
+from catalog_store import CatalogStore
+from templates import SITE_URL, atomic_output, text
+
+FEED_DIR = 'feeds'
+FEED_STATE = 'feed_state.json'
+SITEMAP_PATH = 'sitemap.xml'
+INPRESS_CSV = '1_InPress/filtered_InPress_articles_info_abs.csv'
+AUTHOR_STATE = '8_Authors/author_pages.json'
+AUTHOR_DIR = 'authors'
+
+# 状态格式变化时递增，订阅源从头重建一次
+STATE_VERSION = 1
+FEED_LIMIT = 50
+
+FEED_TITLE = 'Photogrammetric Engineering & Remote Sensing (PE&RS)'
+FEED_DESCRIPTION = 'New issues and in-press articles of PE&RS'
+INPRESS_CATEGORY = 'In Press'
+INPRESS_DATE_FORMAT = '%B %d, %Y'  # In-Press 的 Pages 列为出版日期，如 "September 26, 2025"
+
+# 不由构建清单 / 状态记录、但需要出现在 sitemap 中的页面
+STATIC_PAGES = ['search/index.html']
+
+
+def load_state(path=FEED_STATE):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_state(state, path=FEED_STATE):
+    with atomic_output(path) as stream:
+        json.dump(state, stream, ensure_ascii=False, indent=1, sort_keys=True)
+        stream.write('\n')
+
+
+def _new_state():
+    return {'version': STATE_VERSION, 'latest_issue': None, 'updated': None, 'seen': [], 'entries': []}
+
+
+def _entry(row, published, category):
+    url = text(row.get('URL'))
+    return {
+        'id': url,
+        'url': url,
+        'title': text(row.get('Title')),
+        'authors': [display for _, display in split_authors(row.get('Authors'))],
+        'summary': text(row.get('Abstract')),
+        'published': published,
+        'category': category,
+    }
+
+
+def issue_entries(articles):
+    """总库文章 → 订阅条目，发布日期为该期日期"""
+    dates = articles['_issue_date'].dt.strftime('%Y-%m-%d')
+    entries = []
+    for row, published in zip(articles.to_dict('records'), dates):
+        issue_key = row.get('_issue_key')
+        category = f"Issue {issue_key[:4]}-{issue_key[4:]}" if isinstance(issue_key, str) else 'Issue'
+        entries.append(_entry(row, published if isinstance(published, str) else None, category))
+    return entries
+
+
+def inpress_entries(inpress, today):
+    """In-Press 文章 → 订阅条目，Pages 列无法解析为日期时用今天"""
+    if len(inpress) == 0:
+        return []
+    dates = pd.to_datetime(inpress.get('Pages'), format=INPRESS_DATE_FORMAT, errors='coerce')
+    dates = dates.dt.strftime('%Y-%m-%d').fillna(today)
+    return [_entry(row, published, INPRESS_CATEGORY) for row, published in zip(inpress.to_dict('records'), dates)]
+
+
+def _attribute(value):
+    return escape(value, {'"': '&quot;'})
+
+
+def _rfc3339(date):
+    return f"{date}T00:00:00Z"
+
+
+def _rfc822(date):
+    return format_datetime(datetime.strptime(date, '%Y-%m-%d').replace(tzinfo=timezone.utc))
+
+
+def _updated(state):
+    return state['updated'] or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def write_rss(state, path):
+    with atomic_output(path) as stream:
+        stream.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        stream.write('<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" '
+                     'xmlns:dc="http://purl.org/dc/elements/1.1/">\n<channel>\n')
+        stream.write(f"<title>{escape(FEED_TITLE)}</title>\n<link>{SITE_URL}</link>\n")
+        stream.write(f"<description>{escape(FEED_DESCRIPTION)}</description>\n")
+        stream.write(f'<atom:link href="{SITE_URL}{FEED_DIR}/rss.xml" rel="self" type="application/rss+xml"/>\n')
+        updated = datetime.strptime(_updated(state), '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        stream.write(f"<lastBuildDate>{format_datetime(updated)}</lastBuildDate>\n")
+        for entry in state['entries']:
+            stream.write('<item>\n')
+            stream.write(f"<title>{escape(entry['title'])}</title>\n")
+            stream.write(f"<link>{escape(entry['url'])}</link>\n")
+            stream.write(f'<guid isPermaLink="true">{escape(entry["id"])}</guid>\n')
+            if entry['published']:
+                stream.write(f"<pubDate>{_rfc822(entry['published'])}</pubDate>\n")
+            for author in entry['authors']:
+                stream.write(f"<dc:creator>{escape(author)}</dc:creator>\n")
+            stream.write(f"<category>{escape(entry['category'])}</category>\n")
+            if entry['summary']:
+                stream.write(f"<description>{escape(entry['summary'])}</description>\n")
+            stream.write('</item>\n')
+        stream.write('</channel>\n</rss>\n')
+
+
+def write_atom(state, path):
+    with atomic_output(path) as stream:
+        stream.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        stream.write('<feed xmlns="http://www.w3.org/2005/Atom">\n')
+        stream.write(f"<id>{SITE_URL}</id>\n<title>{escape(FEED_TITLE)}</title>\n")
+        stream.write(f"<subtitle>{escape(FEED_DESCRIPTION)}</subtitle>\n<updated>{_updated(state)}</updated>\n")
+        stream.write(f'<link rel="alternate" href="{SITE_URL}"/>\n')
+        stream.write(f'<link rel="self" href="{SITE_URL}{FEED_DIR}/atom.xml"/>\n')
+        for entry in state['entries']:
+            date = _rfc3339(entry['published']) if entry['published'] else _updated(state)
+            stream.write('<entry>\n')
+            stream.write(f"<id>{escape(entry['id'])}</id>\n<title>{escape(entry['title'])}</title>\n")
+            stream.write(f'<link rel="alternate" href="{_attribute(entry["url"])}"/>\n')
+            stream.write(f"<published>{date}</published>\n<updated>{date}</updated>\n")
+            for author in entry['authors']:
+                stream.write(f"<author><name>{escape(author)}</name></author>\n")
+            stream.write(f'<category term="{_attribute(entry["category"])}"/>\n')
+            if entry['summary']:
+                stream.write(f"<summary>{escape(entry['summary'])}</summary>\n")
+            stream.write('</entry>\n')
+        stream.write('</feed>\n')
+
+
+def write_json_feed(state, path):
+    items = []
+    for entry in state['entries']:
+        item = {'id': entry['id'], 'url': entry['url'], 'title': entry['title'], 'tags': [entry['category']]}
+        if entry['summary']:
+            item['content_text'] = entry['summary']
+        if entry['published']:
+            item['date_published'] = _rfc3339(entry['published'])
+        if entry['authors']:
+            item['authors'] = [{'name': author} for author in entry['authors']]
+        items.append(item)
+    feed = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': FEED_TITLE,
+        'description': FEED_DESCRIPTION,
+        'home_page_url': SITE_URL,
+        'feed_url': f"{SITE_URL}{FEED_DIR}/feed.json",
+        'items': items,
+    }
+    with atomic_output(path) as stream:
+        json.dump(feed, stream, ensure_ascii=False, indent=1)
+        stream.write('\n')
+
+
+FEED_WRITERS = {'rss.xml': write_rss, 'atom.xml': write_atom, 'feed.json': write_json_feed}
+
+
+def update_feeds(store, inpress_csv=INPRESS_CSV, rebuild=False, feed_dir=FEED_DIR, state_path=FEED_STATE):
+    """追加新条目并重写订阅源，返回新条目数"""
+    state = None if rebuild else load_state(state_path)
+    if not state or state.get('version') != STATE_VERSION:
+        state = _new_state()
+
+    latest_issue = state['latest_issue']
+    if latest_issue is None:
+        articles = store.read_all(derived=True)
+    else:
+        # 包含最新一期本身：同一期重新导入时可能新增文章
+        articles = store.read_issues_since(latest_issue, derived=True)
+    inpress = pd.read_csv(inpress_csv) if os.path.exists(inpress_csv) else pd.DataFrame()
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    candidates = issue_entries(articles) + inpress_entries(inpress, today)
+    seen = set(state['seen'])
+    new_entries = []
+    for entry in candidates:
+        if entry['id'] and entry['id'] not in seen:
+            seen.add(entry['id'])
+            new_entries.append(entry)
+
+    issue_keys = articles['_issue_key'].dropna()
+    if len(issue_keys):
+        state['latest_issue'] = max(issue_keys.max(), latest_issue or '')
+
+    outputs = [os.path.join(feed_dir, name) for name in FEED_WRITERS]
+    if not new_entries and all(os.path.exists(path) for path in outputs):
+        save_state(state, state_path)
+        print("   ⏭️  订阅源: 没有新条目，跳过")
+        return 0
+
+    if new_entries:
+        # 新条目在前；sort 稳定，同一天发布的条目保持原顺序
+        entries = sorted(new_entries + state['entries'], key=lambda entry: entry['published'] or '', reverse=True)
+        state['entries'] = entries[:FEED_LIMIT]
+        state['seen'] = sorted(seen)
+        state['updated'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    for name, writer in FEED_WRITERS.items():
+        writer(state, os.path.join(feed_dir, name))
+    save_state(state, state_path)
+    print(f"   ✅ 订阅源已更新: {feed_dir}/（新增 {len(new_entries)} 条，共 {len(state['entries'])} 条）")
+    return len(new_entries)
+
+
+def sitemap_pages(manifest=None, author_state_path=AUTHOR_STATE):
+    """{页面路径: 生成时间}，只包含实际存在的页面"""
+    manifest = manifest or BuildManifest()
+    pages = {path: built_at for path, built_at in manifest.outputs().items() if path.endswith('.html')}
+
+    state = BuildState()
+    try:
+        pages.update(state.built_times())
+    finally:
+        state.close()
+
+    if os.path.exists(author_state_path):
+        with open(author_state_path, 'r', encoding='utf-8') as file:
+            authors = json.load(file)
+        for key, built_at in authors.get('built_at', {}).items():
+            pages[f"{AUTHOR_DIR}/{key}.html"] = built_at
+        pages[f"{AUTHOR_DIR}/index.html"] = authors.get('index_built_at')
+
+    for path in STATIC_PAGES:
+        pages.setdefault(path, None)
+    return {path: built_at for path, built_at in pages.items() if path and os.path.exists(path)}
+
+
+def render_sitemap(pages):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for path in sorted(pages):
+        lastmod = f"<lastmod>{pages[path][:10]}</lastmod>" if pages[path] else ''
+        lines.append(f"<url><loc>{escape(SITE_URL + quote(path))}</loc>{lastmod}</url>")
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+
+def update_sitemap(manifest=None, path=SITEMAP_PATH):
+    """重新生成 sitemap.xml，内容不变时不重写；返回是否写入"""
+    content = render_sitemap(sitemap_pages(manifest))
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            if file.read() == content:
+                print("   ⏭️  sitemap.xml: 无变化，跳过")
+                return False
+    with atomic_output(path) as stream:
+        stream.write(content)
+    print(f"   ✅ 已生成: {path}（{content.count('<url>')} 个页面）")
+    return True
+
+
+def update_feeds_and_sitemap(store=None, manifest=None, rebuild=False):
+    print("\n📡 订阅源与 sitemap")
+    own_store = store is None
+    store = store or CatalogStore()
+    try:
+        update_feeds(store, rebuild=rebuild)
+    finally:
+        if own_store:
+            store.close()
+    update_sitemap(manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成 RSS / Atom / JSON Feed 订阅源与 sitemap.xml')
+    parser.add_argument('--rebuild', action='store_true', help='忽略已收录记录，从头重建订阅源')
+    args = parser.parse_args()
+    update_feeds_and_sitemap(rebuild=args.rebuild)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,832 @@
+#!/usr/bin/env python3
+"""
+图形摘要（GA）图片下载与 PNG 体检
+
+- 下载在线程池中并发进行（GA_DOWNLOAD_WORKERS，默认 4），每个文件有超时
+  （GA_DOWNLOAD_TIMEOUT 秒），Drive 限流 / 网络错误按指数退避重试（GA_DOWNLOAD_RETRIES 次）
+- 每个文件下载完成后立即提交到进程池做 PNG 体检/转换，与其余下载重叠进行
+- 返回值与原来的 download_ga_images 一致：同一行写入 GA_Path，任何失败汇总后抛出 RuntimeError
+
+响应式变体（build_ga_variants）：每张 GA 生成按宽度分级的 WebP（可选 AVIF）和一张缩略图，
+原图与变体尺寸记录在 img/variants.json，文章页据此输出 <picture>/srcset 与 width/height。
+
+图片体检（ImageValidationCache）：每个内容哈希只完整解码一次，格式/尺寸/是否有效记录在
+6_IssuesArticles/image_validation.json；之后只读文件头（magic bytes）并核对哈希。
+
+转换函数放在本模块（而非 update_from_s3.py）中，进程池子进程导入时不会触发 AWS 凭证检查。
+
+用法:
+  python3 ga_images.py variants          # 为整个图片库补齐变体（已是最新的跳过）
+  python3 ga_images.py audit-images      # 体检所有期刊页引用的图片，报告写入 logs/image_audit.json
+  python3 ga_images.py gc [--delete]     # 列出（--delete 时删除）总库和期刊页都不再引用的图片
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import gdown
+import pandas as pd
+from PIL import Image, UnidentifiedImageError, features
+
+from pipeline import process_pool
+
+DOWNLOAD_WORKERS = int(os.getenv('GA_DOWNLOAD_WORKERS', '4'))
+DOWNLOAD_TIMEOUT = float(os.getenv('GA_DOWNLOAD_TIMEOUT', '60'))
+DOWNLOAD_RETRIES = int(os.getenv('GA_DOWNLOAD_RETRIES', '4'))
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+
+HTML_DIR = 'IssuesArticles/html'
+# 旧数据中的 GA_Path / 页面 <img src> 可能是仓库的 raw / GitHub Pages 绝对地址
+REPO_RAW_PREFIX = 'https://raw.githubusercontent.com/tang1693/PERShtml/refs/heads/main/'
+PAGES_PREFIX = 'https://tang1693.github.io/PERShtml/'
+VARIANT_MANIFEST = os.path.join(HTML_DIR, 'img', 'variants.json')
+# 内容寻址存储（相对 HTML_DIR）与 Drive file_id → 对象路径的索引
+STORE_DIR = 'img/objects'
+STORE_INDEX = '6_IssuesArticles/ga_store_index.json'
+
+# 文章页中 GA 最大显示宽度 800px，1200 供高分屏使用
+VARIANT_WIDTHS = (400, 800, 1200)
+THUMBNAIL_WIDTH = 240
+WEBP_QUALITY = 80
+AVIF_QUALITY = 50
+# AVIF 编码慢且需要 Pillow 的 AVIF 支持，默认关闭
+VARIANT_AVIF = os.getenv('GA_VARIANT_AVIF', '0') == '1'
+
+VALIDATION_MANIFEST = '6_IssuesArticles/image_validation.json'
+# 校验规则变化时递增，缓存的解码结果全部作废
+VALIDATION_VERSION = 1
+
+BROWSER_FORMATS = {'PNG', 'JPEG', 'GIF', 'WEBP', 'AVIF'}
+EXTENSION_FORMATS = {
+    '.png': 'PNG',
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.gif': 'GIF',
+    '.webp': 'WEBP',
+    '.avif': 'AVIF',
+}
+
+AUDIT_REPORT = 'logs/image_audit.json'
+ISSUE_PAGE_PATTERN = re.compile(r'\d{6}\.html')
+
+IMG_SRC_PATTERN = re.compile(r'<img[^>]+src=["\']([^"\']+)["\']', re.IGNORECASE)
+SOURCE_SRCSET_PATTERN = re.compile(r'<source[^>]+srcset=["\']([^"\']+)["\']', re.IGNORECASE)
+
+# 变体生成参数变化时递增，所有变体都会重新生成
+VARIANT_VERSION = 1
+
+DRIVE_FILE_ID_PATTERN = re.compile(r'/d/([^/]+)/')
+
+# 旧版 gdown 没有 timeout 参数
+_GDOWN_TIMEOUT = 'timeout' in inspect.signature(gdown.download).parameters
+
+
+def ensure_browser_safe_png(path):
+    """Ensure a downloaded graphical abstract is a real browser-safe PNG.
+
+    Google Drive links do not guarantee the underlying file format.  The old
+    flow saved every download as ``.png`` even when the bytes were TIFF/JPEG,
+    which can produce broken images in browsers.  Keep the stable file_id.png
+    naming, but convert the bytes to an actual PNG before publishing.
+    """
+    try:
+        with Image.open(path) as image:
+            original_format = image.format or 'UNKNOWN'
+            image.load()
+
+            if original_format == 'PNG':
+                return True, original_format, False
+
+            if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+                converted = image.convert('RGBA')
+            else:
+                converted = image.convert('RGB')
+
+            tmp_path = f"{path}.tmp.png"
+            converted.save(tmp_path, format='PNG', optimize=True)
+            os.replace(tmp_path, path)
+            return True, original_format, True
+    except (UnidentifiedImageError, OSError, ValueError) as exc:
+        return False, str(exc), False
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resolve_image_src(src, html_path):
+    """页面中的图片地址 → 项目内本地路径（相对项目根目录）；外部图片返回 None"""
+    if src.startswith(REPO_RAW_PREFIX):
+        return src[len(REPO_RAW_PREFIX):]
+    if src.startswith(PAGES_PREFIX):
+        return src[len(PAGES_PREFIX):]
+    if src.startswith(('http://', 'https://', 'data:')):
+        # External non-repo image; not expected for GA, but do not guess a local path.
+        return None
+    return os.path.normpath(os.path.join(os.path.dirname(html_path), src))
+
+
+def ga_relative_path(ga_path, html_dir=HTML_DIR):
+    """GA_Path（相对路径或仓库绝对地址）→ 相对 html_dir 的路径，如 img/2026/04/<id>.png"""
+    local_path = resolve_image_src(str(ga_path), os.path.join(html_dir, 'index.html'))
+    if local_path is None:
+        return None
+    return os.path.relpath(local_path, html_dir).replace(os.sep, '/')
+
+
+def page_image_srcs(html):
+    """页面引用的所有图片地址：<img src> 以及 <picture> 中 <source srcset> 的每个候选"""
+    srcs = IMG_SRC_PATTERN.findall(html)
+    for srcset in SOURCE_SRCSET_PATTERN.findall(html):
+        srcs.extend(candidate.split()[0] for candidate in srcset.split(',') if candidate.strip())
+    return srcs
+
+
+# ---- 图片体检 ---------------------------------------------------------
+
+def sniff_format(path):
+    """只读文件头判断格式（PNG/JPEG/GIF/WEBP/AVIF），无法识别返回 None"""
+    with open(path, 'rb') as file:
+        header = file.read(16)
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'PNG'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'JPEG'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'GIF'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    if header[4:12] in (b'ftypavif', b'ftypavis'):
+        return 'AVIF'
+    return None
+
+
+def decode_image(path):
+    """完整解码一次，返回 {format, width, height, ok, reason}"""
+    try:
+        with Image.open(path) as image:
+            image.load()
+            return {'format': image.format, 'width': image.width, 'height': image.height, 'ok': True, 'reason': None}
+    except (UnidentifiedImageError, OSError, ValueError) as exc:
+        return {'format': None, 'width': None, 'height': None, 'ok': False, 'reason': f"cannot decode image: {exc}"}
+
+
+def _judge(path, decoded):
+    """按解码结果 + 扩展名给出 (是否通过, 格式或原因)，与原 validate_browser_image_file 规则一致"""
+    if not decoded['ok']:
+        return False, decoded['reason']
+    actual_format = decoded['format']
+
+    suffix = os.path.splitext(path)[1].lower()
+    expected = EXTENSION_FORMATS.get(suffix)
+    if expected and actual_format != expected:
+        return False, f"extension {suffix} but actual format is {actual_format}"
+
+    if actual_format not in BROWSER_FORMATS:
+        return False, f"unsupported browser image format: {actual_format}"
+
+    return True, actual_format
+
+
+def validate_browser_image_file(path):
+    """Strict local validation for images referenced by generated HTML."""
+    return _judge(path, decode_image(path))
+
+
+class ImageValidationCache:
+    """按内容哈希缓存的图片体检结果（线程安全）
+
+    images: {sha256: 解码结果}；files: {路径: {sha256, size, mtime_ns}}
+    size/mtime 未变时直接复用路径上次的哈希，否则重新计算哈希（只读字节，不解码）。
+    保存时删除文件已不存在的路径（gc 删除、替换后改名等），以及不再被任何路径引用的哈希。
+    """
+
+    def __init__(self, path=VALIDATION_MANIFEST):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.images = {}
+        self.files = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                if data.get('version') == VALIDATION_VERSION:
+                    self.images = data.get('images', {})
+                    self.files = data.get('files', {})
+            except (OSError, ValueError) as exc:
+                print(f"   ⚠️  图片体检缓存无法读取，重新解码: {exc}")
+
+    def content_hash(self, path):
+        stat = os.stat(path)
+        key = path.replace(os.sep, '/')
+        with self._lock:
+            cached = self.files.get(key)
+            if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                return cached['sha256']
+        digest = file_sha256(path)
+        with self._lock:
+            self.files[key] = {'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            self._dirty = True
+        return digest
+
+    def lookup(self, path):
+        """(哈希, 缓存的解码结果或 None)；文件头与缓存格式不一致时视为未缓存"""
+        digest = self.content_hash(path)
+        with self._lock:
+            decoded = self.images.get(digest)
+        if decoded and decoded['ok'] and sniff_format(path) != decoded['format']:
+            decoded = None
+        return digest, decoded
+
+    def remember(self, digest, decoded):
+        with self._lock:
+            self.images[digest] = decoded
+            self._dirty = True
+
+    def check(self, path):
+        """与 validate_browser_image_file 相同的返回值；命中缓存时只读文件头 + 哈希"""
+        digest, decoded = self.lookup(path)
+        if decoded is None:
+            decoded = decode_image(path)
+            self.remember(digest, decoded)
+        return _judge(path, decoded)
+
+    def is_valid_png(self, path):
+        _, decoded = self.lookup(path)
+        return bool(decoded and decoded['ok'] and decoded['format'] == 'PNG')
+
+    def remember_png(self, path):
+        """ensure_browser_safe_png 刚完整解码/写出的 PNG：只读文件头取尺寸后记入缓存"""
+        with Image.open(path) as image:
+            width, height = image.size
+        self.remember(self.content_hash(path),
+                      {'format': 'PNG', 'width': width, 'height': height, 'ok': True, 'reason': None})
+
+    def save(self):
+        with self._lock:
+            missing = [key for key in self.files if not os.path.exists(key)]
+            for key in missing:
+                del self.files[key]
+            if not self._dirty and not missing:
+                return
+            # 只保留仍被某个文件引用的哈希
+            live = {entry['sha256'] for entry in self.files.values()}
+            images = {digest: decoded for digest, decoded in self.images.items() if digest in live}
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'version': VALIDATION_VERSION, 'images': images, 'files': self.files},
+                          file, indent=1, sort_keys=True)
+                file.write('\n')
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+def backoff_delay(attempt):
+    """第 attempt 次重试前的等待秒数（指数退避 + 抖动）"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return delay + random.uniform(0, delay / 2)
+
+
+def download_drive_file(file_id, output_path, timeout=DOWNLOAD_TIMEOUT, retries=DOWNLOAD_RETRIES):
+    """下载单个 Drive 文件到 output_path（先写 .download 临时文件），返回 (成功, 错误信息)"""
+    tmp_download_path = f"{output_path}.download"
+    kwargs = {'quiet': True}
+    if _GDOWN_TIMEOUT:
+        kwargs['timeout'] = timeout
+
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff_delay(attempt - 1))
+        if os.path.exists(tmp_download_path):
+            os.remove(tmp_download_path)
+        try:
+            downloaded = gdown.download(f"https://drive.google.com/uc?id={file_id}", tmp_download_path, **kwargs)
+        except Exception as exc:  # Drive 限流、超时、连接错误都值得重试
+            error = str(exc)
+            continue
+        if downloaded and os.path.exists(tmp_download_path) and os.path.getsize(tmp_download_path) > 0:
+            os.replace(tmp_download_path, output_path)
+            return True, None
+        error = None
+
+    if os.path.exists(tmp_download_path):
+        os.remove(tmp_download_path)
+    return False, error
+
+
+def download_ga_images(df, year, issue_no, max_workers=DOWNLOAD_WORKERS):
+    """下载图形摘要图片并在 DataFrame 中添加 GA_Path
+
+    关键逻辑：
+    - Excel 每一行就是一条完整记录（包括 GA_Link）
+    - 下载后在**同一行**添加 GA_Path
+    - 图片按内容哈希存入 img/objects/（同一张图重新上传成新的 file_id 也只存一份），
+      file_id → 对象的映射记在 ga_store_index.json，已入库的 file_id 不再下载
+    - 下载后强制校验/转换为真正 PNG，避免 TIFF/JPEG 伪装成 .png 导致网页坏图
+    - 生成 HTML 时使用相对路径，避免 raw.githubusercontent.com 429 影响网页图片
+    """
+    # 旧布局（img/<year>/<issue>/<file_id>.png）中已有的文件会复制入库，原文件留给 gc 清理
+    legacy_dir = os.path.join(HTML_DIR, 'img', str(year), str(issue_no))
+    incoming_dir = os.path.join(HTML_DIR, STORE_DIR, 'incoming')
+    os.makedirs(incoming_dir, exist_ok=True)
+
+    print(f"\n📥 下载 GA 图片到: {os.path.join(HTML_DIR, STORE_DIR)}（并发 {max_workers}）")
+
+    # 每行的结果：(GA_Path 或 None, 失败信息或 None)，最后按行序汇总，报告顺序与串行时一致
+    row_results = {}
+    rows_by_file = {}
+    for index, row in df.iterrows():
+        title = row['Title']
+        ga_link = row['GA_Link']
+
+        if pd.isna(ga_link):
+            print(f"   ⚠️  无 GA 链接: {title[:50]}...")
+            row_results[index] = (None, None)
+            continue
+
+        # 提取 Google Drive file ID
+        match = DRIVE_FILE_ID_PATTERN.search(ga_link)
+        if not match:
+            message = f"无法解析 GA 链接: {title[:50]}..."
+            print(f"   ⚠️  {message}")
+            row_results[index] = (None, message)
+            continue
+
+        rows_by_file.setdefault(match.group(1), []).append((index, title))
+
+    # 同一 file_id 只下载 / 体检一次；已入库且内容哈希体检过的 PNG 不再解码
+    cache = ImageValidationCache()
+    store_index = load_store_index()
+    file_results = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as downloads, process_pool() as conversions:
+        download_futures = {}
+        conversion_futures = {}
+        for file_id, rows in rows_by_file.items():
+            title = rows[0][1]
+            stored = store_index.get(file_id)
+            legacy_path = os.path.join(legacy_dir, f"{file_id}.png")
+            if stored and os.path.exists(os.path.join(HTML_DIR, stored)) and cache.is_valid_png(os.path.join(HTML_DIR, stored)):
+                print(f"   ✅ PNG 体检通过: {title[:50]}... (已入库，内容未变化)")
+                file_results[file_id] = (True, stored)
+            elif os.path.exists(legacy_path):
+                print(f"   ⏭️  {title[:50]}... (已存在，执行格式体检)")
+                conversion_futures[conversions.submit(ensure_browser_safe_png, legacy_path)] = (file_id, legacy_path, True)
+            else:
+                print(f"   📥 {title[:50]}...")
+                # 文件名稳定使用 file_id，但内容必须转换成真正 PNG
+                output_path = os.path.join(incoming_dir, f"{file_id}.png")
+                download_futures[downloads.submit(download_drive_file, file_id, output_path)] = (file_id, output_path)
+
+        for future in as_completed(download_futures):
+            file_id, output_path = download_futures[future]
+            title = rows_by_file[file_id][0][1]
+            ok, error = future.result()
+            if ok:
+                conversion_futures[conversions.submit(ensure_browser_safe_png, output_path)] = (file_id, output_path, False)
+                continue
+            if error:
+                message = f"下载失败: {title[:50]}... ({error})"
+            else:
+                message = f"下载失败或空文件: {title[:50]}..."
+            print(f"   ❌ {message}")
+            file_results[file_id] = (False, message)
+
+        for future in as_completed(conversion_futures):
+            file_id, output_path, is_legacy = conversion_futures[future]
+            title = rows_by_file[file_id][0][1]
+            try:
+                ok, original_format, converted = future.result()
+            except Exception as exc:
+                # DecompressionBombError、BrokenProcessPool 等：只记为这张图片失败，不中断整期
+                message = f"图片转换失败: {title[:50]}... ({type(exc).__name__}: {exc})"
+                print(f"   ❌ {message}")
+                file_results[file_id] = (False, message)
+                continue
+            if not ok:
+                message = f"图片格式无效: {title[:50]}... ({original_format})"
+                print(f"   ❌ {message}")
+                file_results[file_id] = (False, message)
+                continue
+            stored, duplicate = add_to_store(output_path, keep_source=is_legacy)
+            store_index[file_id] = stored
+            cache.remember_png(os.path.join(HTML_DIR, stored))
+            if converted:
+                print(f"   🔁 已转换为 PNG: {title[:50]}... ({original_format} -> PNG)")
+            else:
+                print(f"   ✅ PNG 体检通过: {title[:50]}...")
+            if duplicate:
+                print(f"   ♻️  内容与已入库图片相同，复用: {stored}")
+            file_results[file_id] = (True, stored)
+
+    cache.save()
+    save_store_index(store_index)
+
+    for file_id, rows in rows_by_file.items():
+        ok, value = file_results[file_id]
+        for index, _ in rows:
+            row_results[index] = (value, None) if ok else (None, value)
+
+    success_count = 0
+    failures = []
+    for index in df.index:
+        ga_path, message = row_results[index]
+        if message:
+            failures.append(message)
+        elif ga_path:
+            success_count += 1
+            # 关键：在同一行添加 GA_Path
+            # HTML 生成时会读取同一行的所有数据，自然对应
+            df.loc[index, 'GA_Path'] = ga_path
+
+    if failures:
+        details = '\n      - '.join(failures)
+        raise RuntimeError(f"GA image processing failed:\n      - {details}")
+
+    print(f"\n✅ GA 下载/体检: {success_count}/{len(df)}")
+    return df
+
+
+# ---- 内容寻址存储 -----------------------------------------------------
+
+def store_object_path(digest, extension='.png'):
+    """相对 HTML_DIR 的对象路径：img/objects/<前两位>/<sha256>.png"""
+    return f"{STORE_DIR}/{digest[:2]}/{digest}{extension}"
+
+
+def add_to_store(path, keep_source=False, html_dir=HTML_DIR):
+    """把 path 存入内容寻址存储，返回 (对象路径, 是否与已有对象重复)
+
+    keep_source=False 时源文件被移动（或因重复而删除）；True 时复制，源文件保持不动
+    """
+    digest = file_sha256(path)
+    stored = store_object_path(digest, os.path.splitext(path)[1].lower() or '.png')
+    destination = os.path.join(html_dir, stored)
+    if os.path.exists(destination):
+        if not keep_source:
+            os.remove(path)
+        return stored, True
+
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp_path = f"{destination}.tmp"
+    if keep_source:
+        shutil.copy2(path, tmp_path)
+    else:
+        shutil.move(path, tmp_path)
+    os.replace(tmp_path, destination)
+    return stored, False
+
+
+def load_store_index(path=STORE_INDEX):
+    """{Drive file_id: 对象路径}"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_store_index(entries, path=STORE_INDEX):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(entries, file, indent=1, sort_keys=True)
+        file.write('\n')
+    os.replace(tmp_path, path)
+
+
+def referenced_images(html_dir=HTML_DIR):
+    """仍在使用的图片（相对 html_dir）：总库 GA_Path + 各期刊页实际引用的图片
+
+    旧期刊页的 GA 不一定回填到了总库 GA_Path，因此页面引用也必须保留。
+    """
+    from catalog_store import CatalogStore
+
+    referenced = set()
+    store = CatalogStore()
+    try:
+        if not store.is_empty() and 'GA_Path' in store.data_columns():
+            for ga_path in store.read_all()['GA_Path'].dropna().astype(str):
+                relative_path = ga_relative_path(ga_path, html_dir)
+                if relative_path:
+                    referenced.add(relative_path)
+    finally:
+        store.close()
+
+    for page in issue_pages(html_dir):
+        for _, local_path in _scan_page(page):
+            if local_path:
+                referenced.add(os.path.relpath(local_path, html_dir).replace(os.sep, '/'))
+    return referenced
+
+
+def gc_images(html_dir=HTML_DIR, delete=False):
+    """找出 img/ 下不再被引用的图片（含其变体），delete=True 时删除，返回 (孤立文件列表, 字节数)"""
+    keep = referenced_images(html_dir)
+    variant_manifest = load_variant_manifest()
+    for ga_path in list(keep):
+        entry = variant_manifest.get(ga_path)
+        if entry:
+            keep.update(variant[0] for items in entry['variants'].values() for variant in items)
+            keep.add(entry['thumbnail'][0])
+
+    img_dir = os.path.join(html_dir, 'img')
+    orphans = []
+    for root, dirs, files in os.walk(img_dir):
+        dirs[:] = [name for name in dirs if name != 'incoming']
+        for name in files:
+            if name.endswith('.json'):
+                continue
+            relative_path = os.path.relpath(os.path.join(root, name), html_dir).replace(os.sep, '/')
+            if relative_path not in keep:
+                orphans.append(relative_path)
+    orphans.sort()
+    total_bytes = sum(os.path.getsize(os.path.join(html_dir, path)) for path in orphans)
+
+    if delete and orphans:
+        for path in orphans:
+            os.remove(os.path.join(html_dir, path))
+        removed = set(orphans)
+        if removed & set(variant_manifest):
+            _save_variant_manifest({key: entry for key, entry in variant_manifest.items() if key not in removed})
+        store_index = load_store_index()
+        if removed & set(store_index.values()):
+            save_store_index({file_id: stored for file_id, stored in store_index.items() if stored not in removed})
+        for root, dirs, files in os.walk(img_dir, topdown=False):
+            if root != img_dir and not os.listdir(root):
+                os.rmdir(root)
+        # 体检缓存中已删除文件的记录在保存时清理
+        ImageValidationCache().save()
+    return orphans, total_bytes
+
+
+# ---- 响应式变体 -------------------------------------------------------
+
+def _variant_formats(avif=VARIANT_AVIF):
+    formats = ['webp']
+    if avif and features.check('avif'):
+        formats.insert(0, 'avif')
+    return formats
+
+
+def _variant_widths(width):
+    widths = [step for step in VARIANT_WIDTHS if step < width]
+    widths.append(min(width, VARIANT_WIDTHS[-1]))
+    return list(dict.fromkeys(widths))
+
+
+def _save_variant(image, path, image_format):
+    tmp_path = f"{path}.tmp"
+    if image_format == 'avif':
+        image.save(tmp_path, format='AVIF', quality=AVIF_QUALITY)
+    else:
+        image.save(tmp_path, format='WEBP', quality=WEBP_QUALITY, method=4)
+    os.replace(tmp_path, path)
+
+
+def make_variants(ga_path, html_dir=HTML_DIR, formats=('webp',)):
+    """为单张 GA 生成变体（在进程池中运行），返回 variants.json 中的一条记录"""
+    source = os.path.join(html_dir, ga_path)
+    stem = os.path.splitext(ga_path)[0]
+    with Image.open(source) as image:
+        image.load()
+        width, height = image.size
+        mode = 'RGBA' if image.mode in ('RGBA', 'LA', 'P') or 'transparency' in image.info else 'RGB'
+        image = image.convert(mode)
+
+        variants = {}
+        for image_format in formats:
+            variants[image_format] = []
+            for variant_width in _variant_widths(width):
+                variant_height = max(1, round(height * variant_width / width))
+                resized = image if variant_width == width else image.resize((variant_width, variant_height), Image.LANCZOS)
+                variant_path = f"{stem}-{variant_width}w.{image_format}"
+                _save_variant(resized, os.path.join(html_dir, variant_path), image_format)
+                variants[image_format].append([variant_path, variant_width, variant_height])
+
+        thumb_width = min(width, THUMBNAIL_WIDTH)
+        thumb_height = max(1, round(height * thumb_width / width))
+        thumbnail_path = f"{stem}-thumb.webp"
+        _save_variant(image.resize((thumb_width, thumb_height), Image.LANCZOS),
+                      os.path.join(html_dir, thumbnail_path), 'webp')
+
+    return {
+        'version': VARIANT_VERSION,
+        'source': file_sha256(source),
+        'width': width,
+        'height': height,
+        'variants': variants,
+        'thumbnail': [thumbnail_path, thumb_width, thumb_height],
+    }
+
+
+def load_variant_manifest(path=VARIANT_MANIFEST):
+    """{相对 html_dir 的 GA 路径: 记录}；文件不存在或损坏时返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_variant_manifest(entries, path=VARIANT_MANIFEST):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(entries, file, indent=1, sort_keys=True)
+        file.write('\n')
+    os.replace(tmp_path, path)
+
+
+def _is_current(entry, ga_path, html_dir, formats):
+    if not entry or entry.get('version') != VARIANT_VERSION:
+        return False
+    # 按内容哈希判断（clone 后 mtime 会变，不能用 mtime）
+    if entry.get('source') != file_sha256(os.path.join(html_dir, ga_path)):
+        return False
+    if set(entry.get('variants', {})) != set(formats):
+        return False
+    paths = [variant[0] for items in entry['variants'].values() for variant in items]
+    paths.append(entry['thumbnail'][0])
+    return all(os.path.exists(os.path.join(html_dir, path)) for path in paths)
+
+
+def build_ga_variants(ga_paths, html_dir=HTML_DIR, manifest_path=VARIANT_MANIFEST, max_workers=None):
+    """为 ga_paths 中的 GA 生成响应式变体（记录按相对 html_dir 的路径索引），已是最新的跳过；返回生成的数量"""
+    formats = _variant_formats()
+    entries = load_variant_manifest(manifest_path)
+    pending = []
+    relative_paths = (ga_relative_path(path, html_dir) for path in ga_paths if isinstance(path, str) and path)
+    for ga_path in dict.fromkeys(path for path in relative_paths if path):
+        if not os.path.exists(os.path.join(html_dir, ga_path)):
+            print(f"   ⚠️  GA 不存在，跳过变体: {ga_path}")
+            continue
+        if not _is_current(entries.get(ga_path), ga_path, html_dir, formats):
+            pending.append(ga_path)
+
+    if not pending:
+        print(f"   ⏭️  GA 变体均为最新")
+        return 0
+
+    print(f"\n🖼️  生成 GA 变体: {len(pending)} 张（{' + '.join(formats)}，宽度 {'/'.join(map(str, VARIANT_WIDTHS))}）")
+    failures = []
+    with process_pool(max_workers=max_workers) as executor:
+        futures = {executor.submit(make_variants, ga_path, html_dir, tuple(formats)): ga_path for ga_path in pending}
+        for future in as_completed(futures):
+            ga_path = futures[future]
+            try:
+                entries[ga_path] = future.result()
+            except (UnidentifiedImageError, OSError, ValueError) as exc:
+                print(f"   ❌ 变体生成失败: {ga_path} ({exc})")
+                failures.append(ga_path)
+
+    _save_variant_manifest(entries, manifest_path)
+    print(f"   ✅ GA 变体: {len(pending) - len(failures)}/{len(pending)}")
+    return len(pending) - len(failures)
+
+
+# ---- 全站图片体检 -----------------------------------------------------
+
+def _scan_page(html_path):
+    """解析单个期刊页（在进程池中运行），返回 [(src, 本地路径或 None)]"""
+    with open(html_path, 'r', encoding='utf-8') as file:
+        html = file.read()
+    return [(src, resolve_image_src(src, html_path)) for src in page_image_srcs(html)]
+
+
+def issue_pages(html_dir=HTML_DIR):
+    return sorted(
+        os.path.join(html_dir, name) for name in os.listdir(html_dir) if ISSUE_PAGE_PATTERN.fullmatch(name)
+    )
+
+
+def audit_images(html_dir=HTML_DIR, report_path=AUDIT_REPORT, max_workers=None):
+    """体检所有期刊页引用的图片（解析页面与解码未缓存的图片都在进程池中并行），返回报告 dict"""
+    started = time.time()
+    pages = issue_pages(html_dir)
+    cache = ImageValidationCache()
+
+    with process_pool(max_workers=max_workers) as executor:
+        references = dict(zip(pages, executor.map(_scan_page, pages, chunksize=16)))
+
+        # 同一文件可能被多页引用：每个文件只体检一次
+        local_paths = sorted({path for refs in references.values() for _, path in refs if path})
+        existing = [path for path in local_paths if os.path.isfile(path)]
+        results = {}
+        misses = {}
+        for path in existing:
+            digest, decoded = cache.lookup(path)
+            if decoded is None:
+                misses[path] = digest
+            else:
+                results[path] = decoded
+        for path, decoded in zip(misses, executor.map(decode_image, list(misses), chunksize=4)):
+            cache.remember(misses[path], decoded)
+            results[path] = decoded
+    cache.save()
+
+    page_summaries = {}
+    problems = []
+    for page, refs in references.items():
+        page_name = os.path.basename(page)
+        checked = 0
+        failed = 0
+        for src, path in refs:
+            if path is None:
+                continue
+            checked += 1
+            if path not in results:
+                problem = {'page': page_name, 'src': src, 'path': path, 'status': 'missing',
+                           'reason': 'file not found'}
+            else:
+                ok, reason = _judge(path, results[path])
+                if ok:
+                    continue
+                problem = {'page': page_name, 'src': src, 'path': path, 'status': 'invalid', 'reason': reason}
+            failed += 1
+            problems.append(problem)
+        page_summaries[page_name] = {'images': checked, 'failures': failed}
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'pages': len(pages),
+        'images': len(local_paths),
+        'references': sum(summary['images'] for summary in page_summaries.values()),
+        'decoded': len(misses),
+        'failures': len(problems),
+        'elapsed_seconds': round(time.time() - started, 3),
+        'problems': problems,
+        'page_summaries': page_summaries,
+    }
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+        tmp_path = f"{report_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+            file.write('\n')
+        os.replace(tmp_path, report_path)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GA 图片工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('variants', help='为整个图片库生成响应式变体')
+    audit_parser = subparsers.add_parser('audit-images', help='体检所有期刊页引用的图片')
+    audit_parser.add_argument('--report', default=AUDIT_REPORT, help=f'JSON 报告路径（默认 {AUDIT_REPORT}）')
+    audit_parser.add_argument('--jobs', type=int, default=None, help='进程数（默认 CPU 核数）')
+    gc_parser = subparsers.add_parser('gc', help='清理不再被引用的图片')
+    gc_parser.add_argument('--delete', action='store_true', help='实际删除（默认只列出）')
+    args = parser.parse_args()
+
+    if args.command == 'gc':
+        orphans, total_bytes = gc_images(delete=args.delete)
+        for path in orphans:
+            print(f"   🗑️  {path}")
+        action = '已删除' if args.delete else '可删除（加 --delete 实际删除）'
+        print(f"✅ 孤立图片 {len(orphans)} 个，{total_bytes / 1024 / 1024:.1f} MB {action}")
+
+    if args.command == 'audit-images':
+        report = audit_images(report_path=args.report, max_workers=args.jobs)
+        print(f"🔍 图片体检: {report['pages']} 个期刊页，{report['images']} 张图片"
+              f"（{report['references']} 处引用，新解码 {report['decoded']} 张），耗时 {report['elapsed_seconds']}s")
+        for problem in report['problems']:
+            print(f"   ❌ {problem['page']}: {problem['path']} ({problem['reason']})")
+        print(f"📄 报告: {args.report}")
+        if report['failures']:
+            print(f"❌ {report['failures']} 处图片问题")
+            sys.exit(1)
+        print("✅ 所有图片体检通过")
+
+    if args.command == 'variants':
+        img_dir = os.path.join(HTML_DIR, 'img')
+        ga_paths = []
+        for root, _, files in os.walk(img_dir):
+            for name in sorted(files):
+                if name.endswith('.png'):
+                    ga_paths.append(os.path.relpath(os.path.join(root, name), HTML_DIR).replace(os.sep, '/'))
+        build_ga_variants(sorted(ga_paths))
+
+
+if __name__ == '__main__':
+    main()
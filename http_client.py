@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+共享 HTTP 客户端（抓取脚本共用：ingentaconnect.com、doi.org 等）
+
+- 一个 requests.Session + 连接池，所有请求复用 keep-alive 连接，不再每次重新建立 TCP / TLS
+- 每个主机最多 HTTP_PER_HOST 个同时进行的请求（默认 4），imap() 用线程池并发抓取、按输入顺序返回
+- 超时为 (连接, 读取) = (HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT)，单次请求可用 timeout= 覆盖
+- 429 / 5xx / 网络错误重试 HTTP_RETRIES 次：优先按 Retry-After 等待，否则指数退避加随机抖动（与 async_http 相同）
+- 熔断：同一主机连续失败 BREAKER_THRESHOLD 次后，BREAKER_COOLDOWN 秒内直接抛出 CircuitOpenError，
+  冷却后放行一次试探请求，成功即恢复
+- 统一浏览器 User-Agent，始终校验证书（不再使用 verify=False）
+
+    import http_client
+    response = http_client.get(url)                                # 失败重试后仍失败时抛出异常
+    for result in http_client.imap(fetch_abstract, article_urls):  # 并发，按顺序返回
+        ...
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from async_http import RETRY_STATUSES, backoff_seconds, retry_after_seconds
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/112.0.0.0 Safari/537.36')
+
+HTTP_PER_HOST = int(os.getenv('HTTP_PER_HOST', '4'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '60'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '3'))
+MAX_RETRY_AFTER = 120.0   # 抓取脚本不长时间等待，超过此值按此值等待
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
+POOL_HOSTS = 16           # 连接池缓存的主机数
+
+
+class CircuitOpenError(requests.RequestException):
+    """主机处于熔断状态，请求未发送"""
+
+
+class CircuitBreaker:
+    """连续失败 threshold 次后打开 cooldown 秒；冷却后半开，只放行一个试探请求"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                # 试探失败或达到阈值：重新计时
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class HttpClient:
+    def __init__(self, per_host=HTTP_PER_HOST, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT),
+                 retries=HTTP_RETRIES, headers=None, breaker_threshold=BREAKER_THRESHOLD,
+                 breaker_cooldown=BREAKER_COOLDOWN):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self.session.headers.update(headers or {})
+        # 重试由本类处理，连接池大小与每主机并发数一致
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=per_host, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.stats = {'requests': 0, 'retries': 0, 'failed': 0, 'rejected': 0}
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        """(并发信号量, 熔断器)；重定向后的主机（如 doi.org → ingentaconnect.com）计入原主机"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (
+                    threading.BoundedSemaphore(self.per_host),
+                    CircuitBreaker(self.breaker_threshold, self.breaker_cooldown),
+                )
+            return self._hosts[host]
+
+    def get(self, url, timeout=None, **kwargs):
+        """GET，返回最后一次响应（状态码由调用方判断）；网络错误重试后仍失败时抛出异常，熔断时抛出 CircuitOpenError"""
+        slots, breaker = self._host(url)
+        timeout = self.timeout if timeout is None else timeout
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                with self._lock:
+                    self.stats['rejected'] += 1
+                raise CircuitOpenError(f"{urlparse(url).netloc} 连续失败，暂停请求 {breaker.cooldown:g} 秒")
+            with self._lock:
+                self.stats['requests'] += 1
+            wait = None
+            try:
+                with slots:
+                    response = self.session.get(url, timeout=timeout, **kwargs)
+            except requests.RequestException as exc:
+                breaker.failure()
+                if attempt == self.retries:
+                    with self._lock:
+                        self.stats['failed'] += 1
+                    raise
+                error = exc
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    # 2xx / 3xx / 4xx：主机正常响应
+                    breaker.success()
+                    return response
+                breaker.failure()
+                if attempt == self.retries:
+                    with self._lock:
+                        self.stats['failed'] += 1
+                    return response
+                error = f"HTTP {response.status_code}"
+                wait = retry_after_seconds(response.headers)
+                response.close()
+
+            with self._lock:
+                self.stats['retries'] += 1
+            wait = backoff_seconds(attempt) if wait is None else min(wait, MAX_RETRY_AFTER)
+            print(f"   ⚠️  {error}，{wait:.1f} 秒后重试（{attempt + 1}/{self.retries}）: {url}")
+            time.sleep(wait)
+
+    def imap(self, func, items, workers=None):
+        """用线程池并发执行 func(item)（func 内调用 get()），按 items 顺序逐个返回结果
+
+        每主机的并发数仍受 per_host 限制；调用方可以边取结果边写入（断点续跑）
+        """
+        items = list(items)
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=workers or self.per_host) as executor:
+            yield from executor.map(func, items)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def shared_client():
+    """进程内共享的 HttpClient（所有抓取脚本复用同一个连接池）"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def get(url, **kwargs):
+    return shared_client().get(url, **kwargs)
+
+
+def imap(func, items, workers=None):
+    return shared_client().imap(func, items, workers)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+IssueKey / 期刊日期 / 卷号 / 期号的统一推导（所有模块共用）
+
+规则（按优先级）:
+1. IssueKey 列: 202604 / 202604.0 → 202604；历史 bug 产生的 2026.006 → 202606
+2. Ingenta URL: .../pers/{year}/0000{volume}/0000{issue}/... → {year}{issue:02d}
+3. 都没有时为空（<NA>）
+
+derive_issue_columns() 对整列使用 .str.extract 一次完成，不再逐行 apply；
+结果作为 _issue_key / _issue_date / _volume / _issue_no 类型化列缓存在总库中。
+"""
+import re
+
+import pandas as pd
+
+ISSUE_KEY_PATTERN = re.compile(r'(\d{4})(\d{2})(?:\.0+)?')
+# Historical bug: pandas float year + issue produced values like 2026.006.
+FLOAT_YEAR_ISSUE_PATTERN = re.compile(r'(\d{4})\.(\d{1,3})')
+INGENTA_URL_PATTERN = r'/pers/(?P<year>\d{4})/0*(?P<volume>\d+)/0*(?P<issue>\d+)(?=[/;?#]|$)'
+
+# PE&RS 卷号 = 年份 - 1934
+VOLUME_YEAR_OFFSET = 1934
+
+DERIVED_COLUMNS = ['_issue_key', '_issue_date', '_volume', '_issue_no']
+
+
+def canonical_issue_key(value):
+    """单个值规范化为 YYYYMM；无法识别时原样返回文本，空值返回 ''"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    text = str(value).strip()
+
+    match = ISSUE_KEY_PATTERN.fullmatch(text)
+    if match:
+        return match.group(1) + match.group(2)
+
+    match = FLOAT_YEAR_ISSUE_PATTERN.fullmatch(text)
+    if match:
+        year, issue = match.groups()
+        return f"{year}{int(issue):02d}"
+
+    return text
+
+
+def _zero_pad(numbers):
+    return numbers.astype('Int64').astype('string').str.zfill(2)
+
+
+def derive_issue_keys(issue_keys, urls=None):
+    """向量化推导 YYYYMM（string dtype，无法推导时为 <NA>）"""
+    text = issue_keys.astype('string').str.strip()
+
+    plain = text.str.extract(f'^{ISSUE_KEY_PATTERN.pattern}$')
+    keys = plain[0] + plain[1]
+
+    dotted = text.str.extract(f'^{FLOAT_YEAR_ISSUE_PATTERN.pattern}$')
+    keys = keys.fillna(dotted[0] + _zero_pad(pd.to_numeric(dotted[1])))
+
+    if urls is not None:
+        parts = urls.astype('string').str.extract(INGENTA_URL_PATTERN)
+        keys = keys.fillna(parts['year'] + _zero_pad(pd.to_numeric(parts['issue'])))
+
+    return keys.astype('string')
+
+
+def derive_issue_columns(df):
+    """返回与 df 同索引的 DataFrame: _issue_key(string) / _issue_date(datetime64) / _volume(Int64) / _issue_no(Int64)"""
+    empty = pd.Series(pd.NA, index=df.index, dtype='string')
+    issue_keys = df['IssueKey'] if 'IssueKey' in df.columns else empty
+    urls = df['URL'] if 'URL' in df.columns else None
+
+    keys = derive_issue_keys(issue_keys, urls)
+    years = pd.to_numeric(keys.str[:4], errors='coerce').astype('Int64')
+    issue_no = pd.to_numeric(keys.str[4:], errors='coerce').astype('Int64')
+
+    volume = years - VOLUME_YEAR_OFFSET
+    if urls is not None:
+        url_volume = pd.to_numeric(urls.astype('string').str.extract(INGENTA_URL_PATTERN)['volume'], errors='coerce')
+        volume = url_volume.astype('Int64').fillna(volume)
+
+    dates = pd.to_datetime(keys + '01', format='%Y%m%d', errors='coerce')
+
+    return pd.DataFrame({
+        '_issue_key': keys,
+        '_issue_date': dates,
+        '_volume': volume,
+        '_issue_no': issue_no,
+    }, index=df.index)
+
+
+def with_issue_columns(df):
+    """df 已带有类型化列（例如从总库读出）时直接返回，否则推导后合并"""
+    if all(column in df.columns for column in DERIVED_COLUMNS):
+        return df
+    derived = derive_issue_columns(df)
+    return pd.concat([df.drop(columns=[c for c in DERIVED_COLUMNS if c in df.columns]), derived], axis=1)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+进程内流水线工具
+
+各模块脚本放在以数字开头的目录中（如 1_InPress/），无法直接 import。
+这里按文件路径加载脚本，每个脚本只加载一次，之后复用同一个 module 对象，
+这样 update_from_s3.py 可以在同一个进程里调用各阶段函数，并在阶段之间直接传递 DataFrame，
+不再为每个模块启动新的 python3 进程、重复 import pandas；总库由 catalog_store 按期号索引读取。
+
+run_stages() 按声明的依赖关系（DAG）调度各阶段：互不依赖的阶段在线程池中同时运行，
+结束后打印关键路径耗时，整体耗时取决于最慢的一条分支，而不是所有阶段之和。
+阶段内需要进程池时用 process_pool()（不 fork 多线程的进程）。
+"""
+import importlib.util
+import io
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_loaded_scripts = {}
+_load_lock = threading.Lock()
+_output_lock = threading.Lock()
+
+
+def _module_name(relative_path):
+    stem = os.path.splitext(relative_path)[0]
+    return 'stage_' + re.sub(r'\W', '_', stem)
+
+
+def load_script(relative_path):
+    """按相对项目根目录的路径加载模块脚本（脚本中的 __main__ 入口不会执行）"""
+    with _load_lock:
+        if relative_path in _loaded_scripts:
+            return _loaded_scripts[relative_path]
+
+        path = os.path.join(PROJECT_ROOT, relative_path)
+        name = _module_name(relative_path)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            sys.modules.pop(name, None)
+            raise
+
+        _loaded_scripts[relative_path] = module
+        return module
+
+
+def process_pool(max_workers=None, **kwargs):
+    """ProcessPoolExecutor，子进程用 forkserver（不支持的平台为 spawn）启动
+
+    run_stages() 的阶段在线程池中同时运行，fork 时其他线程可能正持有锁（SQLite 连接、_output_lock、
+    输出缓冲），子进程继承锁的状态后可能死锁（Python 3.12 起 fork 多线程进程会发出警告）。
+    子进程重新 import 任务函数所在的模块，任务函数必须定义在可 import 的模块顶层。
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method), **kwargs)
+
+
+def run_stage(label, func, *args, **kwargs):
+    """运行一个阶段函数并打印耗时；异常原样抛出，由调用方决定是否继续"""
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - started
+        print(f"   ⏱️  {label}: {elapsed:.2f}s")
+
+
+# name: 阶段名；func: 接收 results 字典（已完成阶段的返回值）的函数；deps: 依赖的阶段名
+Stage = namedtuple('Stage', ['name', 'func', 'deps'])
+
+
+class _ThreadRoutedStdout:
+    """按线程分流 print 输出：并行阶段各自缓冲，阶段结束后整段输出，日志不会交错"""
+
+    def __init__(self, target):
+        self._target = target
+        self._buffers = {}
+
+    def route(self, buffer):
+        self._buffers[threading.get_ident()] = buffer
+
+    def unroute(self):
+        self._buffers.pop(threading.get_ident(), None)
+
+    def write(self, text):
+        buffer = self._buffers.get(threading.get_ident(), self._target)
+        return buffer.write(text)
+
+    def flush(self):
+        self._target.flush()
+
+    def __getattr__(self, name):
+        # encoding / isatty() / fileno() 等其余属性交给原来的 stdout
+        return getattr(self._target, name)
+
+
+def _validate_stages(stages):
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"阶段名重复: {names}")
+    for stage in stages:
+        unknown = [dep for dep in stage.deps if dep not in names]
+        if unknown:
+            raise ValueError(f"阶段 {stage.name} 依赖未知阶段: {unknown}")
+
+    # 拓扑排序检查环
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"阶段依赖存在环: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def critical_path(stages, durations):
+    """返回 (关键路径阶段名列表, 关键路径总耗时)；只统计已完成的阶段"""
+    by_name = {stage.name: stage for stage in stages}
+    finish = {}
+    previous = {}
+
+    def longest(name):
+        if name in finish:
+            return finish[name]
+        best_dep, best = None, 0.0
+        for dep in by_name[name].deps:
+            if dep in durations and longest(dep) > best:
+                best_dep, best = dep, longest(dep)
+        finish[name] = best + durations[name]
+        previous[name] = best_dep
+        return finish[name]
+
+    if not durations:
+        return [], 0.0
+
+    end = max(durations, key=longest)
+    path = []
+    while end is not None:
+        path.append(end)
+        end = previous[end]
+    path.reverse()
+    return path, finish[path[-1]]
+
+
+def print_timing_summary(stages, durations, wall_clock):
+    path, path_time = critical_path(stages, durations)
+    total = sum(durations.values())
+
+    print("\n⏱️  阶段耗时:")
+    for stage in stages:
+        if stage.name in durations:
+            marker = ' ★' if stage.name in path else ''
+            print(f"   - {stage.name}: {durations[stage.name]:.2f}s{marker}")
+        else:
+            print(f"   - {stage.name}: 未运行")
+    print(f"   关键路径: {' → '.join(path)} ({path_time:.2f}s)")
+    print(f"   实际耗时: {wall_clock:.2f}s | 串行总和: {total:.2f}s")
+
+
+def run_stages(stages, max_workers=None):
+    """按依赖关系并行运行各阶段，返回 {阶段名: 返回值}
+
+    某个阶段失败时，依赖它的阶段会被跳过，其余阶段照常完成，最后重新抛出第一个异常。
+    """
+    _validate_stages(stages)
+    pending = {stage.name: stage for stage in stages}
+    results = {}
+    durations = {}
+    failed = {}
+    if max_workers is None:
+        max_workers = len(stages) or 1
+
+    real_stdout = sys.stdout
+    routed = _ThreadRoutedStdout(real_stdout)
+
+    def execute(stage, snapshot):
+        buffer = io.StringIO()
+        routed.route(buffer)
+        started = time.perf_counter()
+        try:
+            return stage.func(snapshot)
+        finally:
+            durations[stage.name] = time.perf_counter() - started
+            routed.unroute()
+            with _output_lock:
+                real_stdout.write(buffer.getvalue())
+                real_stdout.flush()
+
+    started = time.perf_counter()
+    sys.stdout = routed
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if any(dep in failed for dep in stage.deps):
+                        failed[name] = None
+                        del pending[name]
+                        print(f"⏭️  跳过阶段 {name}（依赖失败）")
+                    elif all(dep in results for dep in stage.deps):
+                        del pending[name]
+                        running[executor.submit(execute, stage, dict(results))] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as exc:
+                        failed[name] = exc
+                        print(f"❌ 阶段 {name} 失败: {exc}")
+    finally:
+        sys.stdout = real_stdout
+
+    print_timing_summary(stages, durations, time.perf_counter() - started)
+
+    errors = [exc for exc in failed.values() if exc is not None]
+    if errors:
+        raise errors[0]
+    return results
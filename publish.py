@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+发布后处理：压缩（minify）生成的 HTML，并在旁边写出预压缩的 .gz / .br 副本，
+静态托管 / CDN 可直接返回预压缩文件，不必每次请求时压缩。
+
+- 只处理空白：<script> / <style> / <pre> / <textarea> 原样保留；
+  其余部分（包括 <details> 中的摘要正文）连续空白合并为一个（含换行时保留一个换行），
+  浏览器渲染结果不变；普通 HTML 注释删除（条件注释保留）
+- 幂等：已压缩的页面再次处理结果不变；内容未变化的文件不重写，不产生 git 变更
+- .gz 固定 mtime=0，相同内容得到相同字节；.br 需要可选依赖 brotli，未安装时只写 .gz
+- 文件是原地压缩的：报告中每个文件记录压缩后内容的 sha256 与压缩前的体积，下次运行时文件未被重新生成
+  （内容哈希相同）则沿用上次记录的压缩前体积，体积对比始终是生成器输出 → 压缩后
+
+用法:
+  python3 publish.py                      # 处理所有 HTML 输出并输出体积报告
+  python3 publish.py --report logs/publish_report.json --jobs 4
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：未安装时只生成 .gz
+    brotli = None
+
+from pipeline import process_pool
+from templates import atomic_output
+
+# 根目录的片段（嵌入 ASPRS 页面）+ 期刊页 + 作者页 + 站内搜索页
+PUBLISH_GLOBS = ['*.html', 'IssuesArticles/html/*.html', 'authors/*.html', 'search/index.html']
+PUBLISH_REPORT = 'logs/publish_report.json'
+
+GZIP_LEVEL = 9
+COMPRESSED_SUFFIXES = ('.gz', '.br')   # 预压缩副本：删除 HTML 时一并删除
+BROTLI_QUALITY = 11
+
+# 内容必须原样保留的元素
+PRESERVED_PATTERN = re.compile(r'<(script|style|pre|textarea)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+COMMENT_PATTERN = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+# 只匹配 ASCII 空白；\s 会把 &nbsp; 对应的 U+00A0 也合并掉
+WHITESPACE_PATTERN = re.compile(r'[ \t\r\n\f]+')
+
+
+def _collapse(segment):
+    segment = COMMENT_PATTERN.sub('', segment)
+    return WHITESPACE_PATTERN.sub(lambda match: '\n' if '\n' in match.group() else ' ', segment)
+
+
+def minify_html(html):
+    """合并 HTML 中的多余空白（保留元素内容原样输出）"""
+    parts = []
+    position = 0
+    for match in PRESERVED_PATTERN.finditer(html):
+        parts.append(_collapse(html[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(_collapse(html[position:]))
+    return ''.join(parts).strip() + '\n'
+
+
+def _write_if_changed(path, data):
+    """内容不同才写入（先写临时文件再替换）；返回是否写入"""
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            if file.read() == data:
+                return False
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def publish_file(path, previous=None):
+    """压缩单个 HTML 并写出 .gz / .br（在进程池中运行），返回体积统计
+
+    previous 为上次报告中该文件的记录；文件仍是上次压缩后的内容时沿用其中的压缩前体积
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        html = file.read()
+    original_size = len(html.encode('utf-8'))
+
+    minified = minify_html(html)
+    if minified != html:
+        with atomic_output(path) as stream:
+            stream.write(minified)
+    data = minified.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    if minified == html and previous and previous.get('sha256') == digest:
+        original_size = previous.get('original', original_size)
+
+    stats = {'path': path, 'original': original_size, 'minified': len(data), 'changed': minified != html,
+             'sha256': digest}
+    compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    stats['gzip'] = len(compressed)
+    _write_if_changed(f"{path}.gz", compressed)
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+        stats['brotli'] = len(compressed)
+        _write_if_changed(f"{path}.br", compressed)
+    return stats
+
+
+def publish_paths():
+    paths = []
+    for pattern in PUBLISH_GLOBS:
+        paths.extend(glob.glob(pattern))
+    return sorted(set(paths))
+
+
+def _format_size(size):
+    return f"{size / 1024:.1f} KB" if size < 1024 * 1024 else f"{size / 1024 / 1024:.2f} MB"
+
+
+def load_report_files(report_path=PUBLISH_REPORT):
+    """上次报告中的 {路径: 文件记录}；没有报告或无法读取时为空"""
+    try:
+        with open(report_path, 'r', encoding='utf-8') as file:
+            return {entry['path']: entry for entry in json.load(file).get('files', [])}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def publish_outputs(paths=None, report_path=PUBLISH_REPORT, max_workers=None):
+    """处理所有 HTML 输出，写出体积报告，返回报告 dict"""
+    started = time.time()
+    paths = publish_paths() if paths is None else list(paths)
+    if not paths:
+        print("   ⚠️  没有需要发布的 HTML")
+        return None
+
+    print(f"\n📦 发布后处理: {len(paths)} 个 HTML（minify + .gz{' + .br' if brotli else ''}）")
+    if brotli is None:
+        print("   ℹ️  未安装 brotli，跳过 .br（pip install brotli）")
+
+    previous = load_report_files(report_path)
+    with process_pool(max_workers=max_workers) as executor:
+        files = list(executor.map(publish_file, paths, [previous.get(path) for path in paths], chunksize=16))
+
+    totals = {key: sum(entry.get(key, 0) for entry in files) for key in ('original', 'minified', 'gzip', 'brotli')}
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'elapsed_seconds': round(time.time() - started, 2),
+        'brotli': brotli is not None,
+        'totals': totals,
+        'files': files,
+    }
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with atomic_output(report_path) as stream:
+        json.dump(report, stream, ensure_ascii=False, indent=2)
+        stream.write('\n')
+
+    changed = sum(1 for entry in files if entry['changed'])
+    print(f"   📄 HTML: {_format_size(totals['original'])} → {_format_size(totals['minified'])}"
+          f"（本次压缩 {changed} 个文件）")
+    print(f"   🗜️  gzip: {_format_size(totals['gzip'])}"
+          + (f" | brotli: {_format_size(totals['brotli'])}" if brotli is not None else ''))
+    print(f"   📝 报告: {report_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='压缩 HTML 输出并生成预压缩副本')
+    parser.add_argument('--report', default=PUBLISH_REPORT, help=f'JSON 报告路径（默认 {PUBLISH_REPORT}）')
+    parser.add_argument('--jobs', type=int, default=None, help='进程数（默认 CPU 核数）')
+    args = parser.parse_args()
+    publish_outputs(report_path=args.report, max_workers=args.jobs)
+
+
+if __name__ == '__main__':
+    main()
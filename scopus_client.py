@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Scopus 引用数异步客户端（asyncio）
+
+- 令牌桶限速（SCOPUS_RATE，默认 9 次/秒，对应 Scopus Search API 的节流上限），
+  SCOPUS_CONCURRENCY 控制同时进行的请求数
+- 429 / 5xx / 网络错误重试：优先按 Retry-After（或 X-RateLimit-Reset）等待，
+  否则指数退避加随机抖动；429 时整个令牌桶暂停，所有请求一起等待
+- 等待时间超过 MAX_RETRY_AFTER（周配额用完）或 API key 无效（401/403）时停止请求，剩余文章记为未知
+- 引用数返回 int，查询失败或 Scopus 中没有该文章返回 None（未知），不再把失败当作 0 引用
+- 批量查询：DOI_BATCH_SIZE 个 DOI 合并为一条 "DOI(a) OR DOI(b) ..." 查询，分页读取结果，
+  按 prism:doi 对应回文章；没有 DOI 的旧文章同样按标题批量查询（限定本刊 ISSN，按 dc:title 对应），
+  只有仍未匹配的文章才逐篇查询，请求数约为逐篇查询的十分之一
+
+请求、限速、重试与停止逻辑在 async_http.AsyncApiClient 中（与 Crossref / Serpdog 等来源共用）。
+"""
+import asyncio
+import os
+import re
+import unicodedata
+
+from async_http import MAX_RETRIES, REQUEST_TIMEOUT, AsyncApiClient
+
+SCOPUS_API_KEY = os.environ.get('SCOPUS_API_KEY', '')
+SCOPUS_API_URL = 'https://api.elsevier.com/content/search/scopus'
+
+SCOPUS_RATE = float(os.getenv('SCOPUS_RATE', '9'))                # 每秒请求数
+SCOPUS_CONCURRENCY = int(os.getenv('SCOPUS_CONCURRENCY', '4'))    # 同时进行的请求数
+DOI_BATCH_SIZE = int(os.getenv('SCOPUS_DOI_BATCH', '25'))
+TITLE_BATCH_SIZE = 10    # 标题较长，一次查询的标题数少一些，避免 URL 过长
+PAGE_SIZE = 25           # Scopus Search API 每页最多 25 条
+JOURNAL_ISSN = '0099-1112'  # PE&RS，标题批量查询限定本刊，避免匹配到其他期刊的同名文章
+# 含括号 / 引号 / 空白的 DOI 会破坏 OR 查询语法，单独查询
+UNBATCHABLE_DOI = re.compile(r'[\s()"]')
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def clean_title(title):
+    # 使用标题搜索（需要清理引号）
+    return str(title).replace('"', '').replace("'", "")
+
+
+def doi_key(doi):
+    return str(doi or '').strip().lower()
+
+
+def title_key(title):
+    """标题匹配键：只保留字母数字（忽略大小写、标点、空白与上下标标记的差异）"""
+    if title is None or not isinstance(title, str):
+        return ''
+    text = unicodedata.normalize('NFKD', title).lower()
+    return NON_ALNUM.sub('', text)
+
+
+def build_query(doi=None, title=None):
+    if doi:
+        return f'DOI({doi})'
+    if title:
+        return f'TITLE("{clean_title(title)}")'
+    return None
+
+
+def batchable_doi(doi):
+    return isinstance(doi, str) and bool(doi.strip()) and not UNBATCHABLE_DOI.search(doi.strip())
+
+
+def parse_citation_count(data):
+    """搜索结果第一条的 citedby-count；没有结果返回 None"""
+    entries = (data or {}).get('search-results', {}).get('entry', [])
+    if not entries or 'error' in entries[0]:
+        return None
+    try:
+        return int(entries[0].get('citedby-count'))
+    except (TypeError, ValueError):
+        return None
+
+
+class ScopusClient(AsyncApiClient):
+    """async with ScopusClient() as client: await client.citation_count(doi=...)"""
+
+    def __init__(self, api_key=None, rate=SCOPUS_RATE, max_in_flight=SCOPUS_CONCURRENCY,
+                 max_retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT, api_url=SCOPUS_API_URL, max_requests=None):
+        self.api_key = SCOPUS_API_KEY if api_key is None else api_key
+        self.api_url = api_url
+        super().__init__(
+            'Scopus', rate, max_in_flight=max_in_flight, max_retries=max_retries, timeout=timeout,
+            headers={'Accept': 'application/json', 'X-ELS-APIKey': self.api_key}, max_requests=max_requests,
+        )
+
+    async def search(self, query, count=1, start=0, field=None):
+        """执行一次 Scopus 搜索，返回 JSON；多次重试后仍失败或配额用完返回 None"""
+        params = {'query': query, 'count': count, 'start': start}
+        if field:
+            params['field'] = field
+        return await self.get_json(self.api_url, params)
+
+    async def citation_count(self, doi=None, title=None):
+        """引用数（int）；无法确定时返回 None"""
+        query = build_query(doi, title)
+        if query is None or not self.api_key:
+            return None
+        return parse_citation_count(await self.search(query, count=1, field='citedby-count'))
+
+    async def _batch_search(self, query, key_field, normalize):
+        """分页读取 OR 查询的全部结果，返回 {normalize(key_field): 引用数}；查询失败返回 None"""
+        found = {}
+        start = 0
+        while True:
+            data = await self.search(query, count=PAGE_SIZE, start=start, field=f'{key_field},citedby-count')
+            if data is None:
+                return None
+            results = data.get('search-results', {})
+            entries = [entry for entry in results.get('entry', []) if 'error' not in entry]
+            for entry in entries:
+                key = normalize(entry.get(key_field))
+                try:
+                    count = int(entry.get('citedby-count'))
+                except (TypeError, ValueError):
+                    continue
+                if key:
+                    # 同一文章有多条记录时取最大值
+                    found[key] = max(count, found.get(key, count))
+            start += len(entries)
+            try:
+                total = int(results.get('opensearch:totalResults') or 0)
+            except ValueError:
+                total = 0
+            if not entries or start >= total:
+                return found
+
+    async def citation_counts_by_doi(self, dois):
+        """一次 OR 查询多个 DOI，返回 {doi_key: 引用数}（查不到的 DOI 不在结果中）；查询失败返回 None"""
+        if not dois or not self.api_key:
+            return None
+        query = ' OR '.join(f'DOI({doi})' for doi in dois)
+        return await self._batch_search(query, 'prism:doi', doi_key)
+
+    async def citation_counts_by_title(self, titles):
+        """限定本刊（JOURNAL_ISSN）一次 OR 查询多个标题，返回 {title_key: 引用数}；查询失败返回 None"""
+        if not titles or not self.api_key:
+            return None
+        phrases = ' OR '.join(f'TITLE("{clean_title(title)}")' for title in titles)
+        return await self._batch_search(f'ISSN({JOURNAL_ISSN}) AND ({phrases})', 'dc:title', title_key)
+
+
+def _chunks(values, size):
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+async def scopus_citation_counts(client, items, batch_size=DOI_BATCH_SIZE, title_batch_size=TITLE_BATCH_SIZE):
+    """items 为 [(doi, title)]，返回与 items 对齐的 [int | None]（client 为已进入的 ScopusClient）
+
+    1. 有 DOI 的文章每 batch_size 个合并为一次 OR 查询，按 prism:doi 对应回文章
+    2. 剩余文章（没有 DOI 或按 DOI 查不到）每 title_batch_size 个标题合并为一次 OR 查询，按标题对应回文章
+    3. 仍未匹配的文章，以及 DOI 不能放进 OR 查询的文章，逐篇查询（与原来的单篇查询相同）
+    """
+    items = list(items)
+    counts = [None] * len(items)
+    singles = []
+
+    # 1. DOI 批量查询
+    by_doi = {}
+    leftovers = []
+    for position, (doi, _) in enumerate(items):
+        if batchable_doi(doi):
+            by_doi.setdefault(doi_key(doi), []).append(position)
+        elif doi and isinstance(doi, str):
+            singles.append((position, True))
+        else:
+            leftovers.append(position)
+    batches = _chunks(list(by_doi), batch_size)
+    results = await asyncio.gather(*(client.citation_counts_by_doi(batch) for batch in batches))
+    for batch, found in zip(batches, results):
+        if found is None:
+            continue  # 查询失败：记为未知
+        for key in batch:
+            if key in found:
+                for position in by_doi[key]:
+                    counts[position] = found[key]
+            else:
+                # Scopus 中按 DOI 查不到（DOI 元数据缺失等）：按标题再查
+                leftovers.extend(by_doi[key])
+    print(f"   Scopus DOI 批量查询: {len(by_doi)} 个 DOI，{len(batches)} 次查询")
+
+    # 2. 标题批量查询
+    by_title = {}
+    for position in sorted(leftovers):
+        key = title_key(items[position][1])
+        if key:
+            by_title.setdefault(key, []).append(position)
+    titles = {key: items[positions[0]][1] for key, positions in by_title.items()}
+    batches = _chunks(list(by_title), title_batch_size)
+    results = await asyncio.gather(
+        *(client.citation_counts_by_title([titles[key] for key in batch]) for batch in batches)
+    )
+    for batch, found in zip(batches, results):
+        if found is None:
+            continue
+        for key in batch:
+            if key in found:
+                for position in by_title[key]:
+                    counts[position] = found[key]
+            else:
+                singles.extend((position, False) for position in by_title[key])
+    print(f"   Scopus 标题批量查询: {len(by_title)} 个标题，{len(batches)} 次查询")
+
+    # 3. 逐篇查询
+    async def one(position, use_doi):
+        doi, title = items[position]
+        counts[position] = await client.citation_count(doi=doi if use_doi else None, title=title)
+
+    await asyncio.gather(*(one(position, use_doi) for position, use_doi in singles))
+    if singles:
+        print(f"   Scopus 逐篇查询: {len(singles)} 篇")
+    return counts
+
@@ -0,0 +1,136 @@
+/*
+ * PE&RS 站内搜索客户端（索引由 search_index.py 生成）
+ *
+ * 用法: PersSearch.search('lidar forest').then(function (results) { ... });
+ * 每个结果: {title, url, authors, openAccess, issue, score, matched}
+ *
+ * 只下载 meta.json 与查询词所在的分片；命中文档所在期的 docs/YYYYMM.json 按需加载。
+ * 分词 / 词干规则从 meta.json 读取，与 Python 端保持一致。
+ */
+(function (global) {
+    'use strict';
+
+    var script = document.currentScript;
+    var baseUrl = script ? script.src.replace(/[^/]*$/, '') : 'search/';
+    var cache = {};
+
+    function getJSON(path) {
+        if (!cache[path]) {
+            cache[path] = fetch(baseUrl + path).then(function (response) {
+                if (!response.ok) {
+                    throw new Error(path + ': HTTP ' + response.status);
+                }
+                return response.json();
+            });
+        }
+        return cache[path];
+    }
+
+    function stem(token, meta) {
+        var rules = meta.suffix_rules;
+        for (var i = 0; i < rules.length; i++) {
+            var suffix = rules[i][0], replacement = rules[i][1], minStem = rules[i][2];
+            var blocked = rules[i][3], undouble = rules[i][4];
+            if (token.length < suffix.length || token.slice(token.length - suffix.length) !== suffix) {
+                continue;
+            }
+            var base = token.slice(0, token.length - suffix.length);
+            if (base.length < minStem || (blocked && blocked.indexOf(base.charAt(base.length - 1)) >= 0)) {
+                return token;
+            }
+            var last = base.charAt(base.length - 1);
+            if (undouble && base.length > 1 && last === base.charAt(base.length - 2) &&
+                    'aeiou'.indexOf(last) < 0 && meta.undouble_keep.indexOf(last) < 0) {
+                base = base.slice(0, -1);
+            }
+            return base + replacement;
+        }
+        return token;
+    }
+
+    function queryTerms(query, meta) {
+        var tokens = query.normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase().match(/[a-z0-9]+/g) || [];
+        var terms = [];
+        tokens.forEach(function (token) {
+            if (token.length < meta.min_token_length || meta.stopwords.indexOf(token) >= 0) {
+                return;
+            }
+            var term = stem(token, meta);
+            if (terms.indexOf(term) < 0) {
+                terms.push(term);
+            }
+        });
+        return terms;
+    }
+
+    // FNV-1a 32 位哈希，与 search_index.shard_of 相同
+    function shardOf(term, shardCount) {
+        var hash = 0x811c9dc5;
+        for (var i = 0; i < term.length; i++) {
+            hash = Math.imul(hash ^ term.charCodeAt(i), 0x01000193) >>> 0;
+        }
+        return hash % shardCount;
+    }
+
+    function shardPath(shard) {
+        return 'shards/' + (shard < 10 ? '0' : '') + shard + '.json';
+    }
+
+    // 文档 id → 期号（各期 id 区间不重叠）
+    function issueOf(id, meta) {
+        var issues = meta.issues;
+        for (var issue in issues) {
+            if (id >= issues[issue].start && id < issues[issue].start + issues[issue].count) {
+                return issue;
+            }
+        }
+        return null;
+    }
+
+    function search(query, limit) {
+        limit = limit || 20;
+        return getJSON('meta.json').then(function (meta) {
+            var terms = queryTerms(query, meta);
+            if (!terms.length) {
+                return [];
+            }
+            return Promise.all(terms.map(function (term) {
+                return getJSON(shardPath(shardOf(term, meta.shard_count))).then(function (shard) {
+                    // 只取分片自己的键："constructor" / "toString" 等查询词不能命中 Object.prototype
+                    return Object.prototype.hasOwnProperty.call(shard, term) ? shard[term] : null;
+                });
+            })).then(function (postings) {
+                // 按命中的查询词数、再按权重之和排序
+                var scores = {};
+                postings.forEach(function (posting) {
+                    if (!posting) {
+                        return;
+                    }
+                    var id = 0;
+                    for (var i = 0; i < posting[0].length; i++) {
+                        id += posting[0][i];
+                        var entry = scores[id] || (scores[id] = {id: id, score: 0, matched: 0});
+                        entry.score += posting[1][i];
+                        entry.matched += 1;
+                    }
+                });
+                var ranked = Object.keys(scores).map(function (id) { return scores[id]; });
+                ranked.sort(function (a, b) { return (b.matched - a.matched) || (b.score - a.score) || (b.id - a.id); });
+                ranked = ranked.slice(0, limit);
+
+                return Promise.all(ranked.map(function (entry) {
+                    var issue = issueOf(entry.id, meta);
+                    return getJSON('docs/' + issue + '.json').then(function (docs) {
+                        var doc = docs[entry.id - meta.issues[issue].start];
+                        return {
+                            title: doc[0], url: doc[1], authors: doc[2], openAccess: doc[3] === 1,
+                            issue: issue, score: entry.score, matched: entry.matched,
+                        };
+                    });
+                }));
+            });
+        });
+    }
+
+    global.PersSearch = {search: search};
+})(window);
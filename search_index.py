@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+站内全文搜索：从总库生成静态倒排索引（search/），由 search/search.js 在浏览器中查询
+
+索引结构:
+- search/meta.json        版本、分片数、分词规则（词干后缀、停用词，客户端共用同一份规则）、
+                          每期的文档 id 区间 {期号: {start, count, hash}}
+- search/shards/NN.json   {词干: [文档 id 差分数组, 权重数组]}，词按 FNV-1a 哈希分到 SHARD_COUNT 个分片，
+                          查询只下载查询词所在的分片
+- search/docs/YYYYMM.json 该期文档 [标题, 链接, 作者, 是否 Open Access]，按 id 顺序
+
+增量更新：按期计算行哈希，只对新增 / 变化的期分词（整列向量化），新文档 id 追加在末尾；
+变化或删除的期从分片中移除旧 id。废弃 id 超过 COMPACT_RATIO 时整体重建一次以收紧 id 空间。
+
+用法:
+  python3 search_index.py             # 增量更新
+  python3 search_index.py --rebuild   # 全量重建
+"""
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from build_manifest import hash_dataframe
+from catalog_store import CatalogStore
+from issue_keys import with_issue_columns
+from templates import atomic_output
+
+SEARCH_DIR = 'search'
+INDEX_VERSION = 1
+SHARD_COUNT = 64
+
+INDEX_COLUMNS = ['Title', 'Authors', 'Abstract', 'IssueKey', 'Access', 'URL']
+TITLE_WEIGHT = 3
+MAX_WEIGHT = 255
+MIN_TOKEN_LENGTH = 2
+COMPACT_RATIO = 0.2
+
+TAG_PATTERN = r'<[^>]+>'
+COMBINING_MARK_PATTERN = r'[\u0300-\u036f]'
+TOKEN_PATTERN = r'[a-z0-9]+'
+
+# 轻量词干规则 [后缀, 替换, 词干最短长度, 后缀前不能是的字符, 去掉末尾重复辅音]
+# 按顺序取第一条后缀匹配的规则；search.js 从 meta.json 读取同一份规则
+SUFFIX_RULES = [
+    ['sses', 'ss', 2, '', False],
+    ['ies', 'y', 2, '', False],
+    ['ational', 'ate', 3, '', False],
+    ['ations', 'ate', 3, '', False],
+    ['ation', 'ate', 3, '', False],
+    ['ingly', '', 3, '', True],
+    ['ing', '', 3, '', True],
+    ['edly', '', 3, '', True],
+    ['ed', '', 3, '', True],
+    ['ments', '', 3, '', False],
+    ['ment', '', 3, '', False],
+    ['ness', '', 3, '', False],
+    ['s', '', 3, 'sui', False],
+]
+UNDOUBLE_KEEP = 'lsz'
+VOWELS = 'aeiou'
+
+STOPWORDS = sorted({
+    'a', 'about', 'all', 'also', 'an', 'and', 'are', 'as', 'at', 'be', 'been', 'between', 'both', 'but', 'by',
+    'can', 'do', 'each', 'for', 'from', 'has', 'have', 'how', 'in', 'into', 'is', 'it', 'its', 'more', 'most',
+    'no', 'not', 'of', 'on', 'or', 'our', 'such', 'than', 'that', 'the', 'their', 'them', 'these', 'this',
+    'those', 'through', 'to', 'two', 'using', 'was', 'we', 'were', 'which', 'while', 'with', 'within',
+})
+
+
+def stem(token):
+    for suffix, replacement, min_stem, blocked, undouble in SUFFIX_RULES:
+        if not token.endswith(suffix):
+            continue
+        base = token[:len(token) - len(suffix)]
+        if len(base) < min_stem or (blocked and base[-1] in blocked):
+            return token
+        if (undouble and len(base) > 1 and base[-1] == base[-2]
+                and base[-1] not in VOWELS and base[-1] not in UNDOUBLE_KEEP):
+            base = base[:-1]
+        return base + replacement
+    return token
+
+
+def shard_of(term):
+    """FNV-1a 32 位哈希取模（search.js 中实现相同）"""
+    value = 0x811c9dc5
+    for byte in term.encode('utf-8'):
+        value = ((value ^ byte) * 0x01000193) & 0xffffffff
+    return value % SHARD_COUNT
+
+
+def tokenize(texts):
+    """整列分词：去标签 → 去重音 → 小写 → [a-z0-9]+，返回每行的词列表"""
+    return (texts.fillna('').astype(str)
+            .str.replace(TAG_PATTERN, ' ', regex=True)
+            .str.normalize('NFKD')
+            .str.replace(COMBINING_MARK_PATTERN, '', regex=True)
+            .str.lower()
+            .str.findall(TOKEN_PATTERN))
+
+
+def build_postings(docs):
+    """docs 带 _doc（文档 id）列 → DataFrame[term, doc, weight, shard]"""
+    fields = []
+    for column, weight in (('Title', TITLE_WEIGHT), ('Authors', 1), ('Abstract', 1)):
+        if column not in docs.columns:
+            continue
+        tokens = pd.DataFrame({'doc': docs['_doc'].to_numpy(), 'token': tokenize(docs[column]).to_numpy()})
+        tokens = tokens.explode('token').dropna(subset=['token'])
+        tokens['weight'] = weight
+        fields.append(tokens)
+    if not fields:
+        return pd.DataFrame(columns=['term', 'doc', 'weight', 'shard'])
+
+    tokens = pd.concat(fields, ignore_index=True)
+    tokens = tokens[(tokens['token'].str.len() >= MIN_TOKEN_LENGTH) & ~tokens['token'].isin(STOPWORDS)]
+    # 每个不同的词只做一次词干提取与分片计算
+    unique_tokens = tokens['token'].unique()
+    stems = {token: stem(token) for token in unique_tokens}
+    tokens['term'] = tokens['token'].map(stems)
+
+    postings = tokens.groupby(['term', 'doc'], as_index=False)['weight'].sum()
+    postings['weight'] = postings['weight'].clip(upper=MAX_WEIGHT)
+    shards = {term: shard_of(term) for term in postings['term'].unique()}
+    postings['shard'] = postings['term'].map(shards)
+    return postings
+
+
+def _shard_path(search_dir, shard):
+    return os.path.join(search_dir, 'shards', f"{shard:02d}.json")
+
+
+def _write_json(path, data):
+    with atomic_output(path) as stream:
+        json.dump(data, stream, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_shard(search_dir, shard):
+    """{词干: (ids, weights)}（numpy 数组，ids 已还原）"""
+    path = _shard_path(search_dir, shard)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        encoded = json.load(file)
+    return {
+        term: (np.cumsum(np.asarray(deltas, dtype=np.int64)), np.asarray(weights, dtype=np.int64))
+        for term, (deltas, weights) in encoded.items()
+    }
+
+
+def save_shard(search_dir, shard, postings):
+    encoded = {}
+    for term in sorted(postings):
+        ids, weights = postings[term]
+        if len(ids):
+            encoded[term] = [np.diff(ids, prepend=0).tolist(), weights.tolist()]
+    _write_json(_shard_path(search_dir, shard), encoded)
+
+
+def _removed_mask(ids, ranges):
+    mask = np.zeros(len(ids), dtype=bool)
+    for start, count in ranges:
+        mask |= (ids >= start) & (ids < start + count)
+    return mask
+
+
+def _fresh_meta():
+    return {
+        'version': INDEX_VERSION,
+        'shard_count': SHARD_COUNT,
+        'suffix_rules': SUFFIX_RULES,
+        'undouble_keep': UNDOUBLE_KEEP,
+        'stopwords': STOPWORDS,
+        'min_token_length': MIN_TOKEN_LENGTH,
+        'next_id': 0,
+        'issues': {},
+    }
+
+
+def load_meta(search_dir=SEARCH_DIR):
+    """读取索引元数据；版本或分词规则变化时返回 None（需要全量重建）"""
+    path = os.path.join(search_dir, 'meta.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        meta = json.load(file)
+    fresh = _fresh_meta()
+    for key in ('version', 'shard_count', 'suffix_rules', 'undouble_keep', 'stopwords', 'min_token_length'):
+        if meta.get(key) != fresh[key]:
+            return None
+    return meta
+
+
+def _issue_hashes(groups):
+    hashes = {}
+    for issue, group in groups.items():
+        columns = [column for column in INDEX_COLUMNS if column in group.columns]
+        hashes[issue] = hash_dataframe(group[columns])[:16]
+    return hashes
+
+
+def _doc_records(group):
+    access = group.get('Access', pd.Series('', index=group.index)).fillna('').astype(str)
+    is_open = access.str.contains('open access', case=False) | access.str.strip().str.lower().eq('oa')
+    return [
+        [title, url, authors, int(open_access)]
+        for title, url, authors, open_access in zip(
+            group['Title'].fillna('').astype(str),
+            group['URL'].fillna('').astype(str),
+            group.get('Authors', pd.Series('', index=group.index)).fillna('').astype(str),
+            is_open,
+        )
+    ]
+
+
+def build_search_index(catalog, search_dir=SEARCH_DIR, rebuild=False):
+    """增量更新搜索索引，返回重新索引的期数"""
+    catalog = with_issue_columns(catalog)
+    catalog = catalog[catalog['_issue_key'].notna()]
+    groups = {str(issue): group for issue, group in catalog.groupby('_issue_key')}
+    hashes = _issue_hashes(groups)
+
+    meta = None if rebuild else load_meta(search_dir)
+    if meta is not None:
+        indexed = sum(entry['count'] for entry in meta['issues'].values())
+        if meta['next_id'] and (meta['next_id'] - indexed) / meta['next_id'] > COMPACT_RATIO:
+            print("   🔄 搜索索引废弃 id 过多，全量重建")
+            meta = None
+    if meta is None:
+        shutil.rmtree(os.path.join(search_dir, 'shards'), ignore_errors=True)
+        shutil.rmtree(os.path.join(search_dir, 'docs'), ignore_errors=True)
+        meta = _fresh_meta()
+
+    issues = meta['issues']
+    stale = [issue for issue, entry in issues.items() if hashes.get(issue) != entry['hash']]
+    changed = sorted(issue for issue, digest in hashes.items()
+                     if issue not in issues or issues[issue]['hash'] != digest)
+    if not stale and not changed:
+        print("   ⏭️  搜索索引: 总库未变化，跳过")
+        return 0
+
+    print(f"\n🔎 更新搜索索引: {len(changed)} 期重新索引，{len(stale)} 期移除旧记录")
+    removed_ranges = [(issues[issue]['start'], issues[issue]['count']) for issue in stale]
+    for issue in stale:
+        del issues[issue]
+        if issue not in hashes:
+            docs_path = os.path.join(search_dir, 'docs', f"{issue}.json")
+            if os.path.exists(docs_path):
+                os.remove(docs_path)
+
+    # 新 / 变化的期分配新的 id 区间（追加在末尾，分片中 id 仍保持有序）
+    new_docs = []
+    for issue in changed:
+        group = groups[issue]
+        start = meta['next_id']
+        issues[issue] = {'start': start, 'count': len(group), 'hash': hashes[issue]}
+        meta['next_id'] += len(group)
+        new_docs.append(group.assign(_doc=np.arange(start, start + len(group))))
+        _write_json(os.path.join(search_dir, 'docs', f"{issue}.json"), _doc_records(group))
+
+    postings = build_postings(pd.concat(new_docs, ignore_index=True)) if new_docs else None
+    touched = set(range(SHARD_COUNT)) if removed_ranges else set()
+    if postings is not None:
+        touched.update(postings['shard'].unique().tolist())
+        by_shard = dict(tuple(postings.groupby('shard')))
+    else:
+        by_shard = {}
+
+    for shard in sorted(touched):
+        entries = load_shard(search_dir, shard)
+        if removed_ranges:
+            for term, (ids, weights) in entries.items():
+                keep = ~_removed_mask(ids, removed_ranges)
+                entries[term] = (ids[keep], weights[keep])
+        if shard in by_shard:
+            for term, term_postings in by_shard[shard].groupby('term'):
+                new_ids = term_postings['doc'].to_numpy(dtype=np.int64)
+                new_weights = term_postings['weight'].to_numpy(dtype=np.int64)
+                ids, weights = entries.get(term, (np.empty(0, np.int64), np.empty(0, np.int64)))
+                ids = np.concatenate([ids, new_ids])
+                weights = np.concatenate([weights, new_weights])
+                order = np.argsort(ids, kind='stable')
+                entries[term] = (ids[order], weights[order])
+        save_shard(search_dir, shard, entries)
+
+    meta['issues'] = dict(sorted(issues.items()))
+    _write_json(os.path.join(search_dir, 'meta.json'), meta)
+    terms = len(postings['term'].unique()) if postings is not None else 0
+    print(f"   ✅ 搜索索引: {sum(len(new) for new in new_docs)} 篇文章，{terms} 个词，更新 {len(touched)} 个分片")
+    return len(changed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成站内搜索索引')
+    parser.add_argument('--rebuild', action='store_true', help='忽略已有索引，全量重建')
+    args = parser.parse_args()
+
+    store = CatalogStore()
+    try:
+        build_search_index(store.read_all(derived=True), rebuild=args.rebuild)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
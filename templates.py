@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+共享 HTML 渲染层：所有生成脚本共用 templates/ 下的模板（文章卡片只有一份定义）
+
+- 模板语法是 Jinja2 的子集：{{ name }} 取值，{% if name %}...{% endif %} 条件段（不可嵌套）
+- 模板首次使用时编译为 str.format_map 格式串并缓存（文件修改后自动重新编译），
+  渲染时不再逐行拼接字符串
+- render_to() 直接写入文件流；atomic_output() 先写临时文件再替换，写到一半中断不会留下残缺页面
+- 样式统一放在 templates/site.css，发布为 assets/site.<内容哈希>.css（文件名随内容变化，可永久缓存），
+  页面只输出 class
+"""
+import hashlib
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from pipeline import PROJECT_ROOT
+
+TEMPLATE_DIR = os.path.join(PROJECT_ROOT, 'templates')
+STYLESHEET_SOURCE = os.path.join(TEMPLATE_DIR, 'site.css')
+ASSET_DIR = 'assets'
+SITE_URL = 'https://tang1693.github.io/PERShtml/'
+
+VARIABLE_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+SECTION_PATTERN = re.compile(r'\{%\s*if\s+(\w+)\s*%\}(.*?)\{%\s*endif\s*%\}', re.DOTALL)
+
+CARD_CLASS = 'pers-card'
+CARD_RULED_CLASS = 'pers-card pers-card--ruled'  # 带上分隔线的卡片
+OPEN_ACCESS_BADGE = '<span class="pers-badge--open-access">Open Access</span>'
+
+
+def _compile_text(text):
+    """字面文本中的花括号转义，{{ name }} 转成 {name}"""
+    parts = []
+    position = 0
+    for match in VARIABLE_PATTERN.finditer(text):
+        parts.append(text[position:match.start()].replace('{', '{{').replace('}', '}}'))
+        parts.append('{' + match.group(1) + '}')
+        position = match.end()
+    parts.append(text[position:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts)
+
+
+class CompiledTemplate:
+    """编译后的模板：[(条件变量名或 None, 格式串)]"""
+
+    def __init__(self, source, name='<string>'):
+        self.name = name
+        self.segments = []
+        position = 0
+        for match in SECTION_PATTERN.finditer(source):
+            if match.start() > position:
+                self.segments.append((None, _compile_text(source[position:match.start()])))
+            self.segments.append((match.group(1), _compile_text(match.group(2))))
+            position = match.end()
+        if position < len(source):
+            self.segments.append((None, _compile_text(source[position:])))
+
+    def render_to(self, stream, context):
+        for condition, fmt in self.segments:
+            if condition is None or context.get(condition):
+                stream.write(fmt.format_map(context))
+
+    def render(self, context):
+        parts = []
+        for condition, fmt in self.segments:
+            if condition is None or context.get(condition):
+                parts.append(fmt.format_map(context))
+        return ''.join(parts)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_template(name):
+    """按文件名取编译后的模板（按 mtime 缓存）"""
+    path = os.path.join(TEMPLATE_DIR, name)
+    mtime = os.stat(path).st_mtime_ns
+    with _cache_lock:
+        cached = _cache.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    with open(path, 'r', encoding='utf-8') as file:
+        template = CompiledTemplate(file.read(), name)
+    with _cache_lock:
+        _cache[name] = (mtime, template)
+    return template
+
+
+def render_to(stream, name, **context):
+    get_template(name).render_to(stream, context)
+
+
+def render(name, **context):
+    return get_template(name).render(context)
+
+
+@contextmanager
+def atomic_output(path):
+    """写入 path.tmp，成功后原子替换 path；出错时删除临时文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as stream:
+            yield stream
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def text(value):
+    """单元格取值 → 文本；NaN / None / 'N/A' 视为空"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    value = str(value)
+    return '' if value == 'N/A' else value
+
+
+def publish_stylesheet():
+    """把 templates/site.css 发布为 assets/site.<哈希>.css，返回相对站点根目录的路径
+
+    旧版本文件保留：未重新生成的页面仍引用旧哈希
+    """
+    with open(STYLESHEET_SOURCE, 'rb') as file:
+        data = file.read()
+    name = f"site.{hashlib.sha256(data).hexdigest()[:12]}.css"
+    path = os.path.join(PROJECT_ROOT, ASSET_DIR, name)
+    if not os.path.exists(path):
+        with atomic_output(path) as stream:
+            stream.write(data.decode('utf-8'))
+        print(f"🎨 已发布样式表: {ASSET_DIR}/{name}")
+    return f"{ASSET_DIR}/{name}"
+
+
+def stylesheet_link():
+    """片段嵌入 ASPRS 页面，样式表用站点绝对地址"""
+    return f'<link rel="stylesheet" href="{SITE_URL}{publish_stylesheet()}">\n'
+
+
+def render_card(stream, title='', url='', info='', authors='', abstract='', open_access=False,
+                badge='', media='', card_class=CARD_CLASS):
+    """写出一张文章卡片（templates/article_card.html）"""
+    render_to(
+        stream, 'article_card.html',
+        card_class=card_class,
+        access_badge=OPEN_ACCESS_BADGE if open_access else '',
+        badge=badge,
+        title=title,
+        url=url or '#',
+        info=info,
+        authors=authors,
+        abstract=abstract,
+        media=media,
+    )
@@ -8,10 +8,26 @@ import sys
 import os
 import subprocess
 import pandas as pd
-import gdown
 import re
-from datetime import datetime
-from PIL import Image, UnidentifiedImageError
+from datetime import datetime, timedelta
+
+from build_manifest import BuildManifest, build_if_changed, hash_file, input_hash
+from build_state import BuildState
+from catalog_journal import record_change
+from catalog_store import CATALOG_CSV, CatalogStore
+from feeds import update_feeds_and_sitemap
+from ga_images import (
+    ImageValidationCache,
+    build_ga_variants,
+    download_ga_images,
+    page_image_srcs,
+    resolve_image_src,
+)
+from issue_keys import canonical_issue_key
+from pipeline import Stage, load_script, run_stage, run_stages
+from publish import publish_outputs
+from search_index import build_search_index
+from templates import publish_stylesheet
 
 DOI_PREFIX_PATTERN = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi\.org/|doi:)\s*', re.IGNORECASE)
 
@@ -64,36 +80,6 @@ def normalize_year(value):
         return text[:-2] if text.endswith('.0') else text
 
 
-def canonical_issue_key(value):
-    """Normalize historical IssueKey variants to strict YYYYMM."""
-    if value is None or pd.isna(value):
-        return ''
-    text = str(value).strip()
-    if re.fullmatch(r'\d{6}', text):
-        return text
-
-    match = re.fullmatch(r'(\d{6})\.0+', text)
-    if match:
-        return match.group(1)
-
-    # Historical bug: pandas float year + issue produced values like 2026.006.
-    match = re.fullmatch(r'(\d{4})\.(\d{1,3})', text)
-    if match:
-        year, issue = match.groups()
-        return f"{year}{int(issue):02d}"
-
-    try:
-        number = float(text)
-        if number.is_integer():
-            as_int = str(int(number))
-            if re.fullmatch(r'\d{6}', as_int):
-                return as_int
-    except (TypeError, ValueError):
-        pass
-
-    return text
-
-
 INPRESS_PATTERN = re.compile(r'in[\s-]?press', re.IGNORECASE)
 
 
@@ -192,62 +178,6 @@ def convert_to_csv_format(df_excel):
     return result_df
 
 
-def ensure_browser_safe_png(path):
-    """Ensure a downloaded graphical abstract is a real browser-safe PNG.
-
-    Google Drive links do not guarantee the underlying file format.  The old
-    flow saved every download as ``.png`` even when the bytes were TIFF/JPEG,
-    which can produce broken images in browsers.  Keep the stable file_id.png
-    naming, but convert the bytes to an actual PNG before publishing.
-    """
-    try:
-        with Image.open(path) as image:
-            original_format = image.format or 'UNKNOWN'
-            image.load()
-
-            if original_format == 'PNG':
-                return True, original_format, False
-
-            if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
-                converted = image.convert('RGBA')
-            else:
-                converted = image.convert('RGB')
-
-            tmp_path = f"{path}.tmp.png"
-            converted.save(tmp_path, format='PNG', optimize=True)
-            os.replace(tmp_path, path)
-            return True, original_format, True
-    except (UnidentifiedImageError, OSError, ValueError) as exc:
-        return False, str(exc), False
-
-
-def validate_browser_image_file(path):
-    """Strict local validation for images referenced by generated HTML."""
-    try:
-        with Image.open(path) as image:
-            image.load()
-            actual_format = image.format
-    except (UnidentifiedImageError, OSError, ValueError) as exc:
-        return False, f"cannot decode image: {exc}"
-
-    suffix = os.path.splitext(path)[1].lower()
-    expected = {
-        '.png': 'PNG',
-        '.jpg': 'JPEG',
-        '.jpeg': 'JPEG',
-        '.gif': 'GIF',
-        '.webp': 'WEBP',
-    }.get(suffix)
-
-    if expected and actual_format != expected:
-        return False, f"extension {suffix} but actual format is {actual_format}"
-
-    if actual_format not in {'PNG', 'JPEG', 'GIF', 'WEBP'}:
-        return False, f"unsupported browser image format: {actual_format}"
-
-    return True, actual_format
-
-
 def validate_issue_html_images(issue_key):
     """Fail the update if generated issue HTML references broken/mismatched images."""
     html_path = f'IssuesArticles/html/{issue_key}.html'
@@ -257,32 +187,25 @@ def validate_issue_html_images(issue_key):
     with open(html_path, 'r', encoding='utf-8') as file:
         html = file.read()
 
-    image_urls = re.findall(r'<img[^>]+src=["\']([^"\']+)["\']', html, flags=re.IGNORECASE)
+    # 按内容哈希缓存解码结果：未变化的图片只读文件头 + 哈希，不再完整解码
+    cache = ImageValidationCache()
     checked = 0
     failures = []
 
-    raw_prefix = 'https://raw.githubusercontent.com/tang1693/PERShtml/refs/heads/main/'
-    pages_prefix = 'https://tang1693.github.io/PERShtml/'
-
-    for src in image_urls:
-        if src.startswith(raw_prefix):
-            local_path = src[len(raw_prefix):]
-        elif src.startswith(pages_prefix):
-            local_path = src[len(pages_prefix):]
-        elif src.startswith(('http://', 'https://', 'data:')):
-            # External non-repo image; not expected for GA, but do not guess a local path.
+    for src in page_image_srcs(html):
+        local_path = resolve_image_src(src, html_path)
+        if local_path is None:
             continue
-        else:
-            local_path = os.path.normpath(os.path.join(os.path.dirname(html_path), src))
 
         checked += 1
         if not os.path.exists(local_path):
             failures.append(f"missing file for {src} -> {local_path}")
             continue
 
-        ok, reason = validate_browser_image_file(local_path)
+        ok, reason = cache.check(local_path)
         if not ok:
             failures.append(f"{local_path}: {reason}")
+    cache.save()
 
     if failures:
         details = '\n      - '.join(failures)
@@ -291,94 +214,19 @@ def validate_issue_html_images(issue_key):
     print(f"   ✅ 图片体检通过: {checked} 张")
 
 
-def download_ga_images(df, year, issue_no):
-    """下载图形摘要图片并在 DataFrame 中添加 GA_Path
-    
-    关键逻辑：
-    - Excel 每一行就是一条完整记录（包括 GA_Link）
-    - 下载后在**同一行**添加 GA_Path
-    - 文件名用 file_id（或任意唯一名），无需匹配
-    - 下载后强制校验/转换为真正 PNG，避免 TIFF/JPEG 伪装成 .png 导致网页坏图
-    - 生成 HTML 时使用相对路径，避免 raw.githubusercontent.com 429 影响网页图片
-    """
-    output_dir = f'IssuesArticles/html/img/{year}/{issue_no}'
-    os.makedirs(output_dir, exist_ok=True)
-    
-    base_url = f"img/{year}/{issue_no}"
-    
-    print(f"\n📥 下载 GA 图片到: {output_dir}")
-    
-    success_count = 0
-    failures = []
-    for index, row in df.iterrows():
-        title = row['Title']
-        ga_link = row['GA_Link']
-        
-        if pd.isna(ga_link):
-            print(f"   ⚠️  无 GA 链接: {title[:50]}...")
-            continue
-        
-        # 提取 Google Drive file ID
-        match = re.search(r'/d/([^/]+)/', ga_link)
-        if not match:
-            message = f"无法解析 GA 链接: {title[:50]}..."
-            print(f"   ⚠️  {message}")
-            failures.append(message)
-            continue
-        
-        file_id = match.group(1)
-        # 文件名稳定使用 file_id，但内容必须转换成真正 PNG
-        filename = f"{file_id}.png"
-        output_path = os.path.join(output_dir, filename)
-        
-        # 下载（如果不存在）
-        if os.path.exists(output_path):
-            print(f"   ⏭️  {title[:50]}... (已存在，执行格式体检)")
-        else:
-            try:
-                print(f"   📥 {title[:50]}...")
-                tmp_download_path = f"{output_path}.download"
-                if os.path.exists(tmp_download_path):
-                    os.remove(tmp_download_path)
-                downloaded = gdown.download(f"https://drive.google.com/uc?id={file_id}", tmp_download_path, quiet=True)
-                if not downloaded or not os.path.exists(tmp_download_path) or os.path.getsize(tmp_download_path) == 0:
-                    message = f"下载失败或空文件: {title[:50]}..."
-                    print(f"   ❌ {message}")
-                    failures.append(message)
-                    continue
-                os.replace(tmp_download_path, output_path)
-            except Exception as e:
-                message = f"下载失败: {title[:50]}... ({e})"
-                print(f"   ❌ {message}")
-                failures.append(message)
-                continue
-
-        ok, original_format, converted = ensure_browser_safe_png(output_path)
-        if not ok:
-            message = f"图片格式无效: {title[:50]}... ({original_format})"
-            print(f"   ❌ {message}")
-            failures.append(message)
-            continue
 
-        if converted:
-            print(f"   🔁 已转换为 PNG: {title[:50]}... ({original_format} -> PNG)")
-        else:
-            print(f"   ✅ PNG 体检通过: {title[:50]}...")
+# 卡片片段（In-Press / Recent / Top 6 / Trending）共用的模板；模板或样式表变化时片段也要重新生成
+CARD_TEMPLATES = ['templates.py', 'templates/article_card.html']
 
-        success_count += 1
-        
-        # 关键：在同一行添加 GA_Path
-        # HTML 生成时会读取同一行的所有数据，自然对应
-        df.loc[index, 'GA_Path'] = f"{base_url}/{filename}"
-    
-    if failures:
-        details = '\n      - '.join(failures)
-        raise RuntimeError(f"GA image processing failed:\n      - {details}")
 
-    print(f"\n✅ GA 下载/体检: {success_count}/{len(df)}")
-    return df
+def card_fragment_inputs():
+    """input_hash 的 extra：模板内容哈希 + 样式表发布路径（片段中嵌入的 assets/site.<哈希>.css）"""
+    return {
+        'templates': {path: hash_file(path) for path in CARD_TEMPLATES},
+        'stylesheet': publish_stylesheet(),
+    }
 
-def update_module_1_inpress(df_inpress):
+def update_module_1_inpress(df_inpress, manifest=None):
     """更新模块1: InPress"""
     print("\n📌 模块 1: InPress")
 
@@ -406,71 +254,59 @@ def update_module_1_inpress(df_inpress):
     removed = len(prev_set - new_set)
     print(f"   📊 In-Press 统计: +{added} / -{removed} / 当前 {len(new_df)} 篇")
 
-    # 生成 HTML
-    import subprocess
-    result = subprocess.run(['python3', '1_InPress/3_csv_2_html.py'], capture_output=True, text=True)
-    if result.returncode == 0:
-        print(f"   ✅ 已生成: in_press_articles.html")
-    else:
-        print(f"   ❌ HTML 生成失败: {result.stderr}")
-
-def update_module_2_issues():
+    # 生成 HTML（进程内调用，直接使用内存中的 DataFrame；输入未变化时跳过）
+    try:
+        script = '1_InPress/3_csv_2_html.py'
+        generator = load_script(script)
+        digest = input_hash(rows=new_df, generator=script, extra=card_fragment_inputs())
+        if build_if_changed(manifest, [generator.OUTPUT_FILENAME], digest,
+                            lambda: run_stage('InPress HTML', generator.generate_inpress_html, new_df),
+                            'in_press_articles.html'):
+            print(f"   ✅ 已生成: in_press_articles.html")
+    except Exception as e:
+        print(f"   ❌ HTML 生成失败: {e}")
+
+def update_module_2_issues(manifest=None):
     """更新模块2: Issues - 重新生成整个 issues.html"""
     print("\n📌 模块 2: Issues")
     
-    # 运行 issues_generate_html.py 重新生成
-    result = subprocess.run(
-        ['python3', '2_Issues/issues_generate_html.py'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode == 0:
-        print(f"   ✅ issues.html 已重新生成")
-    else:
-        print(f"   ❌ 生成失败: {result.stderr}")
-
-def update_module_5_recent():
+    # 调用 issues_generate_html.py 重新生成
+    try:
+        from dateutil.relativedelta import relativedelta
+
+        script = '2_Issues/issues_generate_html.py'
+        generator = load_script(script)
+        # issues.html 只取决于最新期号和 Full access 的截止月份（12个月前）
+        full_access_cutoff = (datetime.now() - relativedelta(months=12)).strftime('%Y%m')
+        digest = input_hash(generator=script, extra={
+            'latest_issue': list(generator.get_latest_issue()),
+            'full_access_cutoff': full_access_cutoff,
+        })
+        if build_if_changed(manifest, ['issues.html'], digest,
+                            lambda: run_stage('Issues HTML', generator.write_issues_html, 'issues.html'),
+                            'issues.html'):
+            print(f"   ✅ issues.html 已重新生成")
+    except Exception as e:
+        print(f"   ❌ 生成失败: {e}")
+
+def update_module_5_recent(store, manifest=None):
     """
     更新模块5: Recent Articles
-    从 ALL_articles_Update_cleaned.csv 提取最近6个月的所有文章
+    从总库（catalog_store）按期号索引提取最近6个月的所有文章
     """
     print("\n📌 模块 5: Recent Articles")
     
     from dateutil.relativedelta import relativedelta
     
-    # 读取总库
-    all_csv = '6_IssuesArticles/ALL_articles_Update_cleaned.csv'
-    if not os.path.exists(all_csv):
-        print(f"   ⚠️  {all_csv} 不存在，跳过")
+    if store.is_empty():
+        print(f"   ⚠️  {CATALOG_CSV} 不存在，跳过")
         return
     
-    df_all = pd.read_csv(all_csv)
-    
-    # 解析日期：优先从 IssueKey，否则从 URL 解析
-    def parse_issue_date(row):
-        """解析文章的发布日期"""
-        # 方法1: 从 IssueKey
-        if pd.notna(row.get('IssueKey')):
-            issue_key = canonical_issue_key(row.get('IssueKey'))
-            if re.fullmatch(r'\d{6}', issue_key):
-                year = int(issue_key[:4])
-                month = int(issue_key[4:])
-                return datetime(year, month, 1)
-        
-        # 方法2: 从 Ingenta URL 解析
-        # 格式: .../pers/{year}/0000{volume}/0000{issue}/...
-        url = row.get('URL', '')
-        if 'ingentaconnect.com' in url:
-            match = re.search(r'/pers/(\d{4})/\d+/(\d+)/', url)
-            if match:
-                year = int(match.group(1))
-                issue = int(match.group(2))  # 去掉前导0
-                return datetime(year, issue, 1)
-        
-        return None
-    
-    df_all['IssueDate'] = df_all.apply(parse_issue_date, axis=1)
+    # 只读取最近6个月所在期号及之后的行，下面再按日期精确筛选
+    since_key = (datetime.now() - relativedelta(months=6)).strftime('%Y%m')
+    # _issue_date 由 issue_keys 在写入总库时推导（IssueKey 优先，否则解析 Ingenta URL）
+    df_all = store.read_issues_since(since_key, derived=True)
+    df_all['IssueDate'] = df_all['_issue_date']
     
     # 计算6个月前的日期
     current_date = datetime.now()
@@ -501,46 +337,81 @@ def update_module_5_recent():
         print(f"      {month}: {count} 篇")
     
     # 生成 HTML
-    result = subprocess.run(['python3', '5_RecentArticles/recent_article_2generate_html.py'], capture_output=True, text=True)
-    if result.returncode == 0:
-        print(f"   ✅ 已生成: open_access_articles.html & member_only_articles.html")
-    else:
-        print(f"   ❌ HTML 生成失败: {result.stderr}")
-
-def update_module_7_most_cited():
+    try:
+        script = '5_RecentArticles/recent_article_2generate_html.py'
+        generator = load_script(script)
+        outputs = [generator.OPEN_ACCESS_FILENAME, generator.MEMBER_ONLY_FILENAME]
+        digest = input_hash(rows=df_recent[columns], generator=script, extra=card_fragment_inputs())
+        if build_if_changed(manifest, outputs, digest,
+                            lambda: run_stage('Recent HTML', generator.generate_recent_html, df_recent[columns]),
+                            'open_access_articles.html & member_only_articles.html'):
+            print(f"   ✅ 已生成: open_access_articles.html & member_only_articles.html")
+    except Exception as e:
+        print(f"   ❌ HTML 生成失败: {e}")
+
+def update_module_7_most_cited(store, manifest=None):
     """更新模块7: Most Cited Articles（最近2年）"""
     print("\n📌 模块 7: Most Cited Articles")
     
-    # 运行脚本：提取数据 + 获取引用数
-    result = subprocess.run(
-        ['python3', '7_MostCited/fetch_citations.py'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        print(f"   ❌ 数据提取失败: {result.stderr}")
+    if store.is_empty():
+        print(f"   ⚠️  {CATALOG_CSV} 不存在，跳过")
         return
     
-    # 显示输出
-    for line in result.stdout.split('\n'):
-        if line.strip():
-            print(f"   {line}")
+    # 只读取最近2年所在期号及之后的行（fetch_most_cited 内部再按天数精确筛选）
+    since_key = (datetime.now() - timedelta(days=365 * 2)).strftime('%Y%m')
+    df_all = store.read_issues_since(since_key, derived=True)
     
-    # 生成 HTML
-    result = subprocess.run(
-        ['python3', '7_MostCited/generate_html.py'],
-        capture_output=True,
-        text=True
-    )
+    # 提取数据 + 获取引用数
+    try:
+        fetcher = load_script('7_MostCited/fetch_citations.py')
+        df_cited = run_stage('Most Cited 数据', fetcher.fetch_most_cited, df_all)
+    except Exception as e:
+        print(f"   ❌ 数据提取失败: {e}")
+        return
     
-    if result.returncode == 0:
-        print(f"   ✅ top_6_articles.html 已生成")
-    else:
-        print(f"   ❌ HTML 生成失败: {result.stderr}")
+    # 生成 HTML
+    try:
+        script = '7_MostCited/generate_html.py'
+        generator = load_script(script)
+        digest = input_hash(rows=df_cited, generator=script, extra=card_fragment_inputs())
+        if build_if_changed(manifest, ['top_6_articles.html'], digest,
+                            lambda: run_stage('Top 6 HTML', generator.generate_top_6_html, df_cited),
+                            'top_6_articles.html'):
+            print(f"   ✅ top_6_articles.html 已生成")
+    except Exception as e:
+        print(f"   ❌ HTML 生成失败: {e}")
+
+    # 可选的 Trending 片段（引用数增长最快的文章，引用数历史不足时不生成）
+    try:
+        script = '7_MostCited/generate_trending_html.py'
+        generator = load_script(script)
+        digest = input_hash(rows=df_cited, generator=script, extra=card_fragment_inputs())
+        if build_if_changed(manifest, [generator.TRENDING_FILENAME], digest,
+                            lambda: run_stage('Trending HTML', generator.generate_trending_html, df_cited),
+                            generator.TRENDING_FILENAME, optional=True):
+            print(f"   ✅ Trending 已更新")
+    except Exception as e:
+        print(f"   ❌ Trending HTML 生成失败: {e}")
+
+def update_module_8_authors(store):
+    """更新模块8: 作者页（只重新生成文章集合有变化的作者）"""
+    print("\n📌 模块 8: Authors")
+
+    if store.is_empty():
+        print(f"   ⚠️  {CATALOG_CSV} 不存在，跳过")
+        return
+
+    try:
+        generator = load_script('8_Authors/generate_author_pages.py')
+        run_stage('Author HTML', generator.generate_author_pages, store)
+    except Exception as e:
+        print(f"   ❌ HTML 生成失败: {e}")
 
-def update_module_6_articles(df_research):
-    """更新模块6: IssuesArticles"""
+def update_module_6_articles(df_research, store):
+    """更新模块6: IssuesArticles
+
+    在总库（catalog_store）中按期号 upsert 本期文章，再导出 CSV 保持兼容
+    """
     print("\n📌 模块 6: IssuesArticles")
 
     if len(df_research) == 0:
@@ -550,63 +421,58 @@ def update_module_6_articles(df_research):
     issue_key = canonical_issue_key(df_research['IssueKey'].iloc[0])
     new_issue_set = set(zip(df_research.get('Title', []), df_research.get('URL', [])))
 
-    all_csv_path = '6_IssuesArticles/ALL_articles_Update_cleaned.csv'
+    all_csv_path = CATALOG_CSV
     prev_issue_set = set()
 
-    if os.path.exists(all_csv_path):
-        existing_df = pd.read_csv(all_csv_path)
-
-        backup_path = f"6_IssuesArticles/ALL_articles_Update_cleaned.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        existing_df.to_csv(backup_path, index=False)
-        print(f"   📦 已备份: {backup_path}")
-
-        issue_mask = existing_df['IssueKey'].apply(canonical_issue_key) == issue_key
-        prev_issue_df = existing_df[issue_mask]
+    if not store.is_empty():
+        existing_count = store.count()
+        result = store.upsert_issue(issue_key, df_research)
+        prev_issue_df = result.previous
+        # 只记录本期实际删除 / 插入的行（可用 catalog_journal.py restore --to 恢复）
+        journal_path = record_change(issue_key, result)
+        print(f"   📦 已记录变更日志: {journal_path} (-{len(result.removed)} / +{len(result.added)} 行)")
         if not prev_issue_df.empty:
             prev_issue_set = set(zip(prev_issue_df.get('Title', []), prev_issue_df.get('URL', [])))
 
-        existing_df = existing_df[~issue_mask]
-
-        combined_df = pd.concat([existing_df, df_research], ignore_index=True)
-        combined_df.drop_duplicates(subset=['Title', 'URL'], keep='last', inplace=True)
-        combined_df.to_csv(all_csv_path, index=False)
+        store.export_csv(all_csv_path)
         print(f"   ✅ 已更新: {all_csv_path}")
-        print(f"      原有: {len(existing_df)} 条 | 新增: {len(df_research)} 条 | 总计: {len(combined_df)} 条")
+        print(f"      原有: {existing_count - len(prev_issue_df)} 条 | 新增: {len(df_research)} 条 | 总计: {store.count()} 条")
     else:
         print("   ⚠️  未找到现有文件，创建新文件")
-        df_research.to_csv(all_csv_path, index=False)
+        result = store.upsert_issue(issue_key, df_research)
+        record_change(issue_key, result)
+        store.export_csv(all_csv_path)
 
     added = len(new_issue_set - prev_issue_set)
     removed = len(prev_issue_set - new_issue_set)
     print(f"   📊 Issue {issue_key}: +{added} / -{removed} / 当前 {len(df_research)} 篇")
 
-    # 清除 log 中的本期记录（强制重新生成）
-    log_path = '6_IssuesArticles/processed_issues.log'
-    if os.path.exists(log_path):
-        with open(log_path, 'r') as f:
-            lines = f.readlines()
-        with open(log_path, 'w') as f:
-            for line in lines:
-                if issue_key not in line:
-                    f.write(line)
+    # 清除构建状态中的本期记录（按主键删除，强制重新生成）
+    state = BuildState()
+    state.invalidate(issue_key)
+    state.close()
 
-    import subprocess
-    result = subprocess.run(['python3', '6_IssuesArticles/generate_article_page_v3.py'], capture_output=True, text=True)
-    if result.returncode == 0:
-        issue_display = canonical_issue_key(df_research['IssueKey'].iloc[0])
-        print(f"   ✅ 已生成: IssuesArticles/html/{issue_display}.html")
-        validate_issue_html_images(issue_display)
-    else:
-        print(f"   ❌ HTML 生成失败: {result.stderr}")
-        raise RuntimeError(f"HTML generation failed for issue {issue_key}")
+    try:
+        generator = load_script('6_IssuesArticles/generate_article_page_v3.py')
+        run_stage('Issue HTML', generator.generate_issue_pages, store.read_issue(issue_key, derived=True))
+    except Exception as e:
+        print(f"   ❌ HTML 生成失败: {e}")
+        raise RuntimeError(f"HTML generation failed for issue {issue_key}") from e
+
+    issue_display = canonical_issue_key(df_research['IssueKey'].iloc[0])
+    print(f"   ✅ 已生成: IssuesArticles/html/{issue_display}.html")
+    validate_issue_html_images(issue_display)
 
 def main():
-    if len(sys.argv) < 2:
-        print("用法: python update_from_s3.py <excel_filename>")
+    args = [arg for arg in sys.argv[1:] if arg != '--force']
+    force = '--force' in sys.argv[1:]
+    if len(args) < 1:
+        print("用法: python update_from_s3.py <excel_filename> [--force]")
         print("示例: python update_from_s3.py 26-04_April_metadata.xlsx")
+        print("   --force: 忽略构建清单，强制重新生成所有 HTML")
         sys.exit(1)
     
-    excel_filename = sys.argv[1]
+    excel_filename = args[0]
     
     print("=" * 70)
     print("🦞 PERShtml 自动更新工具 - 基于 S3 元数据")
@@ -647,17 +513,43 @@ def main():
     if len(df_research) > 0:
         df_research = download_ga_images(df_research, year, issue_no)
     
-    # 7. 更新各模块
-    update_module_1_inpress(df_inpress)
-    
-    if len(df_research) > 0:
-        update_module_6_articles(df_research)
-    
-    # Issues 索引依赖 IssuesArticles/html/YYYYMM.html 扫描最新期号，必须在文章页生成后刷新
-    update_module_2_issues()  # 重新生成整个 issues.html
-    
-    update_module_5_recent()  # 总是更新（从总库提取最近6个月）
-    update_module_7_most_cited()  # 总是更新（从总库提取最近2年+引用数）
+    # 7. 更新各模块（总库在 SQLite 中按期号读写，各模块只读取自己需要的期）
+    # 按依赖关系并行：模块 1 与模块 6 互不依赖；模块 2/5/7 都要等模块 6 写完文章页并合并总库
+    store = CatalogStore()
+    manifest = BuildManifest(force=force)
+
+    def run_variants(results):
+        if len(df_research) > 0 and 'GA_Path' in df_research.columns:
+            build_ga_variants(df_research['GA_Path'].dropna())
+
+    def run_articles(results):
+        if len(df_research) > 0:
+            update_module_6_articles(df_research, store)
+
+    stages = [
+        Stage('1_InPress', lambda results: update_module_1_inpress(df_inpress, manifest), ()),
+        # 文章页需要 GA 变体的尺寸来输出 <picture>/srcset
+        Stage('GA_Variants', run_variants, ()),
+        Stage('6_IssuesArticles', run_articles, ('GA_Variants',)),
+        # Issues 索引依赖 IssuesArticles/html/YYYYMM.html 扫描最新期号，必须在文章页生成后刷新
+        Stage('2_Issues', lambda results: update_module_2_issues(manifest), ('6_IssuesArticles',)),
+        # 总是更新（从合并后的总库提取最近6个月 / 最近2年+引用数）
+        Stage('5_RecentArticles', lambda results: update_module_5_recent(store, manifest), ('6_IssuesArticles',)),
+        Stage('7_MostCited', lambda results: update_module_7_most_cited(store, manifest), ('6_IssuesArticles',)),
+        Stage('8_Authors', lambda results: update_module_8_authors(store), ('6_IssuesArticles',)),
+        # 搜索索引按期增量更新（只对新增 / 变化的期分词）
+        Stage('Search_Index', lambda results: build_search_index(store.read_all(derived=True)), ('6_IssuesArticles',)),
+        # 所有 HTML 写完后统一 minify 并生成 .gz/.br
+        Stage('Publish', lambda results: publish_outputs(), ('1_InPress', '2_Issues', '5_RecentArticles', '7_MostCited', '8_Authors')),
+        # sitemap 的 lastmod 取各页面的生成时间，需等所有 HTML 阶段完成
+        Stage('Feeds', lambda results: update_feeds_and_sitemap(store, manifest),
+              ('1_InPress', '2_Issues', '5_RecentArticles', '7_MostCited', '8_Authors')),
+    ]
+    max_workers = int(os.getenv('PIPELINE_WORKERS', '4'))
+    try:
+        run_stages(stages, max_workers=max_workers)
+    finally:
+        store.close()
     
     print("\n" + "=" * 70)
     print("✅ 所有模块更新完成！")
@@ -671,6 +563,10 @@ def main():
         print(f"   - IssuesArticles/html/{canonical_issue_key(df_research['IssueKey'].iloc[0])}.html")
 
     print("   - top_6_articles.html (最近2年，Top 6)")
+    print("   - trending_articles.html (引用数增长最快，引用数历史足够时生成)")
+    print("   - feeds/rss.xml, feeds/atom.xml, feeds/feed.json, sitemap.xml")
+    print("   - 构建状态: 6_IssuesArticles/build_state.sqlite, build_manifest.json, 7_MostCited/citation_cache.sqlite"
+          "（与 HTML 一起提交）")
     print("\n💡 下一步:")
     print(f"   1. 检查生成的 HTML 文件")
     print(f"   2. git add . && git commit -m 'Update {month_name} {year}'")